@@ -1,6 +1,21 @@
 import re
 from typing import List, Dict, Optional, Tuple
 from .grammar_dictionary import get_grammar_dictionary
+from .grammar_utils import GrammarLabelMatcher
+
+# 英文から検出する文法構造のパターン（検出順）
+GRAMMAR_STRUCTURE_PATTERNS = {
+    '仮定法過去': [r'\bI\s+wish\s+I\s+were\b', r'\bif\s+\w+\s+\w+ed\b.*\bwould\b'],
+    '現在完了形': [r'\b(have|has)\s+\w+ed\b'],
+    '現在進行形': [r'\b(am|is|are)\s+\w+ing\b'],
+    '過去進行形': [r'\b(was|were)\s+\w+ing\b'],
+    '不定詞': [r'\bto\s+\w+\b'],
+    '動名詞': [r'\b\w+ing\b'],
+    '関係代名詞': [r'\b(who|which|that|whose)\b'],
+    '受動態': [r'\b(am|is|are|was|were)\s+\w+ed\b'],
+    '助動詞': [r'\b(can|could|will|would|should|must|may|might)\b'],
+}
+_structure_matcher = GrammarLabelMatcher(GRAMMAR_STRUCTURE_PATTERNS)
 
 
 class EnglishExtractor:
@@ -77,47 +92,7 @@ class EnglishExtractor:
     
     def _detect_grammar_structures(self, text: str) -> List[str]:
         """個別の英文から文法構造を検出"""
-        structures = []
-        
-        # 仮定法過去の検出
-        if re.search(r'\bI\s+wish\s+I\s+were\b', text, re.IGNORECASE):
-            structures.append('仮定法過去')
-        elif re.search(r'\bif\s+\w+\s+\w+ed\b.*\bwould\b', text, re.IGNORECASE):
-            structures.append('仮定法過去')
-        
-        # 現在完了形の検出
-        if re.search(r'\b(have|has)\s+\w+ed\b', text, re.IGNORECASE):
-            structures.append('現在完了形')
-        
-        # 現在進行形の検出
-        if re.search(r'\b(am|is|are)\s+\w+ing\b', text, re.IGNORECASE):
-            structures.append('現在進行形')
-        
-        # 過去進行形の検出
-        if re.search(r'\b(was|were)\s+\w+ing\b', text, re.IGNORECASE):
-            structures.append('過去進行形')
-        
-        # 不定詞の検出
-        if re.search(r'\bto\s+\w+\b', text, re.IGNORECASE):
-            structures.append('不定詞')
-        
-        # 動名詞の検出
-        if re.search(r'\b\w+ing\b', text, re.IGNORECASE):
-            structures.append('動名詞')
-        
-        # 関係代名詞の検出
-        if re.search(r'\b(who|which|that|whose)\b', text, re.IGNORECASE):
-            structures.append('関係代名詞')
-        
-        # 受動態の検出
-        if re.search(r'\b(am|is|are|was|were)\s+\w+ed\b', text, re.IGNORECASE):
-            structures.append('受動態')
-        
-        # 助動詞の検出
-        if re.search(r'\b(can|could|will|would|should|must|may|might)\b', text, re.IGNORECASE):
-            structures.append('助動詞')
-        
-        return structures
+        return _structure_matcher.find_patterns(text)
     
     def generate_search_query(self, grammar_analysis: Dict) -> str:
         """文法解析結果から英語の検索クエリを生成"""
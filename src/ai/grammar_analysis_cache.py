@@ -0,0 +1,158 @@
+import contextvars
+import copy
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 512
+
+_WHITESPACE = re.compile(r"\s+")
+
+_current_context: contextvars.ContextVar[Optional[Dict[Tuple[str, str], Dict[str, Any]]]] = contextvars.ContextVar(
+    "englishy_grammar_analysis_context", default=None
+)
+
+
+def normalize_text(text: str) -> str:
+    """キャッシュキー用にテキストを正規化する
+
+    前後の空白を除き、連続する空白を1つにまとめる。解析の正規表現は大文字小文字を
+    区別するものがあるため、大文字小文字はそのまま残す。
+    """
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class GrammarAnalysisCache:
+    """正規化したテキストをキーにした、プロセス共有の上限付きLRU"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return result
+
+    def put(self, key: Tuple[str, str], result: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """ヒット数・ミス数・追い出し数と現在の件数"""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+
+_cache: Optional[GrammarAnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_grammar_analysis_cache() -> GrammarAnalysisCache:
+    """プロセス共有のキャッシュを取得（件数の上限は ENGLISHY_GRAMMAR_ANALYSIS_CACHE_SIZE、0で無効）"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GrammarAnalysisCache(int(os.getenv("ENGLISHY_GRAMMAR_ANALYSIS_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
+        return _cache
+
+
+@contextmanager
+def analysis_context() -> Iterator[Dict[Tuple[str, str], Dict[str, Any]]]:
+    """1回のリサーチ実行の解析結果を保持するコンテキスト
+
+    ブロック内（そこから起動したタスクや ``asyncio.to_thread`` を含む）の解析は、
+    同じテキストであればプロセス共有のLRUから追い出された後でも再実行されない。
+    すでにコンテキスト内であれば外側のものをそのまま使う。
+    """
+    current = _current_context.get()
+    if current is not None:
+        yield current
+        return
+    results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    token = _current_context.set(results)
+    try:
+        yield results
+    finally:
+        _current_context.reset(token)
+
+
+def lookup_analysis(kind: str, text: str, shared: bool = True) -> Optional[Dict[str, Any]]:
+    """実行コンテキスト、次にLRUから解析結果を引く（なければNone）
+
+    Args:
+        kind: 解析器の種類（ルールベースとLLMの結果を区別する）
+        text: 解析したテキスト
+        shared: Falseなら実行コンテキストだけを見る
+
+    Returns:
+        解析結果のコピー（呼び出し側が変更してもキャッシュに影響しない）
+    """
+    key = (kind, normalize_text(text))
+    context = _current_context.get()
+    result = context.get(key) if context is not None else None
+    if result is None and shared:
+        result = get_grammar_analysis_cache().get(key)
+        if result is not None and context is not None:
+            context[key] = result
+    return copy.deepcopy(result) if result is not None else None
+
+
+def store_analysis(kind: str, text: str, result: Dict[str, Any], shared: bool = True) -> None:
+    """解析結果を実行コンテキストと（sharedなら）LRUに保存する。失敗時の結果は保存しない"""
+    if not isinstance(result, dict) or "error" in result:
+        return
+    key = (kind, normalize_text(text))
+    if shared:
+        get_grammar_analysis_cache().put(key, copy.deepcopy(result))
+    context = _current_context.get()
+    if context is not None:
+        context[key] = copy.deepcopy(result)
+
+
+def cached_analysis(kind: str, text: str, analyze: Callable[[str], Dict[str, Any]], shared: bool = True) -> Dict[str, Any]:
+    """解析結果をキャッシュから引き、なければ ``analyze`` で解析して保存する
+
+    Args:
+        kind: 解析器の種類（ルールベースとLLMの結果を区別する）
+        text: 解析するテキスト
+        analyze: 正規化したテキストを受け取る解析関数
+        shared: Falseなら実行コンテキスト内でだけ再利用する（LLMの結果など）
+
+    Returns:
+        解析結果のコピー（呼び出し側が変更してもキャッシュに影響しない）
+    """
+    result = lookup_analysis(kind, text, shared)
+    if result is None:
+        result = analyze(normalize_text(text))
+        store_analysis(kind, text, result, shared)
+    return result
+
+
+async def acached_analysis(kind: str, text: str, analyze: Callable[[str], Awaitable[Dict[str, Any]]], shared: bool = True) -> Dict[str, Any]:
+    """``cached_analysis`` の非同期版（``analyze`` はコルーチン関数）"""
+    result = lookup_analysis(kind, text, shared)
+    if result is None:
+        result = await analyze(normalize_text(text))
+        store_analysis(kind, text, result, shared)
+    return result
@@ -1,8 +1,23 @@
 import re
 from typing import List, Dict, Optional, Tuple
 from .grammar_dictionary import get_grammar_dictionary
+from .grammar_analysis_cache import cached_analysis
 # 共通ユーティリティをimport
-from .grammar_utils import grammar_en_map, extract_grammar_labels, translate_to_english_grammar
+from .grammar_utils import GrammarLabelMatcher, grammar_en_map, extract_grammar_labels, translate_to_english_grammar
+
+# 従来の文法構造検出のパターン（検出順）
+TRADITIONAL_GRAMMAR_PATTERNS = {
+    '現在進行形': [r'\b(am|is|are)\s+\w+ing\b'],
+    '過去進行形': [r'\b(was|were)\s+\w+ing\b'],
+    '現在完了形': [r'\b(have|has)\s+\w+ed\b'],
+    '現在完了進行形': [r'\b(have|has)\s+been\s+\w+ing\b'],
+    '不定詞': [r'\bto\s+\w+\b'],
+    '動名詞': [r'\b\w+ing\b'],
+    '関係代名詞': [r'\b(who|which|that|whose)\b'],
+    '仮定法': [r'\bif\b.*\b(would|could|should|might)\b'],
+    '受動態': [r'\b(am|is|are|was|were)\s+\w+ed\b'],
+}
+_traditional_matcher = GrammarLabelMatcher(TRADITIONAL_GRAMMAR_PATTERNS)
 
 
 class GrammarAnalyzer:
@@ -12,6 +27,10 @@ class GrammarAnalyzer:
         self.grammar_dict = get_grammar_dictionary()
     
     def analyze_text(self, text: str) -> Dict[str, any]:
+        """テキストの文法構造を解析（正規化したテキストごとに1回だけ解析する）"""
+        return cached_analysis("rule", text, self._analyze_text)
+
+    def _analyze_text(self, text: str) -> Dict[str, any]:
         """テキストの文法構造を解析（grammar_utilsを活用）"""
         # 英文を抽出
         english_sentences = self._extract_english_sentences(text)
@@ -115,39 +134,7 @@ class GrammarAnalyzer:
     
     def _detect_traditional_grammar_structures(self, sentence: str) -> List[str]:
         """従来の文法構造検出（grammar_utilsの補完用）"""
-        structures = []
-        
-        # 時制の検出
-        if re.search(r'\b(am|is|are)\s+\w+ing\b', sentence, re.IGNORECASE):
-            structures.append('現在進行形')
-        if re.search(r'\b(was|were)\s+\w+ing\b', sentence, re.IGNORECASE):
-            structures.append('過去進行形')
-        if re.search(r'\b(have|has)\s+\w+ed\b', sentence, re.IGNORECASE):
-            structures.append('現在完了形')
-        if re.search(r'\b(have|has)\s+been\s+\w+ing\b', sentence, re.IGNORECASE):
-            structures.append('現在完了進行形')
-        
-        # 不定詞の検出
-        if re.search(r'\bto\s+\w+\b', sentence, re.IGNORECASE):
-            structures.append('不定詞')
-        
-        # 動名詞の検出
-        if re.search(r'\b\w+ing\b', sentence, re.IGNORECASE):
-            structures.append('動名詞')
-        
-        # 関係代名詞の検出
-        if re.search(r'\b(who|which|that|whose)\b', sentence, re.IGNORECASE):
-            structures.append('関係代名詞')
-        
-        # 仮定法の検出
-        if re.search(r'\bif\b.*\b(would|could|should|might)\b', sentence, re.IGNORECASE):
-            structures.append('仮定法')
-        
-        # 受動態の検出
-        if re.search(r'\b(am|is|are|was|were)\s+\w+ed\b', sentence, re.IGNORECASE):
-            structures.append('受動態')
-        
-        return structures
+        return _traditional_matcher.find_patterns(sentence)
     
     def _extract_key_points(self, sentence: str) -> List[str]:
         """重要なポイントを抽出"""
@@ -186,6 +173,7 @@ class GrammarAnalyzer:
     def get_learning_path(self, grammar_structures: List[str]) -> List[Dict]:
         """学習パスを生成（grammar_utilsの結果を活用）"""
         learning_path = []
+        graph = self.grammar_dict.graph
         
         for structure in grammar_structures:
             # 基礎から応用への順序を決定
@@ -199,20 +187,23 @@ class GrammarAnalyzer:
                 level = 'intermediate'
             
             # GrammarDictionaryから詳細情報を取得
-            items = self.grammar_dict.search_by_keyword(structure)
-            if items:
-                item = items[0]
+            matches = self.grammar_dict.index.search(structure)
+            if matches:
+                index = matches[0]
+                item = self.grammar_dict.grammar_data[index]
                 learning_path.append({
                     'structure': structure,
                     'level': level,
                     'title': item.get('title', ''),
                     'summary': item.get('summary', ''),
-                    'related_items': [link.get('text', '') for link in item.get('related_links', [])]
+                    'related_items': [link.get('text', '') for link in item.get('related_links', [])],
+                    '_index': index
                 })
         
-        # レベル順にソート
+        # レベル順、同じレベルの中では関連リンクの前提となる項目が先に来る順にソート
+        study_rank = {index: rank for rank, index in enumerate(graph.study_order(entry['_index'] for entry in learning_path))}
         level_order = {'basic': 1, 'intermediate': 2, 'advanced': 3}
-        learning_path.sort(key=lambda x: level_order.get(x['level'], 2))
+        learning_path.sort(key=lambda x: (level_order.get(x['level'], 2), study_rank[x.pop('_index')]))
         
         return learning_path
     
@@ -4,6 +4,9 @@ from typing import List, Dict, Optional
 from pathlib import Path
 import re
 
+from .grammar_graph import GrammarGraph
+from .grammar_index import GrammarSearchIndex
+
 
 class GrammarDictionary:
     """英文法辞書データを管理・検索するクラス"""
@@ -12,6 +15,7 @@ class GrammarDictionary:
         self.data_path = Path(data_path)
         self.grammar_data = []
         self._load_data()
+        self._build_index()
     
     def _load_data(self):
         """JSONファイルから文法データを読み込み"""
@@ -24,56 +28,62 @@ class GrammarDictionary:
                 print(f"GrammarDictionary読み込みエラー: {e}")
                 self.grammar_data = []
     
+    def _build_index(self):
+        """読み込んだデータの検索インデックスと関連リンクのグラフを構築"""
+        self.index = GrammarSearchIndex(self.grammar_data)
+        self.graph = GrammarGraph(self.grammar_data)
+    
     def search_by_keyword(self, keyword: str) -> List[Dict]:
-        """キーワードで文法項目を検索"""
-        results = []
-        keyword_lower = keyword.lower()
-        
-        for item in self.grammar_data:
-            # タイトル、タグ、サマリー、コンテンツで検索
-            searchable_text = f"{item.get('title', '')} {' '.join(item.get('tags', []))} {item.get('summary', '')} {item.get('content', '')}"
-            
-            if keyword_lower in searchable_text.lower():
-                results.append(item)
-        
-        return results
+        """キーワードで文法項目を検索（タイトル・タグ・サマリー・コンテンツの重み付きで関連度順）"""
+        return [self.grammar_data[i] for i in self.index.search(keyword)]
+    
+    def search_by_prefix(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """タイトル・タグ・タイトル中の語の接頭辞で文法項目を検索（入力補完用）"""
+        return [self.grammar_data[i] for i in self.index.search_prefix(prefix, limit)]
     
     def search_by_tags(self, tags: List[str]) -> List[Dict]:
         """タグで文法項目を検索"""
-        results = []
-        tags_lower = [tag.lower() for tag in tags]
-        
-        for item in self.grammar_data:
-            item_tags = [tag.lower() for tag in item.get('tags', [])]
-            if any(tag in item_tags for tag in tags_lower):
-                results.append(item)
-        
-        return results
+        return [self.grammar_data[i] for i in self.index.search_tags(tags)]
     
     def get_related_topics(self, topic: str) -> List[Dict]:
         """関連トピックを取得"""
-        # まずトピックに関連する項目を検索
-        related_items = self.search_by_keyword(topic)
-        
-        # 関連リンクから追加の項目を取得
-        all_related = []
-        for item in related_items:
-            all_related.append(item)
-            
-            # 関連リンクの項目も追加
-            for link in item.get('related_links', []):
-                linked_item = self._find_by_filename(link.get('file', ''))
-                if linked_item and linked_item not in all_related:
-                    all_related.append(linked_item)
+        # トピックに関連する項目と、その関連リンク先の項目を順に集める
+        related: Dict[int, None] = {}
+        for index in self.index.search(topic):
+            for candidate in [index, *self.graph.out_edges[index]]:
+                related.setdefault(candidate)
+            if len(related) >= 5:
+                break
         
-        return all_related[:5]  # 最大5件まで
+        return [self.grammar_data[i] for i in list(related)[:5]]  # 最大5件まで
+    
+    def _best_match(self, topic: str) -> Optional[int]:
+        """トピックに最も関連する項目の番号"""
+        matches = self.index.search(topic)
+        return matches[0] if matches else None
+    
+    def get_neighbourhood(self, topics: List[str], k: int = 1, limit: int = 5) -> List[Dict]:
+        """各トピックに最も関連する項目から、関連リンクを ``k`` 回以内でたどれる項目を取得（近い順）"""
+        sources = [i for i in map(self._best_match, topics) if i is not None]
+        return [self.grammar_data[i] for i in self.graph.related(sources, k, limit)]
+    
+    def get_prerequisite_path(self, goal: str, start: str) -> List[Dict]:
+        """``start`` のトピックから ``goal`` のトピックまでの最短の学習順を取得（たどれなければ空）"""
+        goal_index, start_index = self._best_match(goal), self._best_match(start)
+        if goal_index is None or start_index is None:
+            return []
+        path = self.graph.prerequisite_path(goal_index, start_index)
+        return [self.grammar_data[i] for i in path or []]
+    
+    def get_study_order(self, topics: List[str]) -> List[Dict]:
+        """各トピックに最も関連する項目を、前提となる項目が先に来る順に並べる"""
+        indices = [i for i in map(self._best_match, topics) if i is not None]
+        return [self.grammar_data[i] for i in self.graph.study_order(indices)]
     
     def _find_by_filename(self, filename: str) -> Optional[Dict]:
         """ファイル名で項目を検索"""
-        for item in self.grammar_data:
-            if item.get('filename') == filename:
-                return item
-        return None
+        index = self.graph.find(filename)
+        return self.grammar_data[index] if index is not None else None
     
     def format_for_references(self, items: List[Dict]) -> str:
         """参考文献形式でフォーマット"""
@@ -0,0 +1,140 @@
+import heapq
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class GrammarGraph:
+    """GrammarDictionaryの関連リンク（``related_links``）のグラフ
+
+    読み込み時に一度だけ、ファイル名→項目番号のハッシュ索引と隣接リスト、
+    入次数・出次数を作る。項目のリンク先はその項目の前提となる項目とみなす
+    （例: 仮定法過去 → 過去形）。存在しないファイルへのリンクと自己ループは無視する。
+    """
+
+    def __init__(self, items: Iterable[Dict]):
+        items = list(items)
+        self.by_filename: Dict[str, int] = {}
+        for index, item in enumerate(items):
+            filename = item.get("filename")
+            if filename:
+                self.by_filename.setdefault(filename, index)
+
+        self.out_edges: List[List[int]] = [[] for _ in items]
+        self.in_edges: List[List[int]] = [[] for _ in items]
+        for index, item in enumerate(items):
+            seen = set()
+            for link in item.get("related_links", []) or []:
+                target = self.by_filename.get(link.get("file", ""))
+                if target is None or target == index or target in seen:
+                    continue
+                seen.add(target)
+                self.out_edges[index].append(target)
+                self.in_edges[target].append(index)
+        self.out_degree = [len(edges) for edges in self.out_edges]
+        self.in_degree = [len(edges) for edges in self.in_edges]
+
+    def __len__(self) -> int:
+        return len(self.out_edges)
+
+    def find(self, filename: str) -> Optional[int]:
+        """ファイル名の項目番号（なければNone）"""
+        return self.by_filename.get(filename)
+
+    def neighbourhood(self, sources: Iterable[int], k: int = 1, directed: bool = False) -> Dict[int, int]:
+        """
+        ``sources`` から ``k`` ホップ以内の項目と距離を返す
+
+        Args:
+            sources: 起点の項目番号
+            k: 最大ホップ数
+            directed: Trueならリンクの向き（前提の方向）だけをたどる
+
+        Returns:
+            項目番号 → 距離（起点は0、幅優先の順）
+        """
+        distances = {source: 0 for source in sources}
+        queue = deque(distances)
+        while queue:
+            node = queue.popleft()
+            if distances[node] >= k:
+                continue
+            neighbours = self.out_edges[node] if directed else self.out_edges[node] + self.in_edges[node]
+            for neighbour in neighbours:
+                if neighbour not in distances:
+                    distances[neighbour] = distances[node] + 1
+                    queue.append(neighbour)
+        return distances
+
+    def related(self, sources: Iterable[int], k: int = 1, limit: Optional[int] = None) -> List[int]:
+        """起点を除く ``k`` ホップ以内の項目を、近い順・よく参照される順に返す"""
+        sources = list(sources)
+        distances = self.neighbourhood(sources, k)
+        for source in sources:
+            distances.pop(source, None)
+        ranked = sorted(distances, key=lambda node: (distances[node], -self.in_degree[node], node))
+        return ranked[:limit] if limit is not None else ranked
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """
+        ``source`` からリンクをたどって ``target`` に至る最短の経路
+
+        Returns:
+            ``[source, ..., target]``（たどれなければNone）
+        """
+        parents: Dict[int, Optional[int]] = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
+            for neighbour in self.out_edges[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append(neighbour)
+        return None
+
+    def prerequisite_path(self, goal: int, start: int) -> Optional[List[int]]:
+        """``start`` から ``goal`` までの最短の学習順（前提から順に ``[start, ..., goal]``）"""
+        path = self.shortest_path(goal, start)
+        return path[::-1] if path is not None else None
+
+    def study_order(self, nodes: Iterable[int]) -> List[int]:
+        """
+        ``nodes`` を前提が先に来る順（トポロジカル順）に並べる
+
+        前提の項目が複数あるときは、全体でよく参照される項目（基礎的な項目）を先にする。
+        循環がある場合は、未学習の前提が最も少ない項目から続ける。
+
+        Args:
+            nodes: 項目番号
+
+        Returns:
+            学習順に並べた項目番号
+        """
+        nodes = list(dict.fromkeys(nodes))
+        members = set(nodes)
+        # 前提（リンク先）の残り数
+        pending = {node: sum(1 for target in self.out_edges[node] if target in members) for node in nodes}
+
+        def priority(node: int):
+            return (pending[node], -self.in_degree[node], node)
+
+        heap = [priority(node) for node in nodes]
+        heapq.heapify(heap)
+        order: List[int] = []
+        done = set()
+        while heap:
+            count, _, node = heapq.heappop(heap)
+            if node in done or count != pending[node]:
+                continue  # 古い優先度
+            done.add(node)
+            order.append(node)
+            for dependent in self.in_edges[node]:
+                if dependent in members and dependent not in done:
+                    pending[dependent] -= 1
+                    heapq.heappush(heap, priority(dependent))
+        return order
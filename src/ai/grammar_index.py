@@ -0,0 +1,158 @@
+import bisect
+import re
+from collections import defaultdict
+from typing import Collection, Dict, Iterable, List, Set, Tuple
+
+# フィールドごとの重み（タイトルに含まれる語が最も関連が強い）
+FIELD_WEIGHTS = {"title": 10.0, "tags": 6.0, "summary": 3.0, "content": 1.0}
+EXACT_TITLE_BONUS = 50.0
+TITLE_PREFIX_BONUS = 20.0
+EXACT_TAG_BONUS = 15.0
+
+NGRAM = 3
+SEARCH_CACHE_SIZE = 1024
+
+_WORD = re.compile(r"\w+")
+
+
+def _ngrams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _fields(item: Dict) -> Dict[str, str]:
+    return {
+        "title": item.get("title", "") or "",
+        "tags": " ".join(item.get("tags", []) or []),
+        "summary": item.get("summary", "") or "",
+        "content": item.get("content", "") or "",
+    }
+
+
+class GrammarSearchIndex:
+    """GrammarDictionaryの項目の転置インデックス
+
+    読み込み時に一度だけ構築する。キーワード検索は文字3-gramの転置リストの
+    積集合で候補を絞り、項目ごとに前計算した小文字のテキストで部分一致を確かめるので、
+    結果の集合は全件走査（タイトル・タグ・サマリー・コンテンツの連結への部分一致）と
+    同じになる。結果はフィールドの重み付きスコアの高い順に並べる。
+    """
+
+    def __init__(self, items: Iterable[Dict]):
+        self.items: List[Dict] = list(items)
+        self._searchable: List[str] = []
+        self._fields: List[Dict[str, str]] = []
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._tags: Dict[str, Set[int]] = {}
+        prefix_keys: List[Tuple[str, int, int]] = []  # (小文字の語, 種類, 項目番号)
+
+        for index, item in enumerate(self.items):
+            fields = {name: value.lower() for name, value in _fields(item).items()}
+            searchable = " ".join(fields.values())
+            self._fields.append(fields)
+            self._searchable.append(searchable)
+            for gram in _ngrams(searchable, NGRAM):
+                self._postings[gram].add(index)
+
+            title = fields["title"]
+            if title:
+                prefix_keys.append((title, 0, index))
+            for tag in item.get("tags", []) or []:
+                self._tags.setdefault(tag.lower(), set()).add(index)
+                prefix_keys.append((tag.lower(), 1, index))
+            for word in set(_WORD.findall(title)):
+                if word != title:
+                    prefix_keys.append((word, 2, index))
+
+        prefix_keys.sort()
+        self._prefix_keys = prefix_keys
+        self._prefix_terms = [key for key, _, _ in prefix_keys]
+        # 同じ語が繰り返し検索されるため、結果を上限付きで保持する
+        self._search_cache: Dict[str, Tuple[int, ...]] = {}
+        self._stats = {"cache_hits": 0, "cache_misses": 0, "candidates_checked": 0}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _candidates(self, keyword: str) -> Collection[int]:
+        if len(keyword) < NGRAM:
+            # n-gramより短い語は前計算したテキストを直接調べる
+            return range(len(self.items))
+        postings = [self._postings.get(gram) for gram in _ngrams(keyword, NGRAM)]
+        if any(p is None for p in postings):
+            return ()
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def score(self, index: int, keyword: str) -> float:
+        """項目 ``index`` のキーワード ``keyword``（小文字）に対する関連度"""
+        fields = self._fields[index]
+        score = sum(weight * fields[name].count(keyword) for name, weight in FIELD_WEIGHTS.items())
+        if fields["title"] == keyword:
+            score += EXACT_TITLE_BONUS
+        elif fields["title"].startswith(keyword):
+            score += TITLE_PREFIX_BONUS
+        if index in self._tags.get(keyword, ()):
+            score += EXACT_TAG_BONUS
+        return score
+
+    def search(self, keyword: str) -> List[int]:
+        """
+        キーワードを含む項目の番号を関連度の高い順に返す
+
+        Args:
+            keyword: 検索語（大文字小文字は区別しない）
+
+        Returns:
+            項目番号のリスト（同点はファイル内の順）
+        """
+        keyword = keyword.lower()
+        if not keyword:
+            return list(range(len(self.items)))
+        cached = self._search_cache.get(keyword)
+        if cached is not None:
+            self._stats["cache_hits"] += 1
+        else:
+            self._stats["cache_misses"] += 1
+            candidates = self._candidates(keyword)
+            self._stats["candidates_checked"] += len(candidates)
+            matches = [index for index in candidates if keyword in self._searchable[index]]
+            cached = tuple(sorted(matches, key=lambda index: (-self.score(index, keyword), index)))
+            if len(self._search_cache) >= SEARCH_CACHE_SIZE:
+                self._search_cache.pop(next(iter(self._search_cache)), None)
+            self._search_cache[keyword] = cached
+        return list(cached)
+
+    def stats(self) -> Dict[str, int]:
+        """検索キャッシュのヒット・ミス数と、部分一致を確かめた候補の総数"""
+        return dict(self._stats)
+
+    def search_tags(self, tags: Iterable[str]) -> List[int]:
+        """いずれかのタグを持つ項目の番号（ファイル内の順）"""
+        matches: Set[int] = set()
+        for tag in tags:
+            matches |= self._tags.get(tag.lower(), set())
+        return sorted(matches)
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[int]:
+        """
+        タイトル・タグ・タイトル中の語が ``prefix`` で始まる項目の番号を返す
+
+        タイトルの一致、タグの一致、タイトル中の語の一致の順に、短い語を優先する。
+
+        Args:
+            prefix: 接頭辞（大文字小文字は区別しない）
+            limit: 最大件数
+
+        Returns:
+            項目番号のリスト
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._prefix_terms, prefix)
+        end = bisect.bisect_left(self._prefix_terms, prefix + "\U0010ffff", lo=start)
+        hits = sorted(self._prefix_keys[start:end], key=lambda key: (key[1], len(key[0]), key[2]))
+        return list(dict.fromkeys(index for _, _, index in hits))[:limit]
@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set
 
 # 文法項目の日本語→英語変換辞書
 # 今後拡張・メンテナンスしやすい形で定義
@@ -62,59 +62,112 @@ english_grammar_patterns = {
 }
 
 
+# パターン先頭の単語（またはその選択）を取り出す: \bword\b..., \b(a|b)\s+... など
+_ANCHOR_SOURCE = re.compile(r"^\\b(?:\((?:\?:)?([A-Za-z]+(?:\|[A-Za-z]+)*)\)|([A-Za-z]+))(?=\\b|\\s)")
+
+
+class GrammarLabelMatcher:
+    """文法語の表と文法パターンの表を一度だけコンパイルし、テキストからラベルを検出する
+
+    - 文法語（日本語の用語や英語ラベル）は重複を除いた一覧にしておき、C実装の部分文字列
+      検索で調べる（呼び出しごとの並べ替えはしない）。
+    - 先頭が単語（またはその選択）に固定されたパターンは、その単語をまとめた1つの
+      アンカー正規表現でテキストを1回走査し、見つかった位置でだけ照合する。ラベルが
+      すべて見つかった時点で走査を打ち切る。
+    - それ以外のパターンはコンパイル済みのものでそのまま検索する。
+
+    パターンは大文字小文字を区別せずに照合する（``re.search(pattern, text, re.IGNORECASE)``
+    と同じ結果になる）。
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]], terms: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            patterns: ラベル → 正規表現のリスト（いずれかに一致すれば検出）
+            terms: 文法語 → ラベル（英語ラベル自体も文法語として扱う）
+        """
+        self.labels = list(dict.fromkeys([*(terms or {}).values(), *patterns]))
+        self._order = {label: i for i, label in enumerate(self.labels)}
+        self.terms = {}
+        for term, label in (terms or {}).items():
+            self.terms.setdefault(term, label)
+            self.terms.setdefault(label, label)
+
+        self._anchored: Dict[str, List[tuple]] = {}  # 先頭の単語 → [(ラベル, パターン)]
+        self._free: List[tuple] = []  # [(ラベル, パターン)]
+        for label, sources in patterns.items():
+            for source in sources:
+                compiled = re.compile(source, re.IGNORECASE)
+                anchor = _ANCHOR_SOURCE.match(source)
+                if anchor is None:
+                    self._free.append((label, compiled))
+                    continue
+                for word in (anchor.group(1) or anchor.group(2)).lower().split("|"):
+                    self._anchored.setdefault(word, []).append((label, compiled))
+        self._anchor_labels = {label for entries in self._anchored.values() for label, _ in entries}
+        words = sorted(self._anchored, key=len, reverse=True)
+        self._anchor_scanner = re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, words))) if words else None
+
+    def find_terms(self, text: str) -> List[str]:
+        """テキストに含まれる文法語のラベル（表の順）"""
+        return self._sorted(self._match_terms(text))
+
+    def find_patterns(self, text: str) -> List[str]:
+        """文法パターンに一致したラベル（表の順）"""
+        return self._sorted(self._match_patterns(text))
+
+    def find(self, text: str) -> List[str]:
+        """文法語とパターンの両方で検出したラベル（表の順）"""
+        return self._sorted(self._match_terms(text) | self._match_patterns(text))
+
+    def _match_terms(self, text: str) -> Set[str]:
+        return {label for term, label in self.terms.items() if term in text}
+
+    def _match_patterns(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        lowered = text.lower()
+        for label, compiled in self._free:
+            if label not in found and compiled.search(lowered):
+                found.add(label)
+        remaining = self._anchor_labels - found
+        if self._anchor_scanner is not None and remaining:
+            for match in self._anchor_scanner.finditer(lowered):
+                for label, compiled in self._anchored[match.group()]:
+                    if label in remaining and compiled.match(lowered, match.start()):
+                        found.add(label)
+                        remaining.discard(label)
+                if not remaining:
+                    break
+        return found
+
+    def _sorted(self, labels: Iterable[str]) -> List[str]:
+        return sorted(labels, key=self._order.__getitem__)
+
+
+# 表はimport時に一度だけコンパイルする（表を変更した場合は作り直すこと）
+grammar_label_matcher = GrammarLabelMatcher(english_grammar_patterns, grammar_en_map)
+
+
 def extract_grammar_labels(text: str) -> List[str]:
     """
     入力テキストから主要文法項目（英語ラベル）を抽出する。
     日本語・英語混在にも対応し、英語文からも自動検出。
     """
-    labels = set()
-    
-    # 1. 日本語→英語変換
-    for jp, en in sorted(grammar_en_map.items(), key=lambda x: -len(x[0])):
-        if jp in text:
-            labels.add(en)
-    
-    # 2. 既に英語で含まれている場合も検出
-    for en in grammar_en_map.values():
-        if en in text:
-            labels.add(en)
-    
-    # 3. 英語文から文法構造を自動検出
-    english_structures = _detect_english_grammar_structures(text)
-    labels.update(english_structures)
-    
-    return list(labels)
+    return grammar_label_matcher.find(text)
 
 
 def _detect_english_grammar_structures(text: str) -> List[str]:
     """
     英語文から文法構造を自動検出する
     """
-    detected_structures = []
-    
-    # 各文法パターンをチェック
-    for structure_name, patterns in english_grammar_patterns.items():
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                detected_structures.append(structure_name)
-                break  # この構造が見つかったら次の構造に進む
-    
-    return detected_structures
+    return grammar_label_matcher.find_patterns(text)
 
 
 def translate_to_english_grammar(text: str) -> str:
     """
     入力テキストが日本語文法語の場合、対応する英語ラベルを返す（複数マッチ時はスペース区切り）。
     """
-    labels = set()
-    # 日本語→英語変換
-    for jp, en in sorted(grammar_en_map.items(), key=lambda x: -len(x[0])):
-        if jp in text:
-            labels.add(en)
-    # 英語がそのまま入っている場合も検出
-    for en in grammar_en_map.values():
-        if en in text:
-            labels.add(en)
+    labels = set(grammar_label_matcher.find_terms(text))
     
     if labels:
         return " ".join(sorted(labels))  # 複数マッチ時はスペース区切りで返す
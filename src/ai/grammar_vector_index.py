@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+DEFAULT_TOP_K = 3
+# これより類似度の低い項目は一致とみなさない
+DEFAULT_MIN_SCORE = 0.4
+# 1回の埋め込みAPI呼び出しで送る項目数（APIのリクエストあたりの入力数の上限を超えないように分割する）
+EMBEDDING_BATCH_SIZE = 128
+# 構築・読み込みに失敗した後、再試行するまでの秒数
+FAILED_BUILD_RETRY_AFTER = 300.0
+
+
+def entry_text(item: Dict) -> str:
+    """埋め込みに使う項目のテキスト（タイトル・タグ・サマリー）"""
+    tags = ", ".join(item.get("tags", []) or [])
+    return f"{item.get('title', '')}\n{tags}\n{item.get('summary', '')}"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def vectors_path_for(json_path) -> Path:
+    """``english_grammar_data.json`` の隣に置く埋め込みファイルのパス"""
+    json_path = Path(json_path)
+    return json_path.with_name(f"{json_path.stem}.embeddings.npz")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if len(vectors):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+class GrammarVectorIndex:
+    """GrammarDictionaryの項目の意味ベクトルのFAISSインデックス
+
+    項目ごとの埋め込みは構築時に一度だけ計算し、テキストのハッシュと一緒に
+    ``english_grammar_data.embeddings.npz`` に保存する。次回以降（別プロセスを含む）は
+    ファイルを読み込み、テキストが変わった項目だけを埋め込み直す。
+    検索は正規化したベクトルの内積（コサイン類似度）による一括のk近傍探索。
+    """
+
+    def __init__(self, items: List[Dict], encoder, vectors_path=None, model: str = DEFAULT_EMBEDDING_MODEL,
+                 embed_missing: bool = True, batch_size: int = EMBEDDING_BATCH_SIZE):
+        """
+        Args:
+            items: GrammarDictionaryの項目
+            encoder: ``encode_texts`` を持つテキストエンコーダー（例: OpenAIEncoder）
+            vectors_path: 埋め込みファイルのパス（Noneなら保存しない）
+            model: 埋め込みモデル名（ファイルの再利用の判定に使う）
+            embed_missing: Falseなら保存済みの埋め込みだけを使い、足りなければLookupErrorを送出する
+            batch_size: 1回の埋め込み呼び出しで送る項目数
+
+        Raises:
+            LookupError: ``embed_missing`` がFalseで、保存済みの埋め込みがない項目がある場合
+        """
+        self.items = items
+        self.encoder = encoder
+        self.vectors_path = Path(vectors_path) if vectors_path else None
+        self.model = model
+        self.embedded_count = 0  # 今回の構築で埋め込んだ項目数
+
+        texts = [entry_text(item) for item in items]
+        hashes = [_text_hash(text) for text in texts]
+        saved = self._load_saved()
+        missing = [i for i, text_hash in enumerate(hashes) if text_hash not in saved]
+        if missing and not embed_missing:
+            raise LookupError(f"{len(missing)} of {len(items)} grammar entries have no saved embedding")
+        for start in range(0, len(missing), max(1, batch_size)):
+            batch = missing[start:start + max(1, batch_size)]
+            embedded = np.array(self.encoder.encode_texts([texts[i] for i in batch]), dtype=np.float32)
+            saved.update(zip((hashes[i] for i in batch), embedded))
+            self.embedded_count += len(batch)
+
+        if items:
+            self.vectors = _normalize(np.stack([saved[text_hash] for text_hash in hashes]))
+            self.index = faiss.IndexFlatIP(self.vectors.shape[1])
+            self.index.add(self.vectors)
+        else:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+            self.index = None
+
+        if missing:
+            self._save(hashes)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _load_saved(self) -> Dict[str, np.ndarray]:
+        """保存済みの埋め込み（テキストのハッシュ → ベクトル）。モデルが違う場合は使わない"""
+        if not self.vectors_path or not self.vectors_path.exists():
+            return {}
+        try:
+            with np.load(self.vectors_path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model:
+                    return {}
+                return dict(zip(data["hashes"].tolist(), data["vectors"]))
+        except Exception as e:
+            logger.warning(f"Failed to load grammar embeddings from {self.vectors_path}: {e}")
+            return {}
+
+    def _save(self, hashes: List[str]) -> None:
+        """埋め込みを一時ファイル経由で保存（同時に動く別プロセスが途中のファイルを読まないように）"""
+        if not self.vectors_path:
+            return
+        temp_path = self.vectors_path.with_name(f"{self.vectors_path.name}.{os.getpid()}.tmp")
+        try:
+            self.vectors_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                np.savez(f, model=np.array(self.model), hashes=np.array(hashes), vectors=self.vectors)
+            os.replace(temp_path, self.vectors_path)
+        except Exception as e:
+            logger.warning(f"Failed to save grammar embeddings to {self.vectors_path}: {e}")
+            temp_path.unlink(missing_ok=True)
+
+    def search_many(self, queries: List[str], k: int = DEFAULT_TOP_K,
+                    min_score: float = DEFAULT_MIN_SCORE) -> List[List[Tuple[int, float]]]:
+        """
+        複数のクエリーに近い項目をまとめて検索
+
+        Args:
+            queries: 検索するテキスト（1回の埋め込み呼び出しでまとめて埋め込む）
+            k: クエリーごとの最大件数
+            min_score: 最小のコサイン類似度
+
+        Returns:
+            クエリーごとの (項目番号, 類似度) のリスト（類似度の高い順）
+        """
+        if not queries or self.index is None:
+            return [[] for _ in queries]
+        query_vectors = _normalize(np.array(self.encoder.encode_texts(list(queries)), dtype=np.float32))
+        scores, indices = self.index.search(query_vectors, min(k, len(self.items)))
+        return [
+            [(int(index), float(score)) for score, index in zip(row_scores, row_indices) if index >= 0 and score >= min_score]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+
+# データファイル・モデルごとのインスタンス（プロセス内で共有する）
+_vector_indexes: Dict[Tuple[str, str], GrammarVectorIndex] = {}
+# 構築・読み込みに失敗したデータファイル・モデルと、再試行できる時刻
+_failed_until: Dict[Tuple[str, str], float] = {}
+_key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_vector_indexes_lock = threading.Lock()
+
+
+def get_grammar_vector_index(items: List[Dict], json_path, encoder=None, model: str = DEFAULT_EMBEDDING_MODEL,
+                             build: bool = False) -> Optional[GrammarVectorIndex]:
+    """
+    GrammarDictionaryのデータファイルに対応するベクトルインデックスを取得
+
+    ``build`` がFalseなら保存済みの埋め込みファイルを読み込むだけで、項目の埋め込みは
+    計算しない（ファイルは ``build-grammar-index`` で作る）。失敗した場合は
+    ``FAILED_BUILD_RETRY_AFTER`` 秒の間、再試行せずにNoneを返す。
+
+    Args:
+        items: ``json_path`` から読み込んだ項目
+        json_path: ``english_grammar_data.json`` のパス（埋め込みファイルはその隣に置く）
+        encoder: テキストエンコーダー（省略時はOpenAIEncoder）
+        model: 埋め込みモデル名
+        build: 埋め込みがない項目を埋め込んでファイルを更新するか
+
+    Returns:
+        GrammarVectorIndex（使えない場合はNone）
+    """
+    key = (str(Path(json_path).resolve()), model)
+    with _vector_indexes_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        index = _vector_indexes.get(key)
+        if index is not None:
+            return index
+        if not build and time.monotonic() < _failed_until.get(key, 0.0):
+            return None
+        try:
+            if encoder is None:
+                from src.encoder.openai import OpenAIEncoder
+                encoder = OpenAIEncoder(model=model)
+            index = GrammarVectorIndex(items, encoder, vectors_path_for(json_path), model=model, embed_missing=build)
+        except Exception as e:
+            logger.warning(f"Grammar vector index unavailable for {json_path} (retry in {FAILED_BUILD_RETRY_AFTER:.0f}s): {e}")
+            _failed_until[key] = time.monotonic() + FAILED_BUILD_RETRY_AFTER
+            return None
+        _failed_until.pop(key, None)
+        _vector_indexes[key] = index
+        return index
@@ -1,74 +1,196 @@
+import asyncio
+import copy
 import json
+import logging
 import os
 from typing import Dict, List, Optional
-import openai
+
+from src.utils.http_client import get_async_openai_client, get_openai_client
+from src.utils.llm_limits import estimate_tokens, get_llm_limiter
+from src.ai.grammar_analysis_cache import acached_analysis, cached_analysis, lookup_analysis, normalize_text, store_analysis
+
+logger = logging.getLogger(__name__)
+
+RESULT_KEYS = ("grammar_structures", "related_topics", "key_points")
+
+ANALYSIS_INSTRUCTIONS = """Grammar structures should include specific grammar points like "subjunctive mood", "passive voice", "relative clause", etc.
+Related topics should include broader grammar areas that could be studied.
+Key points should be concise learning points for English learners."""
+
+
+def _normalize_result(data) -> Dict[str, any]:
+    """JSONの解析結果を3つのリストを持つ辞書にそろえる"""
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    result = {}
+    for key in RESULT_KEYS:
+        value = data.get(key) or []
+        if isinstance(value, str):
+            value = [value]
+        result[key] = [str(item) for item in value if item]
+    return result
+
+
+def _used_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
 
 
 class LLMGrammarAnalyzer:
-    """LLMを使用した英文法解析クラス"""
-    
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
+    """LLMを使用した英文法解析クラス
+
+    応答はJSONモードで受け取り、結果は解析器のモデルと正規化したテキストをキーに
+    キャッシュする。``analyze_many`` は複数のテキストを1回のリクエストにまとめ、
+    バッチ同士は ``max_concurrency`` 件まで並行に送る。
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o", batch_size: int = 8, max_concurrency: int = 4):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         self.model = model
-        self.client = openai.OpenAI(api_key=self.api_key)
-    
-    def analyze_text(self, text: str) -> Dict[str, any]:
-        """テキストの文法構造をLLMで解析"""
-        prompt = f"""Analyze the following English sentence(s) and extract grammar information.
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.client = get_openai_client(api_key=self.api_key)
+
+    @property
+    def cache_kind(self) -> str:
+        return f"llm:{self.model}"
+
+    def _request(self, prompt: str, max_tokens: int) -> Dict[str, any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "max_tokens": max_tokens,
+            "response_format": {"type": "json_object"},
+        }
+
+    def _prompt(self, text: str) -> str:
+        return f"""Analyze the following English sentence(s) and extract grammar information.
 
 Input text: {text}
 
-Please respond with ONLY a JSON object in the following format:
+Respond with a JSON object in the following format:
 {{
     "grammar_structures": ["structure1", "structure2"],
     "related_topics": ["topic1", "topic2"],
     "key_points": ["point1", "point2"]
 }}
 
-Grammar structures should include specific grammar points like "subjunctive mood", "passive voice", "relative clause", etc.
-Related topics should include broader grammar areas that could be studied.
-Key points should be concise learning points for English learners.
+{ANALYSIS_INSTRUCTIONS}"""
+
+    def _batch_prompt(self, texts: List[str]) -> str:
+        numbered = "\n".join(f"[{i}] {text}" for i, text in enumerate(texts))
+        return f"""Analyze each of the following numbered English texts separately and extract grammar information.
+
+Input texts:
+{numbered}
 
-JSON response:"""
+Respond with a JSON object with one result per input text, in the following format:
+{{
+    "results": [
+        {{"index": 0, "grammar_structures": ["structure1"], "related_topics": ["topic1"], "key_points": ["point1"]}}
+    ]
+}}
 
+{ANALYSIS_INSTRUCTIONS}"""
+
+    def analyze_text(self, text: str) -> Dict[str, any]:
+        """テキストの文法構造をLLMで解析（同じテキストはキャッシュから返す）"""
+        return cached_analysis(self.cache_kind, text, self._analyze_text)
+
+    def _analyze_text(self, text: str) -> Dict[str, any]:
+        """テキストの文法構造をLLMで解析"""
+        request = self._request(self._prompt(text), max_tokens=512)
+        limiter = get_llm_limiter()
+        lease = limiter.acquire(estimate_tokens(request["messages"])) if limiter.enabled else None
+        response = None
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=512
-            )
-            
-            # レスポンスからJSONを抽出
-            content = response.choices[0].message.content.strip()
-            print(f"Raw LLM response: {content}")
-            
-            # JSON部分を抽出（```json ... ``` の形式を想定）
-            if "```json" in content:
-                json_start = content.find("```json") + 7
-                json_end = content.find("```", json_start)
-                json_str = content[json_start:json_end].strip()
-            elif "```" in content:
-                # 通常のコードブロック
-                json_start = content.find("```") + 3
-                json_end = content.find("```", json_start)
-                json_str = content[json_start:json_end].strip()
-            else:
-                # JSON部分が見つからない場合は全体をパース
-                json_str = content
-            
-            result = json.loads(json_str)
-            return result
-            
+            response = self.client.chat.completions.create(**request)
+            return _normalize_result(json.loads(response.choices[0].message.content))
         except Exception as e:
             # エラー時は基本的な構造を返す
-            return {
-                "grammar_structures": [],
-                "related_topics": [],
-                "key_points": [],
-                "error": str(e)
-            } 
\ No newline at end of file
+            return {**{key: [] for key in RESULT_KEYS}, "error": str(e)}
+        finally:
+            if lease is not None:
+                limiter.release(lease, _used_tokens(response))
+
+    async def aanalyze_text(self, text: str) -> Dict[str, any]:
+        """``analyze_text`` の非同期版（イベントループをブロックしない）"""
+        return await acached_analysis(self.cache_kind, text, self._aanalyze_text)
+
+    async def _aanalyze_text(self, text: str) -> Dict[str, any]:
+        try:
+            data = await self._acomplete(self._request(self._prompt(text), max_tokens=512))
+            return _normalize_result(data)
+        except Exception as e:
+            return {**{key: [] for key in RESULT_KEYS}, "error": str(e)}
+
+    async def _acomplete(self, request: Dict[str, any]) -> Dict[str, any]:
+        client = get_async_openai_client(api_key=self.api_key)
+        limiter = get_llm_limiter()
+        lease = await limiter.aacquire(estimate_tokens(request["messages"])) if limiter.enabled else None
+        response = None
+        try:
+            response = await client.chat.completions.create(**request)
+        finally:
+            if lease is not None:
+                limiter.release(lease, _used_tokens(response))
+        return json.loads(response.choices[0].message.content)
+
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, any]]:
+        """
+        複数のテキストをまとめて解析
+
+        キャッシュにないテキストだけを ``batch_size`` 件ずつ1回のリクエストにまとめる。
+        バッチの応答に欠けている結果は1件ずつ解析し直す。
+
+        Args:
+            texts: 解析するテキストのリスト
+
+        Returns:
+            入力と同じ順序の解析結果のリスト
+        """
+        results: Dict[str, Dict[str, any]] = {}
+        unique: Dict[str, None] = {}  # 順序付きの重複なし集合
+        for text in texts:
+            key = normalize_text(text)
+            if key in results or key in unique:
+                continue
+            cached = lookup_analysis(self.cache_kind, key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                unique[key] = None
+        pending = list(unique)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_batch(batch: List[str]) -> None:
+            async with semaphore:
+                if len(batch) == 1:
+                    results[batch[0]] = await self.aanalyze_text(batch[0])
+                    return
+                try:
+                    data = await self._acomplete(self._request(self._batch_prompt(batch), max_tokens=384 * len(batch)))
+                    items = data.get("results") if isinstance(data, dict) else None
+                    for item in items if isinstance(items, list) else []:
+                        index = item.get("index") if isinstance(item, dict) else None
+                        if isinstance(index, int) and 0 <= index < len(batch) and batch[index] not in results:
+                            results[batch[index]] = _normalize_result(item)
+                            store_analysis(self.cache_kind, batch[index], results[batch[index]])
+                except Exception as e:
+                    logger.warning(f"Batched grammar analysis failed, analyzing texts one by one: {e}")
+            # まとめた応答から取れなかったものは1件ずつ解析する
+            missing = [text for text in batch if text not in results]
+            for text, result in zip(missing, await asyncio.gather(*[self._analyze_one(text, semaphore) for text in missing])):
+                results[text] = result
+
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        await asyncio.gather(*[run_batch(batch) for batch in batches])
+        return [copy.deepcopy(results[normalize_text(text)]) for text in texts]
+
+    async def _analyze_one(self, text: str, semaphore: asyncio.Semaphore) -> Dict[str, any]:
+        async with semaphore:
+            return await self.aanalyze_text(text)
@@ -2,15 +2,40 @@
 OpenAI API client for Englishy.
 """
 
+import asyncio
 import os
-import openai
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 import logging
 
+from src.utils.http_client import get_async_openai_client, get_openai_client
+from src.utils.llm_limits import LLMLimiter, estimate_tokens, get_llm_limiter
+
 logger = logging.getLogger(__name__)
 
+MODEL = "gpt-4o-mini"
+DEFAULT_BULK_CONCURRENCY = 4
+
+
+def _chat_request(system_prompt: str, content: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content}
+        ],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+
 class OpenAIClient:
-    """OpenAI API client for English learning tasks."""
+    """OpenAI API client for English learning tasks.
+
+    Every operation has a blocking variant returning a result dict and an async
+    ``astream_*`` variant yielding the completion text as it arrives. The async
+    variants share the event loop's pooled AsyncOpenAI client and go through the
+    process-wide LLM limiter.
+    """
     
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the OpenAI client."""
@@ -18,21 +43,10 @@ class OpenAIClient:
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = get_openai_client(api_key=self.api_key)
     
-    def analyze_english_query(self, query: str, level: str = "beginner") -> Dict[str, Any]:
-        """
-        Analyze an English learning query and provide structured response.
-        
-        Args:
-            query: The user's learning query
-            level: Learning level (beginner, intermediate, advanced)
-        
-        Returns:
-            Dictionary containing analysis results
-        """
-        try:
-            system_prompt = f"""You are an expert English teacher and learning assistant. 
+    def _analyze_english_query_request(self, query: str, level: str) -> Dict[str, Any]:
+        system_prompt = f"""You are an expert English teacher and learning assistant. 
             Analyze the following query and provide a comprehensive learning plan.
             
             Learning Level: {level}
@@ -51,16 +65,92 @@ class OpenAIClient:
                 "resources_needed": ["resource1", "resource2"],
                 "practice_exercises": ["exercise1", "exercise2"]
             }}"""
+        return _chat_request(system_prompt, query, temperature=0.7, max_tokens=2000)
+
+    def _english_report_request(self, query: str, search_results: List[str], style: str) -> Dict[str, Any]:
+        # Limit search results to 10 items
+        limited_results = search_results[:10]
+
+        system_prompt = f"""You are an expert English teacher creating a comprehensive learning report.
+            
+            Style: {style}
+            
+            Create a detailed report that includes:
+            1. Introduction and learning objectives
+            2. Key concepts and explanations
+            3. Practical examples and exercises
+            4. Common mistakes and how to avoid them
+            5. Practice activities
+            6. Additional resources and next steps
+            7. References section with proper citations
+            
+            Format the response as markdown with clear sections.
+            Include proper citations for all sources used."""
+
+        # Combine query and search results
+        content = f"Query: {query}\n\nSearch Results:\n" + "\n".join(limited_results)
+        return _chat_request(system_prompt, content, temperature=0.7, max_tokens=4000)
+
+    def _practice_exercises_request(self, topic: str, level: str) -> Dict[str, Any]:
+        system_prompt = f"""Create engaging English practice exercises for the topic: {topic}
+            
+            Level: {level}
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
+            Provide exercises in this format:
+            {{
+                "vocabulary_exercises": [
+                    {{"word": "word", "definition": "definition", "example": "example"}}
+                ],
+                "grammar_exercises": [
+                    {{"question": "question", "answer": "answer", "explanation": "explanation"}}
+                ],
+                "conversation_practice": [
+                    {{"scenario": "scenario", "dialogue": "dialogue", "key_phrases": ["phrase1", "phrase2"]}}
                 ],
-                temperature=0.7,
-                max_tokens=2000
-            )
+                "writing_prompts": [
+                    {{"prompt": "prompt", "word_count": "X words", "focus": "focus area"}}
+                ]
+            }}"""
+        return _chat_request(system_prompt, f"Create exercises for: {topic}", temperature=0.8, max_tokens=2000)
+
+    def _references_request(self, query: str, report_content: str, search_results: List[str]) -> Dict[str, Any]:
+        system_prompt = """You are an expert in academic writing and reference management.
+            
+            Create a comprehensive references list for an English learning report.
+            
+            Include the following sections:
+            1. Academic Sources - Books, journal articles, research papers
+            2. Online Resources - Educational websites, learning platforms
+            3. Government Guidelines - Official educational standards and guidelines
+            4. Teaching Materials - Textbooks, workbooks, practice materials
+            
+            Format references in standard academic format:
+            - Books: Author, A. (Year). Title. Publisher.
+            - Articles: Author, A. (Year). Title. Journal, Volume(Issue), Pages.
+            - Websites: Site Name. (Access Date). URL
+            
+            Focus on reliable, recent sources suitable for middle and high school students."""
+
+        content = f"""Query: {query}
+            
+            Report Content: {report_content[:2000]}...
+            
+            Search Results Used: {chr(10).join(search_results[:10])}"""
+        return _chat_request(system_prompt, content, temperature=0.5, max_tokens=2000)
+
+    def analyze_english_query(self, query: str, level: str = "beginner") -> Dict[str, Any]:
+        """
+        Analyze an English learning query and provide structured response.
+        
+        Args:
+            query: The user's learning query
+            level: Learning level (beginner, intermediate, advanced)
+        
+        Returns:
+            Dictionary containing analysis results
+        """
+        try:
+            response = self.client.chat.completions.create(**self._analyze_english_query_request(query, level))
             
             # Parse the response
             content = response.choices[0].message.content
@@ -91,37 +181,7 @@ class OpenAIClient:
             Dictionary containing the generated report
         """
         try:
-            # Limit search results to 10 items
-            limited_results = search_results[:10]
-            
-            system_prompt = f"""You are an expert English teacher creating a comprehensive learning report.
-            
-            Style: {style}
-            
-            Create a detailed report that includes:
-            1. Introduction and learning objectives
-            2. Key concepts and explanations
-            3. Practical examples and exercises
-            4. Common mistakes and how to avoid them
-            5. Practice activities
-            6. Additional resources and next steps
-            7. References section with proper citations
-            
-            Format the response as markdown with clear sections.
-            Include proper citations for all sources used."""
-            
-            # Combine query and search results
-            content = f"Query: {query}\n\nSearch Results:\n" + "\n".join(limited_results)
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=0.7,
-                max_tokens=4000
-            )
+            response = self.client.chat.completions.create(**self._english_report_request(query, search_results, style))
             
             return {
                 "report": response.choices[0].message.content,
@@ -147,35 +207,7 @@ class OpenAIClient:
             Dictionary containing exercises
         """
         try:
-            system_prompt = f"""Create engaging English practice exercises for the topic: {topic}
-            
-            Level: {level}
-            
-            Provide exercises in this format:
-            {{
-                "vocabulary_exercises": [
-                    {{"word": "word", "definition": "definition", "example": "example"}}
-                ],
-                "grammar_exercises": [
-                    {{"question": "question", "answer": "answer", "explanation": "explanation"}}
-                ],
-                "conversation_practice": [
-                    {{"scenario": "scenario", "dialogue": "dialogue", "key_phrases": ["phrase1", "phrase2"]}}
-                ],
-                "writing_prompts": [
-                    {{"prompt": "prompt", "word_count": "X words", "focus": "focus area"}}
-                ]
-            }}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Create exercises for: {topic}"}
-                ],
-                temperature=0.8,
-                max_tokens=2000
-            )
+            response = self.client.chat.completions.create(**self._practice_exercises_request(topic, level))
             
             return {
                 "exercises": response.choices[0].message.content,
@@ -203,38 +235,7 @@ class OpenAIClient:
             Dictionary containing the generated references
         """
         try:
-            system_prompt = """You are an expert in academic writing and reference management.
-            
-            Create a comprehensive references list for an English learning report.
-            
-            Include the following sections:
-            1. Academic Sources - Books, journal articles, research papers
-            2. Online Resources - Educational websites, learning platforms
-            3. Government Guidelines - Official educational standards and guidelines
-            4. Teaching Materials - Textbooks, workbooks, practice materials
-            
-            Format references in standard academic format:
-            - Books: Author, A. (Year). Title. Publisher.
-            - Articles: Author, A. (Year). Title. Journal, Volume(Issue), Pages.
-            - Websites: Site Name. (Access Date). URL
-            
-            Focus on reliable, recent sources suitable for middle and high school students."""
-            
-            content = f"""Query: {query}
-            
-            Report Content: {report_content[:2000]}...
-            
-            Search Results Used: {chr(10).join(search_results[:10])}"""
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": content}
-                ],
-                temperature=0.5,
-                max_tokens=2000
-            )
+            response = self.client.chat.completions.create(**self._references_request(query, report_content, search_results))
             
             return {
                 "references": response.choices[0].message.content,
@@ -246,4 +247,134 @@ class OpenAIClient:
             return {
                 "error": str(e),
                 "status": "error"
-            } 
\ No newline at end of file
+            } 
+
+    async def _astream(self, request: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a chat completion through the pooled async client.
+
+        Args:
+            request: Keyword arguments for ``chat.completions.create``
+
+        Yields:
+            Text deltas as they arrive
+        """
+        client = get_async_openai_client(api_key=self.api_key)
+        limiter = get_llm_limiter()
+        reserved = estimate_tokens(request["messages"])
+        lease = await limiter.aacquire(reserved) if limiter.enabled else None
+        used_tokens = None
+        try:
+            stream = await client.chat.completions.create(**request, stream=True, stream_options={"include_usage": True})
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    used_tokens = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            if lease is not None:
+                limiter.release(lease, used_tokens)
+
+    async def astream_english_query_analysis(self, query: str, level: str = "beginner") -> AsyncIterator[str]:
+        """
+        Streaming variant of ``analyze_english_query``.
+
+        Args:
+            query: The user's learning query
+            level: Learning level (beginner, intermediate, advanced)
+
+        Yields:
+            The raw (JSON) learning plan, incrementally
+        """
+        async for text in self._astream(self._analyze_english_query_request(query, level)):
+            yield text
+
+    async def astream_english_report(self, query: str, search_results: List[str],
+                                     style: str = "beginner") -> AsyncIterator[str]:
+        """
+        Streaming variant of ``generate_english_report``.
+
+        Args:
+            query: Original learning query
+            search_results: List of search results to incorporate (limited to 10)
+            style: Report style (beginner, intermediate, advanced)
+
+        Yields:
+            The markdown report, incrementally
+        """
+        async for text in self._astream(self._english_report_request(query, search_results, style)):
+            yield text
+
+    async def astream_practice_exercises(self, topic: str, level: str = "beginner") -> AsyncIterator[str]:
+        """
+        Streaming variant of ``create_practice_exercises``.
+
+        Args:
+            topic: The English topic to create exercises for
+            level: Difficulty level
+
+        Yields:
+            The exercises, incrementally
+        """
+        async for text in self._astream(self._practice_exercises_request(topic, level)):
+            yield text
+
+    async def astream_references(self, query: str, report_content: str,
+                                 search_results: List[str]) -> AsyncIterator[str]:
+        """
+        Streaming variant of ``generate_references``.
+
+        Args:
+            query: Original learning query
+            report_content: The generated report content
+            search_results: List of search results used
+
+        Yields:
+            The references list, incrementally
+        """
+        async for text in self._astream(self._references_request(query, report_content, search_results)):
+            yield text
+
+    async def create_practice_exercises_bulk(
+        self,
+        topics: List[str],
+        level: str = "beginner",
+        max_concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        tokens_per_minute: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Create practice exercises for many topics concurrently.
+
+        Calls are capped by ``max_concurrency`` and ``tokens_per_minute`` for this
+        batch, on top of the process-wide LLM limiter. A failed topic gets an
+        error result instead of failing the batch.
+
+        Args:
+            topics: English topics (duplicates are generated once)
+            level: Difficulty level
+            max_concurrency: Maximum requests in flight for this batch
+            tokens_per_minute: Maximum tokens per minute for this batch (None = unlimited)
+
+        Returns:
+            Result dict per topic, in the shape returned by ``create_practice_exercises``
+        """
+        limiter = LLMLimiter(max_concurrent_calls=max(1, max_concurrency), tokens_per_minute=tokens_per_minute)
+
+        async def create(topic: str) -> Dict[str, Any]:
+            request = self._practice_exercises_request(topic, level)
+            reserved = estimate_tokens(request["messages"])
+            lease = await limiter.aacquire(reserved)
+            chunks: List[str] = []
+            try:
+                async for text in self._astream(request):
+                    chunks.append(text)
+                return {"exercises": "".join(chunks), "status": "success"}
+            except Exception as e:
+                logger.error(f"Error in create_practice_exercises_bulk for {topic!r}: {e}")
+                return {"error": str(e), "status": "error"}
+            finally:
+                limiter.release(lease, reserved + estimate_tokens(text="".join(chunks)))
+
+        unique_topics = list(dict.fromkeys(topics))
+        results = await asyncio.gather(*[create(topic) for topic in unique_topics])
+        return dict(zip(unique_topics, results))
@@ -1,9 +1,14 @@
+import asyncio
+import json
+import os
 import re
+from typing import AsyncIterator, Callable, Optional
 
 import dspy
 import litellm
 from pydantic import BaseModel
 
+from ai.utils.stream_writer import StreamLineWriter
 from src.utils.logging import logger
 
 
@@ -303,6 +308,29 @@ class FixOutline(dspy.Signature):
     fixed_outline = dspy.OutputField(desc="Corrected outline", format=str)
 
 
+class CreateOutlineJSON(dspy.Signature):
+    """あなたは、英語教育の専門家です。最新の英語教育研究や学習法を常にフォローし、理解しやすい解説を提供できるよう心がけています。
+
+クエリーに対する英語学習レポートのアウトラインを、次のJSONスキーマに従うJSONオブジェクトとして出力してください。JSON以外のテキストやコードフェンスは出力しないこと。
+
+{"title": "レポートのタイトル", "section_outlines": [{"title": "章のタイトル", "subsection_outlines": [{"title": "節のタイトル", "reference_ids": [1, 2, 3]}]}]}
+
+ルール：
+1. タイトル・章・節はすべて日本語で作成し、文法用語も日本語に統一する（gerund→動名詞、infinitive→不定詞、subjunctive→仮定法など）
+2. 文法構造の理解 → 実例と詳細解説 → 実践的な活用 → 発展と応用（複雑な文法項目のみ）の順に、章を3～4個作成する
+3. 各章には節を2～3個作成する。節同士の内容が類似する場合は統合し、別の論点の節を追加する
+4. reference_ids には情報源の番号（1から始まる、情報源リストの順番）だけを使い、各節で3～5個の異なる番号を使う。存在しない番号は使わない
+5. 「結論」の章は作成しない。タイトルに番号や "#" は付けない
+6. タイトルは「完全ガイド」「徹底解説」などの学習者を惹きつける表現にする
+"""  # noqa: E501
+
+    query = dspy.InputField(desc="Query", format=str)
+    topics = dspy.InputField(desc="Expanded topics for research", format=str)
+    references = dspy.InputField(desc="Collected information sources and citation numbers", format=str)
+    grammar_analysis = dspy.InputField(desc="Grammar analysis results from GrammarAnalyzer", format=str)
+    outline_json = dspy.OutputField(desc="Report outline as a JSON object", format=str)
+
+
 class SubsectionOutline(BaseModel):
     title: str
     reference_ids: list[int]
@@ -337,11 +365,297 @@ class Outline(BaseModel):
         )
 
 
+# アウトラインの章の数
+MIN_SECTIONS = 3
+MAX_SECTIONS = 4
+# 結論は別途生成するので、アウトラインからは除く
+_CONCLUSION_TITLES = {"結論", "まとめ", "conclusion"}
+
+
+def _is_conclusion_title(title: str) -> bool:
+    return re.sub(r"^\d+[.)]?\s*", "", title).lower() in _CONCLUSION_TITLES
+
+
+class IncrementalOutlineParser:
+    """行単位で受け取ったアウトラインを解析し、完成したセクションから順に返すパーサー
+
+    ``## `` 見出しが現れた時点で直前のセクションを完成とみなす。FixOutlineを通さない
+    生の出力を想定し、コードフェンスや説明文などの不正な行は無視する。
+    返したセクションは後から統合できないため、repair_outlineの規則（結論の章と
+    存在しない引用番号を除き、``max_sections`` を超える章を捨てる）を完成時に適用する。
+    """
+
+    def __init__(self, default_title: str = "", reference_count: Optional[int] = None,
+                 max_sections: Optional[int] = None) -> None:
+        self.default_title = default_title
+        self.reference_count = reference_count
+        self.max_sections = max_sections
+        self.title: Optional[str] = None
+        self.sections: list[SectionOutline] = []
+        self._buffer = ""
+        self._section_title: Optional[str] = None
+        self._subsections: list[SubsectionOutline] = []
+        self._subsection_title: Optional[str] = None
+        self._reference_ids: list[int] = []
+
+    def feed(self, text: str) -> list[SectionOutline]:
+        """テキスト片を追加し、新たに完成したセクションを返す"""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        completed = []
+        for line in lines:
+            section = self._parse_line(line.strip())
+            if section is not None:
+                completed.append(section)
+        return completed
+
+    def close(self) -> list[SectionOutline]:
+        """残りのテキストを解析し、最後のセクションを返す"""
+        completed = self.feed("\n")
+        section = self._finish_section()
+        if section is not None:
+            completed.append(section)
+        return completed
+
+    def outline(self) -> Outline:
+        """これまでに完成したセクションからアウトラインを組み立てる"""
+        if not self.sections:
+            raise ValueError("Outline has no complete sections")
+        return Outline(title=self.title or self.default_title, section_outlines=list(self.sections))
+
+    def _parse_line(self, line: str) -> Optional[SectionOutline]:
+        if not line or line.startswith("```"):
+            return None
+        if line.startswith("### "):
+            self._finish_subsection()
+            if self._section_title is not None:
+                title, self._reference_ids = self._split_reference_ids(line[4:])
+                self._subsection_title = title
+            return None
+        if line.startswith("## "):
+            section = self._finish_section()
+            self._section_title, _ = self._split_reference_ids(line[3:])
+            return section
+        if line.startswith("# "):
+            if self.title is None:
+                self.title = line[2:].strip()
+            return None
+        if self._subsection_title is not None and re.match(r"^(\[\d+\]\s*)+$", line):
+            self._reference_ids.extend(int(matched) for matched in re.findall(r"\[(\d+)\]", line))
+        return None
+
+    @staticmethod
+    def _split_reference_ids(title: str) -> tuple[str, list[int]]:
+        reference_ids = [int(matched) for matched in re.findall(r"\[(\d+)\]", title)]
+        return re.sub(r"\s*(\[\d+\])+\s*$", "", title).strip(), reference_ids
+
+    def _finish_subsection(self) -> None:
+        if self._subsection_title:
+            self._subsections.append(
+                SubsectionOutline(
+                    title=self._subsection_title,
+                    reference_ids=_valid_reference_ids(self._reference_ids, self.reference_count),
+                )
+            )
+        self._subsection_title = None
+        self._reference_ids = []
+
+    def _finish_section(self) -> Optional[SectionOutline]:
+        self._finish_subsection()
+        section = None
+        if self._section_title is not None:
+            if _is_conclusion_title(self._section_title):
+                logger.info(f"Skipping conclusion section in outline: {self._section_title}")
+            elif self.max_sections is not None and len(self.sections) >= self.max_sections:
+                logger.warning(f"Skipping outline section beyond {self.max_sections} sections: {self._section_title}")
+            elif self._subsections:
+                section = SectionOutline(title=self._section_title, subsection_outlines=self._subsections)
+                self.sections.append(section)
+            else:
+                logger.warning(f"Skipping outline section without subsections: {self._section_title}")
+        self._section_title = None
+        self._subsections = []
+        return section
+
+
+class OutlineStream:
+    """ストリーミング生成中のアウトライン
+
+    非同期イテレートすると完成したセクションが順に得られ（利用者は1つだけ）、
+    生成が終わると ``outline`` で全体を参照できる。
+    """
+
+    _DONE = object()
+
+    def __init__(
+        self,
+        lines: AsyncIterator[str],
+        parser: IncrementalOutlineParser,
+        on_section: Optional[Callable[[SectionOutline], None]] = None,
+    ) -> None:
+        self.parser = parser
+        self.on_section = on_section
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._error: Optional[Exception] = None
+        self._task = asyncio.ensure_future(self._produce(lines))
+
+    async def _produce(self, lines: AsyncIterator[str]) -> None:
+        try:
+            async for line in lines:
+                for section in self.parser.feed(line):
+                    self._emit(section)
+            for section in self.parser.close():
+                self._emit(section)
+            outline = self.parser.outline()
+            logger.info(f"streamed outline: \n{outline.to_text()}")
+            self._queue.put_nowait(self._DONE)
+        except Exception as e:
+            self._error = e
+            self._queue.put_nowait(e)
+
+    def _emit(self, section: SectionOutline) -> None:
+        if self.on_section:
+            self.on_section(section)
+        logger.info(f"Outline section ready: {section.title}")
+        self._queue.put_nowait(section)
+
+    async def __aiter__(self):
+        while True:
+            item = await self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    @property
+    def done(self) -> bool:
+        return self._task.done()
+
+    @property
+    def outline(self) -> Outline:
+        """生成済みのアウトライン（生成完了後に参照する）"""
+        return self.parser.outline()
+
+    async def result(self) -> Outline:
+        """生成完了を待ってアウトライン全体を返す"""
+        await self._task
+        if self._error:
+            raise self._error
+        return self.parser.outline()
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+def _load_outline_json(raw: str) -> Optional[dict]:
+    start, end = raw.find("{"), raw.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        data = json.loads(raw[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _clean_title(title) -> str:
+    return re.sub(r"^#+\s*", "", str(title or "")).strip()
+
+
+def _valid_reference_ids(values, reference_count: Optional[int]) -> list[int]:
+    reference_ids = []
+    for value in values if isinstance(values, list) else []:
+        try:
+            reference_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if reference_id >= 1 and (reference_count is None or reference_id <= reference_count) and reference_id not in reference_ids:
+            reference_ids.append(reference_id)
+    return reference_ids
+
+
+def repair_outline(raw: str, reference_count: Optional[int] = None, default_title: str = "") -> Outline:
+    """
+    JSON（またはMarkdown）のアウトラインを検証し、LLMを使わずに修復する
+
+    - 存在しない引用番号を除く
+    - 節のない章は見出しを節として隣の章に統合する
+    - 結論の章を除き、4章を超える分は最後の章に統合する
+
+    Args:
+        raw: モデルの出力（JSONを含むテキスト、またはMarkdownのアウトライン）
+        reference_count: 情報源の数（Noneなら番号の上限を確認しない）
+        default_title: タイトルがない場合に使うタイトル
+
+    Raises:
+        ValueError: 章が3つに満たないなど、ローカルでは修復できない場合
+    """
+    data = _load_outline_json(raw)
+    if data is None:
+        parser = IncrementalOutlineParser(default_title=default_title, reference_count=reference_count)
+        parser.feed(raw)
+        parser.close()
+        data = parser.outline().model_dump()
+
+    sections: list[SectionOutline] = []
+    orphans: list[SubsectionOutline] = []
+    for section in data.get("section_outlines") or data.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        section_title = _clean_title(section.get("title"))
+        if not section_title or _is_conclusion_title(section_title):
+            continue
+        subsections = []
+        for subsection in section.get("subsection_outlines") or section.get("subsections") or []:
+            if isinstance(subsection, str):
+                subsection = {"title": subsection}
+            if not isinstance(subsection, dict) or not _clean_title(subsection.get("title")):
+                continue
+            subsections.append(SubsectionOutline(
+                title=_clean_title(subsection["title"]),
+                reference_ids=_valid_reference_ids(subsection.get("reference_ids"), reference_count),
+            ))
+        if not subsections:
+            orphan = SubsectionOutline(title=section_title, reference_ids=[])
+            if sections:
+                sections[-1].subsection_outlines.append(orphan)
+            else:
+                orphans.append(orphan)
+            continue
+        sections.append(SectionOutline(title=section_title, subsection_outlines=orphans + subsections))
+        orphans = []
+
+    for extra in sections[MAX_SECTIONS:]:
+        sections[MAX_SECTIONS - 1].subsection_outlines.extend(extra.subsection_outlines)
+    sections = sections[:MAX_SECTIONS]
+
+    title = _clean_title(data.get("title")) or default_title
+    if not title or len(sections) < MIN_SECTIONS:
+        raise ValueError(
+            f"Outline cannot be repaired locally: {len(sections)} sections (expected {MIN_SECTIONS}-{MAX_SECTIONS})"
+        )
+    return Outline(title=title, section_outlines=sections)
+
+
 class OutlineCreater(dspy.Module):
-    def __init__(self, lm) -> None:
+    def __init__(self, lm, fix_lm=None, mode: Optional[str] = None) -> None:
+        """
+        Args:
+            lm: アウトライン生成に使うLM
+            fix_lm: FixOutlineに使うLM（省略時はlm）
+            mode: "markdown"（CreateOutline→FixOutline）または "json"（CreateOutlineJSON→ローカル修復、
+                失敗時のみFixOutline）。省略時は ENGLISHY_OUTLINE_MODE
+        """
         self.lm = lm
+        self.mode = mode or os.getenv("ENGLISHY_OUTLINE_MODE", "markdown")
+        if self.mode not in ("markdown", "json"):
+            raise ValueError(f"Unknown outline mode: {self.mode} (expected markdown or json)")
         self.gen_outline = dspy.Predict(CreateOutline)
+        self.gen_outline_json = dspy.Predict(CreateOutlineJSON)
         self.fix_outline = dspy.Predict(FixOutline)
+        # FixOutlineは書式の修正だけなので軽量なモデルを指定できる
+        self.fix_outline.lm = fix_lm
 
     @staticmethod
     def __parse_outline(outline) -> Outline:
@@ -388,7 +702,8 @@ class OutlineCreater(dspy.Module):
         assert report_title is not None
         return Outline(title=report_title, section_outlines=section_outlines)
 
-    def forward(self, query: str, topics: list, references: list[str], grammar_analysis: dict = None) -> dspy.Prediction:
+    @staticmethod
+    def _format_inputs(query: str, topics: list, references: list, grammar_analysis: dict = None) -> dict:
         topics_text = "\n".join([f"- {topic}" for topic in topics])
         
         # Convert references to text if they are dictionaries
@@ -410,18 +725,30 @@ Grammar Analysis Results:
 - Difficulty Level: {grammar_analysis.get('difficulty_level', 'intermediate')}
 - Key Points: {', '.join(grammar_analysis.get('key_points', []))}
 """
-        
+        return dict(
+            query=query,
+            topics=topics_text,
+            references=references_text,
+            grammar_analysis=grammar_analysis_text,
+        )
+
+    def forward(self, query: str, topics: list, references: list[str], grammar_analysis: dict = None) -> dspy.Prediction:
+        reference_count = len(references) if references is not None else None
         with dspy.settings.context(lm=self.lm):
-            create_outline_result = self.gen_outline(
-                query=query,
-                topics=topics_text,
-                references=references_text,
-                grammar_analysis=grammar_analysis_text,
-            )
-            logger.info(f"created outline: \n{create_outline_result.outline}")
-            fix_outline_result = self.fix_outline(outline=create_outline_result.outline)
-            logger.info(f"fixed outline: \n{fix_outline_result.fixed_outline}")
-            parsed_outline = self.__parse_outline(fix_outline_result.fixed_outline)
+            inputs = self._format_inputs(query, topics, references, grammar_analysis)
+            if self.mode == "json":
+                parsed_outline = self._create_json_outline(inputs, reference_count, query)
+            else:
+                create_outline_result = self.gen_outline(**inputs)
+                logger.info(f"created outline: \n{create_outline_result.outline}")
+                fix_outline_result = self.fix_outline(outline=create_outline_result.outline)
+                logger.info(f"fixed outline: \n{fix_outline_result.fixed_outline}")
+                try:
+                    parsed_outline = self.__parse_outline(fix_outline_result.fixed_outline)
+                except AssertionError:
+                    # 書式の崩れで調査全体を止めないよう、ローカル修復を試す
+                    logger.warning("Fixed outline does not follow the format; repairing it locally")
+                    parsed_outline = repair_outline(fix_outline_result.fixed_outline, reference_count, default_title=query)
             
             # 新規追加: キーワード抽出
             if references and isinstance(references[0], dict):
@@ -430,9 +757,49 @@ Grammar Analysis Results:
         
         return dspy.Prediction(outline=parsed_outline) 
     
+    def _create_json_outline(self, inputs: dict, reference_count: Optional[int], query: str) -> Outline:
+        """JSONでアウトラインを生成してローカルで修復し、修復できない場合だけFixOutlineを使う"""
+        raw = self.gen_outline_json(**inputs).outline_json
+        logger.info(f"created JSON outline: \n{raw}")
+        try:
+            outline = repair_outline(raw, reference_count, default_title=query)
+            logger.info("JSON outline validated and repaired locally (FixOutline skipped)")
+            return outline
+        except ValueError as e:
+            logger.warning(f"{e}; falling back to FixOutline")
+        fixed = self.fix_outline(outline=raw).fixed_outline
+        logger.info(f"fixed outline: \n{fixed}")
+        return repair_outline(fixed, reference_count, default_title=query)
+
+    def astream(self, query: str, topics: list, references: list, grammar_analysis: dict = None) -> "OutlineStream":
+        """
+        アウトラインをストリーミング生成し、完成したセクションから順に返す
+
+        FixOutlineは使わず、IncrementalOutlineParserで寛容に解析する。
+        実行中のイベントループ上で呼び出すと、生成はすぐにバックグラウンドで始まる。
+        """
+        writer = StreamLineWriter(lm=self.lm, signature_cls=CreateOutline)
+        lines = writer.generate(self._format_inputs(query, topics, references, grammar_analysis))
+
+        def _on_section(section: SectionOutline) -> None:
+            if references and isinstance(references[0], dict):
+                self._add_keywords_to_section(section, references)
+
+        parser = IncrementalOutlineParser(
+            default_title=query,
+            reference_count=len(references) if references is not None else None,
+            max_sections=MAX_SECTIONS,
+        )
+        return OutlineStream(lines, parser, on_section=_on_section)
+
     def _add_keywords_to_outline(self, outline: Outline, references: list[dict]) -> None:
         """アウトラインの各サブセクションにキーワードを追加"""
         for section in outline.section_outlines:
-            for subsection in section.subsection_outlines:
-                keywords = extract_keywords_from_references(references, subsection)
-                subsection.keywords = keywords 
\ No newline at end of file
+            self._add_keywords_to_section(section, references)
+
+    @staticmethod
+    def _add_keywords_to_section(section: SectionOutline, references: list[dict]) -> None:
+        """セクションの各サブセクションにキーワードを追加"""
+        for subsection in section.subsection_outlines:
+            keywords = extract_keywords_from_references(references, subsection)
+            subsection.keywords = keywords 
\ No newline at end of file
@@ -1,9 +1,16 @@
 import dspy
 import json
+import logging
 import os
 from typing import Dict, List, Any
 # 追加: 共通ユーティリティのimport
 from .grammar_utils import extract_grammar_labels, translate_to_english_grammar
+from .grammar_analysis_cache import cached_analysis
+from .grammar_vector_index import get_grammar_vector_index
+
+logger = logging.getLogger(__name__)
+
+GRAMMAR_DICTIONARY_FILE = os.path.join("data", "GrammarDictionary", "english_grammar_data.json")
 
 class GrammarAnalysisSignature(dspy.Signature):
     """
@@ -22,18 +29,25 @@ class GrammarAwareQueryRefiner(dspy.Module):
     and generates optimized search queries using GrammarDictionary data.
     """
     
-    def __init__(self, lm=None):
+    def __init__(self, lm=None, encoder=None):
         super().__init__()
         self.lm = lm
         self.grammar_data = self._load_grammar_dictionary()
-        self.grammar_analyzer = dspy.Predict(GrammarAnalysisSignature, lm=self.lm)
+        # 辞書と一緒に保存済みの埋め込みを読み込む（項目の埋め込みは build-grammar-index で作る）
+        self.vector_index = (
+            get_grammar_vector_index(self.grammar_data, GRAMMAR_DICTIONARY_FILE, encoder=encoder)
+            if self.grammar_data else None
+        )
+        self.grammar_analyzer = dspy.Predict(GrammarAnalysisSignature)
+        # Predictの設定引数に渡すとLM呼び出しの引数に混ざるため、属性で指定する
+        self.grammar_analyzer.lm = self.lm
         
         # Remove global dspy.settings.configure call to avoid thread conflicts
         
     def _load_grammar_dictionary(self) -> Dict[str, Any]:
         """Load GrammarDictionary data from JSON file."""
         try:
-            grammar_file = os.path.join("data", "GrammarDictionary", "english_grammar_data.json")
+            grammar_file = GRAMMAR_DICTIONARY_FILE
             if os.path.exists(grammar_file):
                 with open(grammar_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
@@ -49,8 +63,8 @@ class GrammarAwareQueryRefiner(dspy.Module):
         try:
             # Use context manager instead of global configuration
             with dspy.settings.context(lm=self.lm):
-                # Analyze grammar structures in the query
-                grammar_analysis = self.grammar_analyzer(text=text)
+                # Analyze grammar structures in the query (once per run for the same text)
+                grammar_analysis = cached_analysis("refiner", text, self._predict_grammar, shared=False)
                 
                 # Extract grammar structures and create refined query
                 grammar_structures = grammar_analysis.get("grammar_structures", [])
@@ -66,6 +80,11 @@ class GrammarAwareQueryRefiner(dspy.Module):
             # Fallback to simple return
             return dspy.Prediction(refined_query=text)
     
+    def _predict_grammar(self, text: str) -> Dict[str, Any]:
+        """Run the LM grammar analysis and keep the fields as a plain dict."""
+        prediction = self.grammar_analyzer(text=text)
+        return {key: prediction.get(key) for key in ("grammar_structures", "verb_forms", "sentence_patterns")}
+
     def _analyze_grammar(self, text: str) -> Dict[str, Any]:
         """Analyze grammar structures in the given text using LM and GrammarDictionary."""
         # grammar_utilsの共通関数で主要文法項目を抽出
@@ -77,7 +96,30 @@ class GrammarAwareQueryRefiner(dspy.Module):
         }
     
     def _match_with_grammar_dictionary(self, grammar_structures: List[str]) -> List[Dict[str, Any]]:
-        """Match detected grammar structures with GrammarDictionary data."""
+        """Match detected grammar structures with GrammarDictionary data.
+
+        Uses a batched k-NN query over the dictionary's semantic vector index, so
+        synonyms match too. Falls back to substring matching when the index was
+        not available at load time or the query embedding fails.
+        """
+        if not grammar_structures or not self.grammar_data:
+            return []
+        if self.vector_index is None:
+            return self._match_by_substring(grammar_structures)
+        try:
+            neighbours = self.vector_index.search_many(grammar_structures)
+        except Exception as e:
+            logger.warning(f"Semantic grammar matching failed, using substring matching: {e}")
+            return self._match_by_substring(grammar_structures)
+        
+        return [
+            {**self._related_item(self.grammar_data[index], grammar_structure), "score": score}
+            for grammar_structure, matches in zip(grammar_structures, neighbours)
+            for index, score in matches
+        ]
+    
+    def _match_by_substring(self, grammar_structures: List[str]) -> List[Dict[str, Any]]:
+        """Match detected grammar structures with dictionary titles and tags by substring."""
         related_items = []
         
         for grammar_structure in grammar_structures:
@@ -90,15 +132,18 @@ class GrammarAwareQueryRefiner(dspy.Module):
                     title in grammar_structure.lower() or
                     any(tag.lower() in grammar_structure.lower() for tag in tags)):
                     
-                    related_items.append({
-                        "title": grammar_item.get("title", ""),
-                        "summary": grammar_item.get("summary", ""),
-                        "tags": tags,
-                        "matched_structure": grammar_structure
-                    })
+                    related_items.append(self._related_item(grammar_item, grammar_structure))
         
         return related_items
     
+    def _related_item(self, grammar_item: Dict[str, Any], grammar_structure: str) -> Dict[str, Any]:
+        return {
+            "title": grammar_item.get("title", ""),
+            "summary": grammar_item.get("summary", ""),
+            "tags": grammar_item.get("tags", []),
+            "matched_structure": grammar_structure
+        }
+    
     def _is_japanese(self, text: str) -> bool:
         """Check if text contains Japanese characters."""
         return any(ord(char) > 127 for char in text)
@@ -625,6 +625,7 @@ class StreamRelatedTopicsWriter(StreamLineWriter):
     def __init__(self, lm=None) -> None:
         super().__init__(lm=lm, signature_cls=WriteRelatedTopics)
         self.grammar_analyzer = get_grammar_analyzer()
+        self.grammar_dict = get_grammar_dictionary()
 
     async def __call__(
         self, 
@@ -661,8 +662,13 @@ class StreamRelatedTopicsWriter(StreamLineWriter):
             grammar_text = self._convert_grammar_analysis_to_text(grammar_analysis)
         else:
             # 文法解析が提供されていない場合は実行
-            analysis = self.grammar_analyzer.analyze_text(query)
-            grammar_text = self._convert_grammar_analysis_to_text(analysis)
+            grammar_analysis = self.grammar_analyzer.analyze_text(query)
+            grammar_text = self._convert_grammar_analysis_to_text(grammar_analysis)
+        
+        # 辞書の関連リンクのグラフで近い項目を追加
+        neighbourhood_text = self._convert_neighbourhood_to_text(grammar_analysis)
+        if neighbourhood_text:
+            grammar_text += "\n\n" + neighbourhood_text
         
         # 関連トピック生成
         async for chunk in self.generate({
@@ -757,6 +763,22 @@ class StreamRelatedTopicsWriter(StreamLineWriter):
         except Exception as e:
             logger.warning(f"Failed to convert grammar analysis to text: {e}")
             return "文法解析結果の変換に失敗しました"
+    
+    def _convert_neighbourhood_to_text(self, grammar_analysis: Dict) -> str:
+        """
+        検出された文法構造から関連リンクを2回以内でたどれる辞書の項目をテキスト形式に変換
+        
+        Args:
+            grammar_analysis: 文法解析結果
+            
+        Returns:
+            str: 辞書の関連項目のテキスト表現（該当なしの場合は空文字）
+        """
+        structures = grammar_analysis.get('grammar_structures', []) if isinstance(grammar_analysis, dict) else []
+        items = self.grammar_dict.get_neighbourhood(structures, k=2, limit=8)
+        if not items:
+            return ""
+        return "\n".join(["辞書の関連項目:"] + [f"  - {item.get('title', '')}" for item in items])
 
 
 class StreamReferencesWriter(StreamLineWriter):
@@ -0,0 +1,144 @@
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+MARKER_PREFIX = "[[ ## "
+MARKER_SUFFIX = " ## ]]"
+
+# 区切りの単位ごとに、イベントを出してよい末尾の文字
+_BOUNDARIES = {
+    "token": None,
+    "sentence": ".!?。！？\n",
+    "line": "\n",
+}
+# 後ろに空白が続く場合だけ文末とみなす文字
+_SPACED_TERMINATORS = ".!?"
+
+
+@dataclass
+class FieldEvent:
+    """ストリーミング出力の断片と、それが属する出力フィールド（最初のマーカーより前はNone）"""
+
+    field: Optional[str]
+    text: str
+
+
+class FieldMarkerParser:
+    """DSPyの ``[[ ## field ## ]]`` マーカーを差分ごとに取り除く状態機械
+
+    チャンクの境界をまたいだマーカーも扱えるよう、マーカーの先頭になり得る末尾だけを
+    保留する。保留はマーカー長で抑えられるため、1回の ``feed`` は差分の長さに比例する。
+    ``granularity`` が ``sentence``/``line`` の場合は1文・1行ごとにイベントを返すので、
+    差分の区切り方によらず同じ列になる。
+    """
+
+    def __init__(self, field_names: Optional[Iterable[str]] = None, granularity: str = "token") -> None:
+        if granularity not in _BOUNDARIES:
+            raise ValueError(f"Unknown granularity: {granularity} (expected one of {', '.join(_BOUNDARIES)})")
+        # フィールド名が指定されなければ任意の識別子をマーカーとして扱う
+        self.field_names = set(field_names) if field_names is not None else None
+        self.granularity = granularity
+        self.field: Optional[str] = None
+        self._values: dict[Optional[str], list[str]] = {}
+        longest = max((len(name) for name in self.field_names), default=0) if self.field_names is not None else 64
+        self._max_marker_length = len(MARKER_PREFIX) + longest + len(MARKER_SUFFIX)
+        self._pending = ""  # マーカーの途中かもしれない未確定の文字列
+        self._text = ""  # 区切り待ちの確定済みテキスト
+        self._scan = 0  # self._text の走査済み位置
+
+    @property
+    def values(self) -> dict[Optional[str], str]:
+        """フィールドごとのこれまでのテキスト"""
+        return {field: "".join(parts) for field, parts in self._values.items()}
+
+    def _is_field(self, name: str) -> bool:
+        if self.field_names is not None:
+            return name in self.field_names
+        return re.fullmatch(r"\w+", name) is not None
+
+    def feed(self, delta: str) -> list[FieldEvent]:
+        """差分を追加し、確定したテキストのイベントを返す"""
+        data = self._pending + delta
+        events: list[FieldEvent] = []
+        pos = 0
+        while True:
+            start = data.find(MARKER_PREFIX, pos)
+            if start < 0:
+                break
+            end = data.find(MARKER_SUFFIX, start + len(MARKER_PREFIX), start + self._max_marker_length)
+            if end < 0:
+                if len(data) - start < self._max_marker_length:
+                    # マーカーが閉じていない: 続きの差分を待つ
+                    self._append(data[pos:start], events)
+                    self._pending = data[start:]
+                    return events
+                # マーカーにしては長すぎるので通常のテキスト
+                self._append(data[pos:start + 1], events)
+                pos = start + 1
+                continue
+            name = data[start + len(MARKER_PREFIX):end]
+            if not self._is_field(name):
+                self._append(data[pos:start + 1], events)
+                pos = start + 1
+                continue
+            self._append(data[pos:start], events)
+            self._flush(events)
+            self.field = name
+            pos = end + len(MARKER_SUFFIX)
+
+        # 末尾がマーカーの先頭と一致する場合だけ保留する
+        tail = data[pos:]
+        keep = 0
+        for length in range(min(len(tail), len(MARKER_PREFIX) - 1), 0, -1):
+            if MARKER_PREFIX.startswith(tail[-length:]):
+                keep = length
+                break
+        self._append(tail[:len(tail) - keep], events)
+        self._pending = tail[len(tail) - keep:]
+        return events
+
+    def close(self) -> list[FieldEvent]:
+        """保留中のテキストをすべて返す"""
+        events: list[FieldEvent] = []
+        self._append(self._pending, events)
+        self._pending = ""
+        self._flush(events)
+        return events
+
+    def _append(self, text: str, events: list[FieldEvent]) -> None:
+        if not text:
+            return
+        self._values.setdefault(self.field, []).append(text)
+        boundaries = _BOUNDARIES[self.granularity]
+        if boundaries is None:
+            events.append(FieldEvent(self.field, text))
+            return
+        # 前回の走査位置から新しい部分だけを調べ、文・行ごとに1イベントを返す
+        self._text += text
+        buffer = self._text
+        start, i, n = 0, self._scan, len(buffer)
+        while i < n:
+            if buffer[i] not in boundaries:
+                i += 1
+                continue
+            j = i + 1
+            if self.granularity == "sentence":
+                # 文末の後の空白まで含める（続く文字が届くまで確定しない）
+                while j < n and buffer[j].isspace():
+                    j += 1
+                if j == n:
+                    break
+                if buffer[i] in _SPACED_TERMINATORS and j == i + 1:
+                    # "e.g." や "3.5" のように空白が続かないものは文末としない
+                    i += 1
+                    continue
+            events.append(FieldEvent(self.field, buffer[start:j]))
+            start = i = j
+        self._text = buffer[start:]
+        self._scan = i - start
+
+    def _flush(self, events: list[FieldEvent]) -> None:
+        if self._text:
+            events.append(FieldEvent(self.field, self._text))
+            self._text = ""
+        self._scan = 0
@@ -1,12 +1,23 @@
+import asyncio
+import time
 from typing import AsyncGenerator, Callable
 
 import litellm
 from dspy.adapters.chat_adapter import ChatAdapter
 
+from src.utils.http_client import connection_close_headers, get_async_openai_client
+from src.utils.llm_cache import is_cacheable
+from src.utils.llm_limits import estimate_tokens, get_llm_limiter
+from src.utils.llm_metrics import LLMCallRecord, get_llm_metrics
 from src.utils.logging import logger
 
+from .field_parser import FieldEvent, FieldMarkerParser
+
 
 class StreamLineWriter:
+    # generateが返す単位（token / sentence / line）
+    granularity = "sentence"
+
     def __init__(self, lm=None, signature_cls=None) -> None:
         self.lm = lm
         self.signature_cls = signature_cls
@@ -23,51 +34,194 @@ class StreamLineWriter:
     async def generate(
         self, input_kwargs: dict[str, str], line_fixer: Callable | None = None
     ) -> AsyncGenerator[str, None]:
+        # line_fixerは行単位で適用するため、指定があれば行ごとに返す
+        granularity = "line" if line_fixer else self.granularity
+        text = ""
+        async for event in self.stream_events(input_kwargs, granularity=granularity):
+            chunk = event.text
+            if line_fixer:
+                head, newline, _ = chunk.partition("\n")
+                chunk = line_fixer(head) + newline
+            text += chunk
+            yield chunk
+        self.__text = text
+
+    async def stream_events(
+        self, input_kwargs: dict[str, str], granularity: str = "token"
+    ) -> AsyncGenerator[FieldEvent, None]:
+        """出力フィールド名付きのテキスト断片を返す（フィールドマーカーは除去済み）"""
         if not self.lm:
             # Fallback to non-streaming mode if no LM is provided
-            yield "Content generation not available without language model."
-            self.__text = "Content generation not available without language model."
+            yield FieldEvent(None, "Content generation not available without language model.")
             return
-            
+
         adapter = ChatAdapter()
         messages = adapter.format(
             self.signature_cls,  # type:ignore
             [],
             input_kwargs,
         )
-        response = await litellm.acompletion(
-            model=self.lm.model,
-            messages=messages,
-            stream=True,
-            num_retries=self.lm.num_retries,
-            extra_headers={"Connection": "close"},
-            **self.lm.kwargs,
-        )
-        buf = ""
-        text = ""
-        async for chunk in response:  # type: ignore
-            content = chunk.choices[0]["delta"]["content"] or ""  # type:ignore
-            buf += content
-            for keyword in self.keywords:
-                buf = buf.replace(f"[[ ## {keyword} ## ]]", "")
-            if buf.find("\n") >= 0:
-                head, tail = buf.split("\n", 1)
-                if line_fixer:
-                    head = line_fixer(head)
-                yield head + "\n"
-                text += head + "\n"
-                buf = tail
-        if buf:
-            yield buf
-            text += buf
-        self.__text = text
+
+        record = LLMCallRecord(signature=self.signature_cls.__name__, model=self.lm.model)
+        started = time.perf_counter()
+
+        # 決定的な呼び出しはLMの補完キャッシュから同じ行処理で再生する
+        completion_cache = getattr(self.lm, "completion_cache", None)
+        cache_key = None
+        cached = None
+        if completion_cache and is_cacheable(self.lm.kwargs):
+            cache_key = completion_cache.make_key(
+                self.lm.model, messages, self.lm.kwargs, signature=self.signature_cls.__name__
+            )
+            cached = completion_cache.get(cache_key)
+        lease = None
+        limiter = get_llm_limiter()
+        if cached is not None:
+            logger.info(f"[{self.signature_cls.__name__}] replaying cached completion")
+            contents = self._replay(cached)
+            record.cached = True
+            cache_key = None
+        else:
+            if limiter.enabled:
+                # 実行全体の同時呼び出し数・トークン上限の枠が空くまで待つ
+                lease = await limiter.aacquire(estimate_tokens(messages))
+                started = time.perf_counter()
+            contents = self._stream_contents(messages, record)
+
+        parser = FieldMarkerParser(self.keywords or None, granularity=granularity)
+        raw_parts = []
+        text_length = 0
+        try:
+            async for content in contents:
+                if content and record.time_to_first_token is None:
+                    record.time_to_first_token = time.perf_counter() - started
+                raw_parts.append(content)
+                for event in parser.feed(content):
+                    text_length += len(event.text)
+                    yield event
+            for event in parser.close():
+                text_length += len(event.text)
+                yield event
+        except Exception as e:
+            record.error = str(e)
+            raise
+        finally:
+            raw = "".join(raw_parts)
+            record.duration = time.perf_counter() - started
+            if not record.cached and not record.completion_tokens and raw:
+                # ストリームに使用量が含まれない場合はトークナイザーで概算する
+                record.prompt_tokens = self._count_tokens(messages=messages)
+                record.completion_tokens = self._count_tokens(text=raw)
+                record.usage_estimated = True
+            if lease is not None:
+                limiter.release(lease, record.prompt_tokens + record.completion_tokens or None)
+            get_llm_metrics().record(record)
+
+        # 代替モデルの応答は主モデルのキーで保存しない（次回は主モデルで再試行する）
+        if cache_key and raw and not record.fallback:
+            completion_cache.set(cache_key, raw)
 
         logger.info(
             " ".join(
                 [
                     f"[{self.signature_cls.__name__}]",
                     " ".join([f"(in) {key}: {len(val)} chars" for key, val in input_kwargs.items()]),
-                    f"(out) text: {len(text)} chars",
+                    f"(out) text: {text_length} chars,",
+                    f"tokens: {record.prompt_tokens} in / {record.completion_tokens} out,",
+                    f"ttft: {record.time_to_first_token or 0.0:.2f}s, total: {record.duration:.2f}s,",
+                    f"{record.tokens_per_second:.1f} tok/s, retries: {record.retries}",
                 ]
             )
-        ) 
\ No newline at end of file
+        )
+
+    async def _stream_contents(self, messages, record: LLMCallRecord) -> AsyncGenerator[str, None]:
+        try:
+            chunks = await self._open_stream(self.lm, messages, record)
+        except Exception as e:
+            # 最初のチャンクまでに失敗・予算超過したら代替モデルに切り替える
+            fallback_lm = getattr(self.lm, "fallback_lm", None)
+            if fallback_lm is None:
+                raise
+            logger.warning(
+                f"[{record.signature}] {self.lm.model} failed or exceeded its latency budget ({e!r}); "
+                f"falling back to {fallback_lm.model}"
+            )
+            record.model = fallback_lm.model
+            record.fallback = True
+            chunks = await self._open_stream(fallback_lm, messages, record)
+        if chunks is None:
+            return
+
+        chunk = await chunks.__anext__()
+        while True:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                record.prompt_tokens = usage.prompt_tokens or 0
+                record.completion_tokens = usage.completion_tokens or 0
+            if chunk.choices:
+                yield chunk.choices[0]["delta"]["content"] or ""  # type:ignore
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+
+    async def _open_stream(self, lm, messages, record: LLMCallRecord):
+        # 再試行回数を記録するため、最初のチャンクを受け取るまでの失敗はここで再試行する
+        # timeoutが設定されていれば最初のチャンクまでのレイテンシ予算として扱う
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(self._first_chunk(lm, messages), timeout=lm.kwargs.get("timeout"))
+            except StopAsyncIteration:
+                return None
+            except Exception as e:
+                if attempt >= (lm.num_retries or 0):
+                    raise
+                attempt += 1
+                record.retries += 1
+                delay = min(2 ** (attempt - 1), 30)
+                logger.warning(f"[{record.signature}] completion failed ({e!r}); retry {attempt} in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def _first_chunk(self, lm, messages):
+        response = await litellm.acompletion(
+            model=lm.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            num_retries=0,
+            **self._transport_kwargs(lm),
+            **lm.kwargs,
+        )
+        chunks = response.__aiter__()  # type: ignore
+        first = await chunks.__anext__()
+
+        async def _chunks():
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        return _chunks()
+
+    @staticmethod
+    def _transport_kwargs(lm) -> dict:
+        # OpenAI互換モデルはイベントループ共有のkeep-aliveクライアントで接続を再利用する
+        kwargs = {}
+        if lm.model.split("/", 1)[0] == "openai":
+            kwargs["client"] = get_async_openai_client(
+                api_key=lm.kwargs.get("api_key"), base_url=lm.kwargs.get("api_base")
+            )
+        headers = connection_close_headers()
+        if headers:
+            kwargs["extra_headers"] = headers
+        return kwargs
+
+    def _count_tokens(self, messages=None, text: str = "") -> int:
+        try:
+            return litellm.token_counter(model=self.lm.model, messages=messages, text=text or None)
+        except Exception:
+            return len((text or str(messages)).split())
+
+    @staticmethod
+    async def _replay(raw: str) -> AsyncGenerator[str, None]:
+        for line in raw.splitlines(keepends=True):
+            yield line
@@ -0,0 +1,222 @@
+"""
+Headless batch research: many research pipelines run concurrently under global caps.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from src.app.research_pipeline import ResearchComponents, ResearchOptions, run_research
+from src.retriever.web_search.throttle import configure_engine_rate
+from src.utils.http_client import aclose_async_http_client
+from src.utils.llm_limits import configure_llm_limiter, get_llm_limiter
+from src.utils.logging import logger
+from src.utils.report_manager import ReportManager
+
+DEFAULT_BATCH_CONCURRENCY = 4
+# Options that change how a report is produced but not what it contains
+_TRANSPORT_OPTIONS = {"streaming_outline"}
+
+
+@dataclass
+class BatchJob:
+    """A research query of a batch and its options."""
+
+    id: str
+    query: str
+    options: ResearchOptions
+
+
+def make_job_id(query: str, options: ResearchOptions) -> str:
+    """Stable job ID derived from the query and its options (used to resume batches).
+
+    Transport-only options are left out, so toggling e.g. ``ENGLISHY_STREAMING_OUTLINE``
+    does not make a resumed batch redo completed jobs.
+    """
+    content_options = {name: value for name, value in asdict(options).items() if name not in _TRANSPORT_OPTIONS}
+    key = json.dumps({"query": query, "options": content_options}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+def load_batch_jobs(path: str, defaults: Optional[ResearchOptions] = None) -> List[BatchJob]:
+    """
+    Load batch jobs from a queries file.
+
+    Plain text files hold one query per line (blank lines and ``#`` comments are
+    skipped). ``.jsonl`` files hold one object per line with a ``query``, an
+    optional ``id`` and any ResearchOptions field overriding ``defaults``.
+
+    Args:
+        path: Queries file
+        defaults: Options of jobs that do not override them
+
+    Returns:
+        Jobs in file order (duplicates removed)
+
+    Raises:
+        ValueError: If a JSONL line is invalid or names an unknown option
+    """
+    defaults = defaults or ResearchOptions()
+    option_names = {f.name for f in fields(ResearchOptions)}
+    jobs: List[BatchJob] = []
+    seen: Set[str] = set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({e})") from e
+                query = str(entry.pop("query", "")).strip()
+                job_id = entry.pop("id", None)
+                unknown = set(entry) - option_names
+                if not query or unknown:
+                    raise ValueError(f"{path}:{line_number}: expected a 'query' and research options, got {sorted(unknown) or 'no query'}")
+                options = replace(defaults, **entry)
+            else:
+                query, job_id, options = line, None, defaults
+
+            job_id = str(job_id) if job_id else make_job_id(query, options)
+            if job_id in seen:
+                logger.info(f"Skipping duplicate batch job {job_id}: {query}")
+                continue
+            seen.add(job_id)
+            jobs.append(BatchJob(job_id, query, options))
+    return jobs
+
+
+def load_completed_job_ids(output_path: str) -> Set[str]:
+    """
+    Get the IDs of jobs already written successfully to a batch JSONL file.
+
+    A truncated last line (from an interrupted run) is ignored.
+    """
+    completed: Set[str] = set()
+    if not output_path or not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("status") == "ok":
+                completed.add(entry.get("id"))
+    return completed
+
+
+def configure_batch_limits(
+    max_llm_calls: Optional[int] = None,
+    tokens_per_minute: Optional[int] = None,
+    web_searches_per_minute: Optional[float] = None
+) -> None:
+    """
+    Set the process-wide caps shared by all pipelines of a batch.
+
+    The web search rate applies to engine guards that already exist as well as
+    to those created later.
+
+    Args:
+        max_llm_calls: Concurrent LLM calls (None or 0 = unlimited)
+        tokens_per_minute: LLM tokens per minute (None or 0 = unlimited)
+        web_searches_per_minute: Web search requests per minute per engine (None or 0 = engine default)
+    """
+    configure_llm_limiter(max_llm_calls, tokens_per_minute)
+    if web_searches_per_minute:
+        configure_engine_rate(web_searches_per_minute / 60, burst=1)
+    logger.info(
+        f"Batch limits: LLM calls {max_llm_calls or 'unlimited'}, tokens/min {tokens_per_minute or 'unlimited'}, "
+        f"web searches/min {web_searches_per_minute or 'default'}"
+    )
+
+
+async def run_batch(
+    jobs: List[BatchJob],
+    components: ResearchComponents,
+    output_path: Optional[str] = None,
+    report_manager: Optional[ReportManager] = None,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    resume: bool = True,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run research jobs concurrently and store each report as soon as it finishes.
+
+    Results are appended to ``output_path`` (one JSON object per job with its
+    ``id``, ``status`` and ``report`` or ``error``) and/or saved to the report
+    store as ``batch_<id>``. With ``resume``, jobs already stored successfully
+    are skipped, so an interrupted batch can simply be started again; failed
+    jobs are retried.
+
+    Args:
+        jobs: Jobs to run
+        components: AI modules shared by all jobs
+        output_path: Optional JSONL output file
+        report_manager: Optional report store
+        concurrency: Research pipelines run at once
+        resume: Skip jobs that are already stored
+        on_result: Optional callback receiving each result entry
+
+    Returns:
+        Counts of total, skipped, succeeded and failed jobs, the elapsed time and the LLM limiter counters
+    """
+    done = load_completed_job_ids(output_path) if resume and output_path else set()
+    if resume and report_manager and not output_path:
+        done |= {job.id for job in jobs if report_manager.get_report(f"batch_{job.id}") is not None}
+    pending = [job for job in jobs if job.id not in done]
+    logger.info(f"Batch: {len(jobs)} jobs, {len(jobs) - len(pending)} already done, {len(pending)} to run")
+
+    if output_path and os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    counts = {"succeeded": 0, "failed": 0}
+    started = time.perf_counter()
+
+    async def run_one(job: BatchJob) -> None:
+        async with semaphore:
+            job_started = time.perf_counter()
+            entry: Dict[str, Any] = {"id": job.id, "query": job.query, "options": asdict(job.options)}
+            try:
+                report_data = await run_research(job.query, components, job.options)
+                entry.update(status="ok", report=report_data)
+                if report_manager and not report_manager.save_report(dict(report_data), report_id=f"batch_{job.id}"):
+                    raise OSError(f"failed to save report batch_{job.id}")
+            except Exception as e:
+                logger.error(f"Batch job {job.id} ({job.query}) failed: {e}")
+                entry.update(status="error", error=str(e))
+                entry.pop("report", None)
+            entry["duration"] = round(time.perf_counter() - job_started, 3)
+
+            counts["succeeded" if entry["status"] == "ok" else "failed"] += 1
+            if output_path:
+                # 1行ずつ追記するので中断しても完了済みの結果は残る
+                with open(output_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            if on_result:
+                on_result(entry)
+            logger.info(
+                f"Batch progress: {counts['succeeded'] + counts['failed']}/{len(pending)} "
+                f"({entry['status']}, {entry['duration']:.1f}s): {job.query}"
+            )
+
+    try:
+        await asyncio.gather(*(run_one(job) for job in pending))
+    finally:
+        await aclose_async_http_client()
+
+    return {
+        "total": len(jobs),
+        "skipped": len(jobs) - len(pending),
+        **counts,
+        "duration": round(time.perf_counter() - started, 3),
+        "llm_limiter": get_llm_limiter().stats(),
+    }
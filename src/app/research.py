@@ -12,26 +12,11 @@ from datetime import datetime
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-import dspy
-from src.ai.openai_client import OpenAIClient
-from src.ai.query_refiner import QueryRefiner
-from src.ai.query_expander import QueryExpander
-from src.ai.outline_creater import OutlineCreater
-from src.ai.report_writer import (
-    StreamLeadWriter, StreamSectionWriter, StreamConclusionWriter, 
-    WriteLeadEnglish, WriteLeadJapanese, WriteSectionEnglish, WriteSectionJapanese,
-    WriteConclusionEnglish, WriteConclusionJapanese, StreamRelatedTopicsWriter,
-    StreamReferencesWriter, StreamIntegratedSectionWriter, StreamInlineReferencesWriter
-)
-from src.ai.mindmap_maker import MindMapMaker
-from src.ai.grammar_analyzer import get_grammar_analyzer
-from src.ai.llm_grammar_analyzer import LLMGrammarAnalyzer
-from src.ai.english_extractor import get_english_extractor
-from src.retriever.article_search.faiss import FAISSSearch
-# from utils.report_manager import ReportManager
+from src.app.research_pipeline import ResearchComponents, ResearchOptions, run_research
+from src.utils.http_client import aclose_async_http_client
 from src.utils.logging import logger
 from src.utils.lm import load_lm
-from src.utils.web_retriever import load_web_retriever
+from src.utils.pipeline import StageEvent
 from utils.mindmap_utils import draw_mindmap
 
 
@@ -139,44 +124,8 @@ async def _start_research(query, include_web_search, include_mindmap, search_dep
         # Initialize LM
         logger.info("Initializing LM...")
         lm = load_lm()
-        
-        # Remove dspy.settings.configure to avoid thread conflicts
-        # All modules will use dspy.settings.context instead
-        
-        # Initialize AI modules with LM (without individual dspy.settings.configure calls)
-        logger.info("Initializing QueryRefiner...")
-        query_refiner = QueryRefiner(lm=lm)
-        
-        logger.info("Initializing QueryExpander...")
-        query_expander = QueryExpander(lm=lm)
-        
-        logger.info("Initializing OutlineCreater...")
-        outline_creater = OutlineCreater(lm=lm)
-        
-        logger.info("Initializing MindMapMaker...")
-        mindmap_maker = MindMapMaker(lm=lm)
-        
-        # Initialize stream writers for English and Japanese
-        logger.info("Initializing StreamLeadWriter...")
-        lead_writer = StreamLeadWriter(lm=lm)
-        
-        logger.info("Initializing StreamSectionWriter...")
-        section_writer = StreamSectionWriter(lm=lm)
-        
-        logger.info("Initializing StreamConclusionWriter...")
-        conclusion_writer = StreamConclusionWriter(lm=lm)
-        
-        logger.info("Initializing StreamRelatedTopicsWriter...")
-        related_topics_writer = StreamRelatedTopicsWriter(lm=lm)
-        
-        logger.info("Initializing StreamReferencesWriter...")
-        references_writer = StreamReferencesWriter(lm=lm)
-        
-        logger.info("Initializing StreamIntegratedSectionWriter...")
-        integrated_section_writer = StreamIntegratedSectionWriter(lm=lm)
-        
+        components = ResearchComponents(lm)
         ai_initialized = True
-        logger.info("AI components initialized successfully")
         
     except Exception as e:
         logger.error(f"Failed to initialize AI components: {e}")
@@ -192,274 +141,33 @@ async def _start_research(query, include_web_search, include_mindmap, search_dep
     
     st.info("🚀 Starting research... This may take a few minutes.")
     
-    # Progress tracking
+    # Progress tracking (driven by the stage scheduler)
     progress_bar = st.progress(0)
     status_text = st.empty()
     
+    def _on_stage_event(event: StageEvent):
+        progress_bar.progress(int(100 * event.completed / event.total))
+        if event.running:
+            running = ", ".join(stage.description for stage in event.running)
+            status_text.text(f"Step {event.completed + 1}/{event.total}: {running}...")
+    
+    options = ResearchOptions(
+        include_web_search=include_web_search,
+        include_mindmap=include_mindmap,
+        search_depth=search_depth,
+        report_style=report_style,
+        use_llm_analysis=use_llm_analysis
+    )
+    
     try:
-        # Step 1: Query refinement with grammar awareness
-        status_text.text("Step 1/7: Refining query with grammar analysis...")
-        progress_bar.progress(15)
-        
-        # Query refinement with grammar analysis
-        refinement_result = query_refiner.grammar_aware_refiner(text=query)
-        refined_query = refinement_result["refined_query"]
-        
-        st.info(f"Refined query: {refined_query}")
-        
-        # Display grammar analysis results
-        if refinement_result.get("detected_grammar"):
-            st.info(f"検出された文法: {', '.join(refinement_result['detected_grammar'])}")
-        if refinement_result.get("related_items"):
-            st.info(f"関連項目: {len(refinement_result['related_items'])}件の文法項目を検出")
-        if refinement_result.get("translation") and refinement_result["translation"] != query:
-            st.info(f"英語翻訳: {refinement_result['translation']}")
-        
-        # Step 2: Query expansion (before web search for better search optimization)
-        status_text.text("Step 2/7: Expanding search topics for optimized web search...")
-        progress_bar.progress(30)
-        
-        # Expand query to generate optimized search topics
-        expanded_result = query_expander(
-            query=refined_query,
-            web_search_results=""  # No web search results yet
-        )
-        
-        st.info(f"Generated {len(expanded_result.topics)} search topics for web search")
-        if expanded_result.topics:
-            st.info(f"Search topics: {', '.join(expanded_result.topics[:5])}{'...' if len(expanded_result.topics) > 5 else ''}")
-        
-        # Step 3: Web search with expanded topics
-        status_text.text("Step 3/7: Searching for resources with expanded topics...")
-        progress_bar.progress(45)
-        
-        web_search_results = []
-        if include_web_search:
-            web_search = load_web_retriever("DuckDuckGo")
-            
-            # Search with refined query and expanded topics
-            all_search_queries = [refined_query] + expanded_result.topics[:3]  # Use top 3 topics
-            logger.info(f"Starting web search with {len(all_search_queries)} queries: {all_search_queries}")
-            
-            for i, search_query in enumerate(all_search_queries):
-                try:
-                    logger.info(f"Search {i+1}: Searching for '{search_query}'")
-                    results = web_search.search(search_query, k=4)  # 4 results per query
-                    logger.info(f"Search {i+1}: Raw results count: {len(results)}")
-                    web_search_results.extend(results)
-                    st.info(f"Search {i+1}: Found {len(results)} results for '{search_query}'")
-                except Exception as e:
-                    logger.warning(f"Search failed for query '{search_query}': {e}")
-                    import traceback
-                    logger.warning(f"Search traceback: {traceback.format_exc()}")
-            
-            logger.info(f"Before deduplication: {len(web_search_results)} total results")
-            
-            # Remove duplicates and limit to 12 results
-            seen_urls = set()
-            unique_results = []
-            for result in web_search_results:
-                url = result.get('url', '')
-                if url not in seen_urls and len(unique_results) < 12:
-                    unique_results.append(result)
-                    seen_urls.add(url)
-                    logger.info(f"Added unique result: {result.get('title', 'No title')} - {url}")
-                else:
-                    logger.info(f"Skipped duplicate result: {result.get('title', 'No title')} - {url}")
-            
-            web_search_results = unique_results
-            logger.info(f"After deduplication: {len(web_search_results)} unique results")
-            
-            st.info(f"Total unique search results: {len(web_search_results)}")
-        
-        # Step 4: Grammar analysis of search results
-        status_text.text("Step 4/7: Analyzing grammar structures in search results...")
-        progress_bar.progress(55)
-        
-        # Choose grammar analyzer based on user preference
-        if use_llm_analysis:
-            try:
-                # Use LLM-based grammar analyzer
-                llm_analyzer = LLMGrammarAnalyzer()
-                grammar_analysis = llm_analyzer.analyze_text(refined_query)
-                st.info("🤖 Using LLM-based grammar analysis for higher accuracy")
-            except Exception as e:
-                logger.warning(f"LLM analysis failed, falling back to rule-based: {e}")
-                st.warning("⚠️ LLM analysis failed, using rule-based analysis instead")
-                grammar_analyzer = get_grammar_analyzer()
-                grammar_analysis = grammar_analyzer.analyze_text(refined_query)
-        else:
-            # Use traditional rule-based grammar analyzer
-            grammar_analyzer = get_grammar_analyzer()
-            grammar_analysis = grammar_analyzer.analyze_text(refined_query)
-            st.info("📋 Using rule-based grammar analysis")
-        
-        # Display grammar analysis results with enhanced information
-        if grammar_analysis.get('grammar_structures'):
-            st.success(f"🔍 Grammar structures detected: {', '.join(grammar_analysis['grammar_structures'])}")
-        
-        if grammar_analysis.get('related_topics'):
-            st.info(f"📚 Related topics: {', '.join(grammar_analysis['related_topics'])}")
-        
-        if grammar_analysis.get('key_points'):
-            st.info("💡 Key learning points:")
-            for point in grammar_analysis['key_points']:
-                st.write(f"  • {point}")
-        
-        if grammar_analysis.get('error'):
-            st.warning(f"⚠️ Grammar analysis warning: {grammar_analysis['error']}")
-        
-        # Step 5: Outline creation
-        status_text.text("Step 5/7: Creating report outline...")
-        progress_bar.progress(65)
-        
-        outline_result = outline_creater(
-            query=refined_query,
-            topics=expanded_result.topics,
-            references=web_search_results
-        )
-        
-        # Step 6: Report generation with integrated related topics
-        status_text.text("Step 6/7: Generating report with integrated related topics...")
-        progress_bar.progress(75)
-        
-        report = await _generate_report_with_integration(
-            query=refined_query,
-            outline=outline_result.outline,
-            references=web_search_results,
-            lead_writer=lead_writer,
-            integrated_section_writer=integrated_section_writer,
-            conclusion_writer=conclusion_writer
-        )
-        
-        # Step 7: Related topics generation
-        status_text.text("Step 7/7: Generating related topics...")
-        progress_bar.progress(85)
-        
-        related_topics = ""
-        try:
-            async for chunk in related_topics_writer(query=query):
-                related_topics += chunk
-        except Exception as e:
-            logger.error(f"Error generating related topics: {e}")
-            related_topics = "関連文法事項の生成中にエラーが発生しました。"
-        
-        # Step 7.5: Generate references
-        status_text.text("Step 7.5/7: Generating references...")
-        progress_bar.progress(90)
-        
-        references_content = ""
-        try:
-            async for chunk in references_writer(
-                query=query,
-                report_content=report,
-                search_results="\n".join([f"Title: {ref.get('title', '')}\nURL: {ref.get('url', '')}\nContent: {ref.get('snippet', '')}" for ref in web_search_results])
-            ):
-                references_content += chunk
-        except Exception as e:
-            logger.error(f"Error generating references: {e}")
-            references_content = "参考文献の生成中にエラーが発生しました。"
-        
-        # Step 7.6: Generate inline references and append to report
-        status_text.text("Step 7.6/7: Generating inline references...")
-        progress_bar.progress(92)
-        
-        # 本文に引用番号と対応した参考文献リストを追加
-        try:
-            inline_references_writer = StreamInlineReferencesWriter()
-            
-            inline_references_content = ""
-            async for chunk in inline_references_writer(
-                report_content=report,
-                search_results="\n".join([f"Title: {ref.get('title', '')}\nURL: {ref.get('url', '')}\nContent: {ref.get('snippet', '')}" for ref in web_search_results])
-            ):
-                inline_references_content += chunk
-            
-            # デバッグ: 生成されたインライン参考文献の内容をログ出力
-            logger.info(f"Generated inline references content: {inline_references_content}")
-            logger.info(f"Inline references content length: {len(inline_references_content)}")
-            
-            # 本文の最後に参考文献リストを追加
-            if inline_references_content.strip():
-                original_report_length = len(report)
-                report += f"\n\n{inline_references_content}"
-                logger.info(f"Inline references added to report. Original length: {original_report_length}, New length: {len(report)}")
-                logger.info(f"Added content: {inline_references_content}")
-            else:
-                logger.info("No inline references generated - content was empty")
-                
-        except Exception as e:
-            logger.error(f"Error generating inline references: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            # エラーが発生してもレポート生成は継続
-        
-        # Step 8: Mind map generation with related topics
-        status_text.text("Step 8/8: Creating mind map with related topics...")
-        progress_bar.progress(95)
-        
-        mindmap_content = ""
-        if include_mindmap:
-            try:
-                # アウトライン構造からキーワードを抽出
-                outline_keywords = []
-                if hasattr(outline_result, 'outline') and outline_result.outline:
-                    for section in outline_result.outline.section_outlines:
-                        for subsection in section.subsection_outlines:
-                            if hasattr(subsection, 'keywords') and subsection.keywords:
-                                outline_keywords.extend(subsection.keywords)
-                
-                # 重複を除去
-                unique_keywords = list(dict.fromkeys(outline_keywords))
-                
-                # デバッグ情報をログ出力
-                logger.info(f"Generating mindmap with {len(unique_keywords)} keywords")
-                logger.info(f"Report length: {len(report)} characters")
-                logger.info(f"Related topics length: {len(related_topics)} characters")
-                
-                mindmap_result = mindmap_maker(
-                    report=report,
-                    outline_structure=outline_result.outline,
-                    keywords=unique_keywords,
-                    related_topics=related_topics
-                )
-                mindmap_content = mindmap_result.mindmap
-                logger.info(f"Mindmap generated successfully with {len(unique_keywords)} keywords")
-                logger.info(f"Generated mindmap content length: {len(mindmap_content)} characters")
-                
-                # マインドマップ内容の検証
-                if not mindmap_content or mindmap_content.strip() == "":
-                    logger.warning("Generated mindmap content is empty")
-                    mindmap_content = "# マインドマップ\n## 内容\n### マインドマップの生成に失敗しました"
-                elif "#" not in mindmap_content:
-                    logger.warning("Generated mindmap content does not contain headers")
-                    mindmap_content = "# マインドマップ\n## 内容\n### マインドマップの形式が正しくありません"
-                    
-            except Exception as e:
-                logger.error(f"Error generating mind map: {e}")
-                import traceback
-                logger.error(f"Mindmap error traceback: {traceback.format_exc()}")
-                mindmap_content = "# マインドマップ\n## エラー\n### マインドマップの生成中にエラーが発生しました"
+        report_data = await run_research(query, components, options, notifier=st, on_event=_on_stage_event)
         
         # Complete
         progress_bar.progress(100)
         status_text.text("✅ Research completed!")
         
         # Store results in session state
-        st.session_state.current_report = {
-            "query": query,
-            "refined_query": refined_query,
-            "grammar_analysis": grammar_analysis,
-            "report": report,
-            "mindmap": mindmap_content,
-            "related_topics": related_topics,
-            "references": references_content,
-            "search_results": web_search_results,
-            "processing_time": datetime.now().timestamp(),
-            "search_depth": search_depth,
-            "report_style": report_style,
-            "use_llm_analysis": use_llm_analysis
-        }
+        st.session_state.current_report = report_data
         
         # Display results
         _display_results(st.session_state.current_report)
@@ -471,55 +179,9 @@ async def _start_research(query, include_web_search, include_mindmap, search_dep
         st.error(f"❌ Research failed: {e}")
         progress_bar.progress(0)
         status_text.text("❌ Research failed")
-
-
-async def _generate_report_with_integration(query: str, outline, references: List[str], lead_writer, integrated_section_writer, conclusion_writer) -> str:
-    """Generate the final report with integrated related topics."""
-    try:
-        # Generate lead
-        lead_content = ""
-        async for chunk in lead_writer(query=query, title=outline.title, draft=outline.to_text()):
-            lead_content += chunk
-        
-        # Generate sections with integrated related topics
-        sections_content = ""
-        for section_outline in outline.section_outlines:
-            section_content = ""
-            
-            # セクション内のサブセクションからキーワードを収集
-            section_keywords = []
-            for subsection in section_outline.subsection_outlines:
-                if hasattr(subsection, 'keywords') and subsection.keywords:
-                    section_keywords.extend(subsection.keywords)
-            
-            # 重複を除去してキーワード文字列を作成
-            unique_keywords = list(dict.fromkeys(section_keywords))
-            keywords_text = ", ".join(unique_keywords) if unique_keywords else ""
-            
-            async for chunk in integrated_section_writer(
-                query=query,
-                references="\n".join([f"Title: {ref.get('title', '')}\nURL: {ref.get('url', '')}\nContent: {ref.get('snippet', '')}" for ref in references]),
-                section_outline=section_outline.to_text(),
-                related_topics="",  # Related topics will be integrated in the section content
-                keywords=keywords_text  # 新規追加: キーワードを渡す
-            ):
-                section_content += chunk
-            sections_content += section_content + "\n\n"
-        
-        # Generate conclusion
-        conclusion_content = ""
-        draft = f"{outline.title}\n\n{lead_content}\n\n{sections_content}"
-        async for chunk in conclusion_writer(query=query, report_draft=draft):
-            conclusion_content += chunk
-        
-        # Combine all parts
-        final_report = f"{outline.title}\n\n{lead_content}\n\n{sections_content}## 結論\n{conclusion_content}"
-        
-        return final_report
-        
-    except Exception as e:
-        logger.error(f"Error generating report: {e}")
-        return f"レポート生成中にエラーが発生しました: {e}"
+    finally:
+        # イベントループ終了前に共有HTTPクライアントの接続を閉じる
+        await aclose_async_http_client()
 
 
 async def _generate_report(query: str, outline, references: List[str], lead_writer, section_writer, conclusion_writer) -> str:
@@ -0,0 +1,598 @@
+"""
+UI-independent research pipeline for Englishy.
+
+The research steps are expressed as a dependency graph of stages (see
+``src.utils.pipeline``); each stage starts as soon as its inputs are ready.
+User-facing messages go through a notifier with Streamlit's ``info`` /
+``success`` / ``warning`` / ``write`` interface, so the Streamlit page can pass
+``st`` itself and headless callers can use ``LogNotifier``.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import dspy
+
+from src.ai.query_refiner import QueryRefiner
+from src.ai.query_expander import QueryExpander
+from src.ai.outline_creater import OutlineCreater, OutlineStream
+from src.ai.report_writer import (
+    StreamLeadWriter, StreamSectionWriter, StreamConclusionWriter, StreamRelatedTopicsWriter,
+    StreamReferencesWriter, StreamIntegratedSectionWriter, StreamInlineReferencesWriter
+)
+from src.ai.mindmap_maker import MindMapMaker
+from src.ai.grammar_analysis_cache import analysis_context
+from src.ai.grammar_analyzer import get_grammar_analyzer
+from src.ai.llm_grammar_analyzer import LLMGrammarAnalyzer
+from src.retriever.article_search.page_index import DEFAULT_LATENCY_BUDGET, DEFAULT_TOP_N, WebPageIndex
+from src.retriever.article_search.reference_router import DEFAULT_PADDING, ReferenceRouter
+from src.retriever.web_search.ranking import DEFAULT_SNIPPET_TOKEN_BUDGET, rank_web_results
+from src.retriever.web_search.throttle import get_throttle_stats
+from src.encoder.openai import OpenAIEncoder
+from src.utils.llm_metrics import get_llm_metrics, run_context
+from src.utils.logging import logger
+from src.utils.model_profiles import ModelProfile, ModelRouter
+from src.utils.pipeline import Pipeline, Stage, StageEvent
+from src.utils.web_retriever import load_web_retriever
+
+# Maximum number of lead/section streams generated at once
+DEFAULT_SECTION_CONCURRENCY = 4
+
+
+@dataclass
+class ResearchOptions:
+    """Options of a research run (the fields of the research form)."""
+
+    include_web_search: bool = True
+    include_mindmap: bool = True
+    search_depth: str = "Comprehensive"
+    report_style: str = "Beginner-friendly"
+    use_llm_analysis: bool = True
+    # Stream the outline and start writing sections as soon as each one is complete
+    streaming_outline: bool = field(
+        default_factory=lambda: os.getenv("ENGLISHY_STREAMING_OUTLINE", "0").lower() not in ("0", "false", "no", "off")
+    )
+
+
+class LogNotifier:
+    """Notifier for headless runs: writes user-facing messages to the log."""
+
+    def info(self, message: str) -> None:
+        logger.info(message)
+
+    def success(self, message: str) -> None:
+        logger.info(message)
+
+    def warning(self, message: str) -> None:
+        logger.warning(message)
+
+    def write(self, message: str) -> None:
+        logger.info(message)
+
+
+class ResearchComponents:
+    """AI modules used by the research pipeline.
+
+    Each module gets the LM of its stage profile (see ``src.utils.model_profiles``);
+    stages without a profile share the default LM.
+    """
+
+    def __init__(self, lm, profiles: Optional[Dict[str, ModelProfile]] = None):
+        """
+        Initialize the AI modules.
+
+        Args:
+            lm: Default dspy.LM instance
+            profiles: Stage model profiles (defaults to load_model_profiles())
+        """
+        self.lm = lm
+        self.models = ModelRouter(lm, profiles)
+
+        # Remove dspy.settings.configure to avoid thread conflicts
+        # All modules will use dspy.settings.context instead
+        logger.info("Initializing QueryRefiner...")
+        self.query_refiner = QueryRefiner(lm=self.models.lm_for("query_refiner"))
+
+        logger.info("Initializing QueryExpander...")
+        self.query_expander = QueryExpander(lm=self.models.lm_for("query_expander"))
+
+        logger.info("Initializing OutlineCreater...")
+        self.outline_creater = OutlineCreater(lm=self.models.lm_for("outline"), fix_lm=self.models.lm_for("fix_outline"))
+
+        logger.info("Initializing MindMapMaker...")
+        self.mindmap_maker = MindMapMaker(lm=self.models.lm_for("mindmap"))
+
+        # Initialize stream writers
+        logger.info("Initializing stream writers...")
+        self.lead_writer = StreamLeadWriter(lm=self.models.lm_for("lead"))
+        self.section_writer = StreamSectionWriter(lm=self.models.lm_for("section"))
+        self.conclusion_writer = StreamConclusionWriter(lm=self.models.lm_for("conclusion"))
+        self.related_topics_writer = StreamRelatedTopicsWriter(lm=self.models.lm_for("related_topics"))
+        self.references_writer = StreamReferencesWriter(lm=self.models.lm_for("references"))
+        self.integrated_section_writer = StreamIntegratedSectionWriter(lm=self.models.lm_for("section"))
+
+        logger.info("AI components initialized successfully")
+
+
+def format_search_results(web_search_results: List[Dict[str, Any]]) -> str:
+    """Format web search results in the ``Title/URL/Content`` format used by the writers."""
+    return "\n".join([
+        f"Title: {ref.get('title', '')}\nURL: {ref.get('url', '')}\nContent: {ref.get('snippet', '')}"
+        for ref in web_search_results
+    ])
+
+
+async def collect_stream(stream) -> str:
+    """Buffer a writer's streamed chunks into a single string."""
+    content = ""
+    async for chunk in stream:
+        content += chunk
+    return content
+
+
+async def build_page_index(web_search_results: List[Dict[str, Any]]):
+    """Build the ephemeral full-page passage index, or return None if unavailable."""
+    try:
+        page_index = WebPageIndex(
+            encoder=OpenAIEncoder(),
+            top_n=int(os.getenv("ENGLISHY_PAGE_FETCH_TOP_N", DEFAULT_TOP_N)),
+            latency_budget=float(os.getenv("ENGLISHY_PAGE_FETCH_BUDGET", DEFAULT_LATENCY_BUDGET))
+        )
+        passage_count = await page_index.build(web_search_results)
+        logger.info(f"Indexed {passage_count} full-page passages")
+    except Exception as e:
+        logger.warning(f"Full-page indexing failed, using search snippets only: {e}")
+        return None
+    return page_index if page_index.is_ready else None
+
+
+def load_reference_router(references: List[Dict[str, Any]]) -> Optional[ReferenceRouter]:
+    """
+    Create the per-section reference router configured by environment variables.
+
+    ENGLISHY_SECTION_REFERENCE_ROUTING=0 disables routing (every section gets all
+    references). ENGLISHY_SECTION_REFERENCE_PADDING sets how many extra
+    references are chosen by embedding similarity (0 avoids embedding calls).
+    """
+    if os.getenv("ENGLISHY_SECTION_REFERENCE_ROUTING", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    padding = int(os.getenv("ENGLISHY_SECTION_REFERENCE_PADDING", DEFAULT_PADDING))
+    return ReferenceRouter(references, encoder=OpenAIEncoder() if padding else None, padding=padding)
+
+
+async def generate_report_with_integration(query: str, outline, references: List[Dict[str, Any]], lead_writer, integrated_section_writer, conclusion_writer, page_index=None, reference_router=None) -> str:
+    """Generate the final report with integrated related topics.
+
+    The lead and the sections depend only on the outline and references, so they
+    are generated concurrently (at most ENGLISHY_SECTION_CONCURRENCY streams at
+    once), buffered per section and assembled in outline order. The conclusion
+    needs the whole draft and is written last. With a ``reference_router`` each
+    section only receives the references its subsections cite.
+
+    ``outline`` may also be an OutlineStream: each section is then started as
+    soon as it is parsed, and the lead once the whole outline is known.
+    """
+    try:
+        references_text = format_search_results(references)
+        concurrency = max(1, int(os.getenv("ENGLISHY_SECTION_CONCURRENCY", DEFAULT_SECTION_CONCURRENCY)))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        # Generate lead
+        async def _write_lead() -> str:
+            async with semaphore:
+                return await collect_stream(lead_writer(query=query, title=outline.title, draft=outline.to_text()))
+
+        # Generate sections with integrated related topics
+        async def _write_section(section_outline) -> str:
+            async with semaphore:
+                # 全文インデックスがあればセクションに関連する本文の抜粋を使用
+                section_references = references_text
+                if reference_router:
+                    # サブセクションが引用する参考文献のみを引用番号付きで渡す
+                    section_references = await asyncio.to_thread(
+                        reference_router.format_for, section_outline, page_index
+                    )
+                elif page_index:
+                    section_references = await asyncio.to_thread(
+                        page_index.format_references, references, section_outline.to_text()
+                    )
+
+                # セクション内のサブセクションからキーワードを収集
+                section_keywords = []
+                for subsection in section_outline.subsection_outlines:
+                    if hasattr(subsection, 'keywords') and subsection.keywords:
+                        section_keywords.extend(subsection.keywords)
+
+                # 重複を除去してキーワード文字列を作成
+                unique_keywords = list(dict.fromkeys(section_keywords))
+                keywords_text = ", ".join(unique_keywords) if unique_keywords else ""
+
+                return await collect_stream(integrated_section_writer(
+                    query=query,
+                    references=section_references,
+                    section_outline=section_outline.to_text(),
+                    related_topics="",  # Related topics will be integrated in the section content
+                    keywords=keywords_text  # 新規追加: キーワードを渡す
+                ))
+
+        started = time.perf_counter()
+        tasks = []
+        try:
+            if isinstance(outline, OutlineStream):
+                async for section_outline in outline:
+                    tasks.append(asyncio.ensure_future(_write_section(section_outline)))
+                outline = outline.outline
+            else:
+                tasks = [asyncio.ensure_future(_write_section(section_outline)) for section_outline in outline.section_outlines]
+            tasks.insert(0, asyncio.ensure_future(_write_lead()))
+            lead_content, *section_contents = await asyncio.gather(*tasks)
+        finally:
+            # 1つでも失敗したら残りのストリームを止める
+            for task in tasks:
+                task.cancel()
+        sections_content = "".join(section_content + "\n\n" for section_content in section_contents)
+        logger.info(
+            f"Generated lead and {len(section_contents)} sections in {time.perf_counter() - started:.1f}s "
+            f"(concurrency={concurrency})"
+        )
+
+        # Generate conclusion
+        conclusion_content = ""
+        draft = f"{outline.title}\n\n{lead_content}\n\n{sections_content}"
+        async for chunk in conclusion_writer(query=query, report_draft=draft):
+            conclusion_content += chunk
+
+        # Combine all parts
+        final_report = f"{outline.title}\n\n{lead_content}\n\n{sections_content}## 結論\n{conclusion_content}"
+
+        return final_report
+
+    except Exception as e:
+        logger.error(f"Error generating report: {e}")
+        return f"レポート生成中にエラーが発生しました: {e}"
+
+
+def build_research_pipeline(components: ResearchComponents, options: ResearchOptions, notifier=None) -> Pipeline:
+    """
+    Build the research stage graph.
+
+    Dependencies::
+
+        query ─ refine ─ expand ─ web_search ─ page_index ─┐
+          │        └─ grammar       └──────── outline ──── report ─┬─ references
+          │                                                        ├─ inline_references ─ assemble
+          └─ related_topics ───────────────────────────────────────┴─ mindmap
+
+    With ``options.streaming_outline`` the outline stage only starts an
+    OutlineStream, and the report stage writes each section as soon as it is
+    parsed and also produces ``outline_result``.
+
+    Args:
+        components: Initialized AI modules
+        options: Research options
+        notifier: Receiver of user-facing messages (defaults to LogNotifier)
+
+    Returns:
+        Pipeline taking ``query`` and producing the values of ``run_research``
+    """
+    notifier = notifier or LogNotifier()
+
+    async def refine(query):
+        # Query refinement with grammar analysis
+        refinement_result = await asyncio.to_thread(components.query_refiner.grammar_aware_refiner, text=query)
+        refined_query = refinement_result["refined_query"]
+
+        notifier.info(f"Refined query: {refined_query}")
+
+        # Display grammar analysis results
+        if refinement_result.get("detected_grammar"):
+            notifier.info(f"検出された文法: {', '.join(refinement_result['detected_grammar'])}")
+        if refinement_result.get("related_items"):
+            notifier.info(f"関連項目: {len(refinement_result['related_items'])}件の文法項目を検出")
+        if refinement_result.get("translation") and refinement_result["translation"] != query:
+            notifier.info(f"英語翻訳: {refinement_result['translation']}")
+        return refinement_result, refined_query
+
+    async def expand(refined_query):
+        # Expand query to generate optimized search topics
+        expanded_result = await asyncio.to_thread(
+            components.query_expander,
+            query=refined_query,
+            web_search_results=""  # No web search results yet
+        )
+
+        notifier.info(f"Generated {len(expanded_result.topics)} search topics for web search")
+        if expanded_result.topics:
+            notifier.info(f"Search topics: {', '.join(expanded_result.topics[:5])}{'...' if len(expanded_result.topics) > 5 else ''}")
+        return expanded_result
+
+    async def web_search(refined_query, expanded_result):
+        if not options.include_web_search:
+            return []
+        web_retriever = load_web_retriever(os.getenv("ENGLISHY_WEB_SEARCH_ENGINE", "DuckDuckGo"))
+
+        # Search with refined query and expanded topics
+        all_search_queries = [refined_query] + expanded_result.topics[:3]  # Use top 3 topics
+        logger.info(f"Starting web search with {len(all_search_queries)} queries: {all_search_queries}")
+
+        # Run all queries concurrently; timed-out queries come back empty
+        results_per_query = await web_retriever.search_many(all_search_queries, k=4)  # 4 results per query
+
+        for i, (search_query, results) in enumerate(zip(all_search_queries, results_per_query)):
+            logger.info(f"Search {i+1}: Raw results count: {len(results)}")
+            notifier.info(f"Search {i+1}: Found {len(results)} results for '{search_query}'")
+        logger.info(f"Web search throttle stats: {get_throttle_stats()}")
+
+        logger.info(f"Before deduplication: {sum(len(results) for results in results_per_query)} total results")
+
+        # Fuse rankings across queries, collapse mirrors/near-duplicates and fit the snippet token budget
+        web_search_results = rank_web_results(
+            results_per_query,
+            token_budget=int(os.getenv("ENGLISHY_WEB_SNIPPET_TOKEN_BUDGET", DEFAULT_SNIPPET_TOKEN_BUDGET))
+        )
+        for result in web_search_results:
+            logger.info(f"Selected result: {result.get('title', 'No title')} - {result.get('url', '')}")
+        logger.info(f"After deduplication: {len(web_search_results)} unique results")
+
+        notifier.info(f"Total unique search results: {len(web_search_results)}")
+        return web_search_results
+
+    async def page_index(web_search_results):
+        # Fetch full pages of the top results into a per-query passage index
+        if not web_search_results or options.search_depth == "Basic":
+            return None
+        index = await build_page_index(web_search_results)
+        if index:
+            notifier.info("📄 Full-page passages indexed for section writing")
+        return index
+
+    async def grammar(refined_query):
+        # Choose grammar analyzer based on user preference
+        if options.use_llm_analysis:
+            try:
+                # Use LLM-based grammar analyzer
+                llm_analyzer = LLMGrammarAnalyzer()
+                grammar_analysis = await llm_analyzer.aanalyze_text(refined_query)
+                notifier.info("🤖 Using LLM-based grammar analysis for higher accuracy")
+            except Exception as e:
+                logger.warning(f"LLM analysis failed, falling back to rule-based: {e}")
+                notifier.warning("⚠️ LLM analysis failed, using rule-based analysis instead")
+                grammar_analysis = await asyncio.to_thread(get_grammar_analyzer().analyze_text, refined_query)
+        else:
+            # Use traditional rule-based grammar analyzer
+            grammar_analysis = await asyncio.to_thread(get_grammar_analyzer().analyze_text, refined_query)
+            notifier.info("📋 Using rule-based grammar analysis")
+
+        # Display grammar analysis results with enhanced information
+        if grammar_analysis.get('grammar_structures'):
+            notifier.success(f"🔍 Grammar structures detected: {', '.join(grammar_analysis['grammar_structures'])}")
+
+        if grammar_analysis.get('related_topics'):
+            notifier.info(f"📚 Related topics: {', '.join(grammar_analysis['related_topics'])}")
+
+        if grammar_analysis.get('key_points'):
+            notifier.info("💡 Key learning points:")
+            for point in grammar_analysis['key_points']:
+                notifier.write(f"  • {point}")
+
+        if grammar_analysis.get('error'):
+            notifier.warning(f"⚠️ Grammar analysis warning: {grammar_analysis['error']}")
+        return grammar_analysis
+
+    async def outline(refined_query, expanded_result, web_search_results):
+        return await asyncio.to_thread(
+            components.outline_creater,
+            query=refined_query,
+            topics=expanded_result.topics,
+            references=web_search_results
+        )
+
+    def outline_stream(refined_query, expanded_result, web_search_results):
+        # 生成はバックグラウンドで進み、reportステージが完成したセクションから書き始める
+        return components.outline_creater.astream(
+            query=refined_query,
+            topics=expanded_result.topics,
+            references=web_search_results
+        )
+
+    async def streamed_report(refined_query, outline_stream, web_search_results, page_index):
+        try:
+            report_body = await report(refined_query, outline_stream, web_search_results, page_index)
+            return report_body, dspy.Prediction(outline=await outline_stream.result())
+        finally:
+            outline_stream.cancel()
+
+    async def report(refined_query, outline_result, web_search_results, page_index):
+        # Report generation with integrated related topics
+        return await generate_report_with_integration(
+            query=refined_query,
+            outline=outline_result if isinstance(outline_result, OutlineStream) else outline_result.outline,
+            references=web_search_results,
+            lead_writer=components.lead_writer,
+            integrated_section_writer=components.integrated_section_writer,
+            conclusion_writer=components.conclusion_writer,
+            page_index=page_index,
+            reference_router=load_reference_router(web_search_results) if web_search_results else None
+        )
+
+    async def related_topics(query):
+        try:
+            return await collect_stream(components.related_topics_writer(query=query))
+        except Exception as e:
+            logger.error(f"Error generating related topics: {e}")
+            return "関連文法事項の生成中にエラーが発生しました。"
+
+    async def references(query, report_body, web_search_results):
+        try:
+            return await collect_stream(components.references_writer(
+                query=query,
+                report_content=report_body,
+                search_results=format_search_results(web_search_results)
+            ))
+        except Exception as e:
+            logger.error(f"Error generating references: {e}")
+            return "参考文献の生成中にエラーが発生しました。"
+
+    async def inline_references(report_body, web_search_results):
+        # 本文に引用番号と対応した参考文献リストを生成
+        try:
+            inline_references_content = await collect_stream(StreamInlineReferencesWriter()(
+                report_content=report_body,
+                search_results=format_search_results(web_search_results)
+            ))
+
+            # デバッグ: 生成されたインライン参考文献の内容をログ出力
+            logger.info(f"Generated inline references content: {inline_references_content}")
+            logger.info(f"Inline references content length: {len(inline_references_content)}")
+            return inline_references_content
+        except Exception as e:
+            logger.error(f"Error generating inline references: {e}")
+            import traceback
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            # エラーが発生してもレポート生成は継続
+            return ""
+
+    def assemble(report_body, inline_references):
+        # 本文の最後に参考文献リストを追加
+        if inline_references.strip():
+            logger.info(f"Inline references added to report. Original length: {len(report_body)}")
+            return f"{report_body}\n\n{inline_references}"
+        logger.info("No inline references generated - content was empty")
+        return report_body
+
+    async def mindmap(report_body, outline_result, related_topics):
+        # Mind map generation with related topics
+        if not options.include_mindmap:
+            return ""
+        try:
+            # アウトライン構造からキーワードを抽出
+            outline_keywords = []
+            if hasattr(outline_result, 'outline') and outline_result.outline:
+                for section in outline_result.outline.section_outlines:
+                    for subsection in section.subsection_outlines:
+                        if hasattr(subsection, 'keywords') and subsection.keywords:
+                            outline_keywords.extend(subsection.keywords)
+
+            # 重複を除去
+            unique_keywords = list(dict.fromkeys(outline_keywords))
+
+            # デバッグ情報をログ出力
+            logger.info(f"Generating mindmap with {len(unique_keywords)} keywords")
+            logger.info(f"Report length: {len(report_body)} characters")
+            logger.info(f"Related topics length: {len(related_topics)} characters")
+
+            mindmap_result = await asyncio.to_thread(
+                components.mindmap_maker,
+                report=report_body,
+                outline_structure=outline_result.outline,
+                keywords=unique_keywords,
+                related_topics=related_topics
+            )
+            mindmap_content = mindmap_result.mindmap
+            logger.info(f"Mindmap generated successfully with {len(unique_keywords)} keywords")
+            logger.info(f"Generated mindmap content length: {len(mindmap_content)} characters")
+
+            # マインドマップ内容の検証
+            if not mindmap_content or mindmap_content.strip() == "":
+                logger.warning("Generated mindmap content is empty")
+                mindmap_content = "# マインドマップ\n## 内容\n### マインドマップの生成に失敗しました"
+            elif "#" not in mindmap_content:
+                logger.warning("Generated mindmap content does not contain headers")
+                mindmap_content = "# マインドマップ\n## 内容\n### マインドマップの形式が正しくありません"
+            return mindmap_content
+
+        except Exception as e:
+            logger.error(f"Error generating mind map: {e}")
+            import traceback
+            logger.error(f"Mindmap error traceback: {traceback.format_exc()}")
+            return "# マインドマップ\n## エラー\n### マインドマップの生成中にエラーが発生しました"
+
+    if options.streaming_outline:
+        outline_and_report_stages = [
+            Stage("outline", outline_stream, inputs=["refined_query", "expanded_result", "web_search_results"],
+                  outputs=["outline_stream"], description="Starting outline stream"),
+            Stage("report", streamed_report,
+                  inputs=["refined_query", "outline_stream", "web_search_results", "page_index"],
+                  outputs=["report_body", "outline_result"], description="Generating outline and report"),
+        ]
+    else:
+        outline_and_report_stages = [
+            Stage("outline", outline, inputs=["refined_query", "expanded_result", "web_search_results"],
+                  outputs=["outline_result"], description="Creating report outline"),
+            Stage("report", report, inputs=["refined_query", "outline_result", "web_search_results", "page_index"],
+                  outputs=["report_body"], description="Generating report"),
+        ]
+
+    return Pipeline([
+        Stage("refine", refine, inputs=["query"], outputs=["refinement_result", "refined_query"],
+              description="Refining query with grammar analysis"),
+        Stage("expand", expand, inputs=["refined_query"], outputs=["expanded_result"],
+              description="Expanding search topics"),
+        Stage("web_search", web_search, inputs=["refined_query", "expanded_result"], outputs=["web_search_results"],
+              description="Searching for resources"),
+        Stage("page_index", page_index, inputs=["web_search_results"],
+              description="Reading full pages of the top search results"),
+        Stage("grammar", grammar, inputs=["refined_query"], outputs=["grammar_analysis"],
+              description="Analyzing grammar structures"),
+        *outline_and_report_stages,
+        Stage("related_topics", related_topics, inputs=["query"], description="Generating related topics"),
+        Stage("references", references, inputs=["query", "report_body", "web_search_results"],
+              description="Generating references"),
+        Stage("inline_references", inline_references, inputs=["report_body", "web_search_results"],
+              description="Generating inline references"),
+        Stage("assemble", assemble, inputs=["report_body", "inline_references"], outputs=["report"],
+              description="Assembling report"),
+        Stage("mindmap", mindmap, inputs=["report_body", "outline_result", "related_topics"],
+              description="Creating mind map"),
+    ])
+
+
+async def run_research(
+    query: str,
+    components: ResearchComponents,
+    options: Optional[ResearchOptions] = None,
+    notifier=None,
+    on_event: Optional[Callable[[StageEvent], None]] = None
+) -> Dict[str, Any]:
+    """
+    Run the research pipeline for a query.
+
+    Args:
+        query: User query
+        components: Initialized AI modules
+        options: Research options
+        notifier: Receiver of user-facing messages (defaults to LogNotifier)
+        on_event: Optional stage progress callback
+
+    Returns:
+        Report data (the structure stored as ``current_report`` by the research page)
+
+    Raises:
+        PipelineError: If a stage fails
+    """
+    options = options or ResearchOptions()
+    pipeline = build_research_pipeline(components, options, notifier)
+    # ステージ内のLLM呼び出しをこの実行のIDで集計し、文法解析は同じテキストにつき1回にする
+    with run_context() as run_id, analysis_context():
+        values = await pipeline.run({"query": query}, on_event=on_event)
+    return {
+        "query": query,
+        "refined_query": values["refined_query"],
+        "grammar_analysis": values["grammar_analysis"],
+        "report": values["report"],
+        "mindmap": values["mindmap"],
+        "related_topics": values["related_topics"],
+        "references": values["references"],
+        "search_results": values["web_search_results"],
+        "processing_time": datetime.now().timestamp(),
+        "search_depth": options.search_depth,
+        "report_style": options.report_style,
+        "use_llm_analysis": options.use_llm_analysis,
+        "stage_timings": dict(pipeline.timings),
+        "run_id": run_id,
+        "llm_metrics": get_llm_metrics().summary(run_id),
+    }
@@ -5,8 +5,8 @@ OpenAI embedding encoder for English learning content.
 import os
 from typing import List, Dict, Any
 import numpy as np
-from openai import OpenAI
 
+from src.utils.http_client import get_openai_client
 from utils.logging import logger
 
 
@@ -20,7 +20,7 @@ class OpenAIEncoder:
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = get_openai_client(api_key=self.api_key)
         
     def encode_texts(self, texts: List[str]) -> List[List[float]]:
         """Encode a list of texts to embeddings."""
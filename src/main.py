@@ -161,6 +161,30 @@ def search(
         raise typer.Exit(1)
 
 
+@app.command()
+def build_grammar_index(
+    grammar_file: str = typer.Option("data/GrammarDictionary/english_grammar_data.json", help="GrammarDictionary data file"),
+    encoder_model: str = typer.Option("text-embedding-3-small", help="OpenAI embedding model")
+):
+    """Embed GrammarDictionary entries and save the vectors next to the data file."""
+    try:
+        import json
+        from ai.grammar_vector_index import GrammarVectorIndex, vectors_path_for
+
+        with open(grammar_file, 'r', encoding='utf-8') as f:
+            items = json.load(f)
+
+        vectors_path = vectors_path_for(grammar_file)
+        index = GrammarVectorIndex(items, OpenAIEncoder(model=encoder_model), vectors_path, model=encoder_model)
+
+        logger.info(f"Embedded {index.embedded_count} of {len(index)} grammar entries")
+        logger.info(f"Vectors saved to {vectors_path}")
+
+    except Exception as e:
+        logger.error(f"Error building grammar index: {e}")
+        raise typer.Exit(1)
+
+
 @app.command()
 def process_pipeline(
     input_file: str = typer.Argument(..., help="Input file to process"),
@@ -224,5 +248,67 @@ def process_pipeline(
         raise typer.Exit(1)
 
 
+@app.command()
+def research_batch(
+    queries_file: str = typer.Argument(..., help="Queries file: one query per line, or .jsonl with a 'query' and research options per line"),
+    output_file: Optional[str] = typer.Option("data/batch_reports.jsonl", help="JSONL file reports are appended to (empty to disable)"),
+    report_dir: Optional[str] = typer.Option(None, help="Also save reports to this report store directory"),
+    concurrency: int = typer.Option(4, help="Research pipelines run at once"),
+    max_llm_calls: int = typer.Option(8, help="Concurrent LLM calls across all pipelines (0 = unlimited)"),
+    tokens_per_minute: int = typer.Option(0, help="LLM tokens per minute across all pipelines (0 = unlimited)"),
+    web_searches_per_minute: float = typer.Option(0, help="Web search requests per minute per engine (0 = ENGLISHY_WEB_SEARCH_RATE)"),
+    include_web_search: bool = typer.Option(True, help="Search the web for additional resources"),
+    include_mindmap: bool = typer.Option(True, help="Create a mind map of each report"),
+    search_depth: str = typer.Option("Comprehensive", help="Basic, Comprehensive or Deep"),
+    report_style: str = typer.Option("Beginner-friendly", help="Beginner-friendly, Intermediate or Advanced"),
+    use_llm_analysis: bool = typer.Option(True, help="Use LLM-based grammar analysis"),
+    resume: bool = typer.Option(True, help="Skip jobs already stored by a previous (interrupted) run")
+):
+    """Generate reports for many queries without the web UI."""
+    try:
+        import asyncio
+        import json
+        import sys
+        import os
+
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+        from src.app.batch_research import configure_batch_limits, load_batch_jobs, run_batch
+        from src.app.research_pipeline import ResearchComponents, ResearchOptions
+        from src.utils.lm import load_lm
+        from src.utils.report_manager import ReportManager
+
+        if not output_file and not report_dir:
+            raise ValueError("Specify --output-file and/or --report-dir")
+
+        defaults = ResearchOptions(
+            include_web_search=include_web_search,
+            include_mindmap=include_mindmap,
+            search_depth=search_depth,
+            report_style=report_style,
+            use_llm_analysis=use_llm_analysis
+        )
+        jobs = load_batch_jobs(queries_file, defaults)
+        configure_batch_limits(max_llm_calls, tokens_per_minute, web_searches_per_minute)
+
+        components = ResearchComponents(load_lm())
+        summary = asyncio.run(run_batch(
+            jobs,
+            components,
+            output_path=output_file or None,
+            report_manager=ReportManager(report_dir) if report_dir else None,
+            concurrency=concurrency,
+            resume=resume
+        ))
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        if summary["failed"]:
+            raise typer.Exit(1)
+    
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Error in research batch: {e}")
+        raise typer.Exit(1)
+
+
 if __name__ == "__main__":
     app() 
\ No newline at end of file
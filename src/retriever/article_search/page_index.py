@@ -0,0 +1,166 @@
+"""
+Per-query ephemeral vector index over fetched web pages.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from chunker.chunker import EnglishLearningChunker
+from retriever.article_search.reference_router import format_references
+from retriever.article_search.faiss import FAISSSearch
+from retriever.web_search.page_fetcher import PageFetcher, extract_many
+from src.utils.logging import logger
+
+DEFAULT_TOP_N = 6
+DEFAULT_LATENCY_BUDGET = 8.0
+DEFAULT_MAX_CHUNKS_PER_PAGE = 20
+# Share of the latency budget spent on fetching; the rest is kept for extraction and embedding
+FETCH_BUDGET_SHARE = 0.6
+
+
+class WebPageIndex:
+    """In-memory FAISS index over the full text of top web search results.
+
+    The index lives only for one research run. Section writers query it to get
+    the passages most relevant to their section instead of the short search
+    snippets.
+    """
+
+    def __init__(
+        self,
+        encoder,
+        fetcher: Optional[PageFetcher] = None,
+        chunker: Optional[EnglishLearningChunker] = None,
+        top_n: int = DEFAULT_TOP_N,
+        latency_budget: float = DEFAULT_LATENCY_BUDGET,
+        max_chunks_per_page: int = DEFAULT_MAX_CHUNKS_PER_PAGE
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            encoder: Text encoder with ``encode_texts`` / ``encode_single_text`` (e.g. OpenAIEncoder)
+            fetcher: Page fetcher (a pooled default is created if omitted)
+            chunker: Chunker for extracted pages
+            top_n: Number of top search results whose pages are fetched
+            latency_budget: Time limit in seconds for fetching, extraction and embedding
+            max_chunks_per_page: Maximum number of chunks indexed per page
+        """
+        self.encoder = encoder
+        self.fetcher = fetcher or PageFetcher()
+        self.chunker = chunker or EnglishLearningChunker()
+        self.top_n = top_n
+        self.latency_budget = latency_budget
+        self.max_chunks_per_page = max_chunks_per_page
+        self.faiss_search = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the index has been built with at least one passage."""
+        return self.faiss_search is not None
+
+    async def build(self, search_results: List[Dict[str, Any]]) -> int:
+        """
+        Fetch, extract, chunk and embed the top search result pages.
+
+        The stage stops at the latency budget and keeps whatever is ready;
+        if nothing is ready the index stays empty and callers fall back to snippets.
+
+        Args:
+            search_results: Web search results with ``title``, ``url`` and ``snippet``
+
+        Returns:
+            Number of indexed passages
+        """
+        deadline = time.monotonic() + self.latency_budget
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.monotonic())
+
+        results_by_url = {}
+        for result in search_results:
+            url = result.get('url')
+            if url and url not in results_by_url:
+                results_by_url[url] = result
+            if len(results_by_url) >= self.top_n:
+                break
+
+        pages = await self.fetcher.fetch_many(
+            list(results_by_url), timeout=self.latency_budget * FETCH_BUDGET_SHARE
+        )
+        texts = await extract_many(pages, timeout=remaining())
+        logger.info(f"Fetched {len(pages)} pages, extracted text from {len(texts)}")
+
+        chunk_dicts = []
+        for i, (url, text) in enumerate(texts.items()):
+            item = {'id': f"page_{i+1}", 'type': 'english_text', 'content': {'text': text}}
+            for chunk in self.chunker.chunk_parsed_data([item])[:self.max_chunks_per_page]:
+                chunk_dicts.append({
+                    'id': chunk.id,
+                    'type': 'web_passage',
+                    'content': chunk.content,
+                    'text': chunk.text,
+                    'metadata': {'url': url, 'title': results_by_url[url].get('title', '')}
+                })
+        if not chunk_dicts:
+            return 0
+
+        try:
+            embeddings = await asyncio.wait_for(
+                asyncio.to_thread(self.encoder.encode_texts, [chunk['text'] for chunk in chunk_dicts]),
+                timeout=remaining()
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Page index latency budget exhausted before embedding finished")
+            return 0
+
+        faiss_search = FAISSSearch(dimension=len(embeddings[0]))
+        faiss_search.build_index(chunk_dicts, embeddings)
+        self.faiss_search = faiss_search
+        return len(chunk_dicts)
+
+    def passages_for(self, text: str, k: int = 8) -> Dict[str, List[str]]:
+        """
+        Get the passages most relevant to a text, grouped by page URL.
+
+        Args:
+            text: Query text (e.g. a section outline)
+            k: Number of passages to retrieve
+
+        Returns:
+            Mapping of URL to passages in relevance order
+        """
+        if not self.is_ready:
+            return {}
+        passages = {}
+        for result in self.faiss_search.search_by_text(text, self.encoder, k=k).get_top_results():
+            passages.setdefault(result.metadata.get('url'), []).append(result.text)
+        return passages
+
+    def format_references(
+        self,
+        references: List[Dict[str, Any]],
+        text: str,
+        k: int = 8,
+        ids: Optional[List[int]] = None
+    ) -> str:
+        """
+        Format references for a prompt, replacing snippets with relevant passages.
+
+        The order of ``references`` is kept so citation numbers stay valid.
+        References without a relevant passage keep their search snippet.
+
+        Args:
+            references: Web search results
+            text: Query text used to select passages
+            k: Number of passages to retrieve
+            ids: Optional 1-based reference numbers to include; the selected
+                references are labelled with their numbers
+
+        Returns:
+            References text in the ``Title/URL/Content`` format used by the writers
+        """
+        passages = self.passages_for(text, k=k)
+        contents = {url: " ".join(url_passages) for url, url_passages in passages.items()}
+        return format_references(references, ids=ids, contents=contents)
@@ -0,0 +1,144 @@
+"""
+Per-section routing of web references for section writing.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from retriever.web_search.ranking import default_token_counter
+from src.utils.logging import logger
+
+DEFAULT_PADDING = 2
+
+
+def format_references(
+    references: List[Dict[str, Any]],
+    ids: Optional[List[int]] = None,
+    contents: Optional[Dict[str, str]] = None
+) -> str:
+    """
+    Format references in the ``Title/URL/Content`` format used by the writers.
+
+    Args:
+        references: Web search results, in citation order
+        ids: Optional 1-based reference numbers to include. The selected
+            references are prefixed with ``[n]`` so citation numbers stay
+            valid even though the list is partial.
+        contents: Optional replacement contents by URL (e.g. full-page passages)
+
+    Returns:
+        References text
+    """
+    contents = contents or {}
+
+    def _format(ref: Dict[str, Any]) -> str:
+        content = contents.get(ref.get('url')) or ref.get('snippet', '')
+        return f"Title: {ref.get('title', '')}\nURL: {ref.get('url', '')}\nContent: {content}"
+
+    if ids is None:
+        return "\n".join(_format(ref) for ref in references)
+    return "\n".join(f"[{i}] {_format(references[i - 1])}" for i in ids)
+
+
+class ReferenceRouter:
+    """Selects the references each report section actually needs.
+
+    A section gets the references cited by its subsections' ``reference_ids``,
+    padded with the ``padding`` references most similar to the section title
+    when an encoder is available. Sections citing nothing valid fall back to
+    all references.
+    """
+
+    def __init__(
+        self,
+        references: List[Dict[str, Any]],
+        encoder=None,
+        padding: int = DEFAULT_PADDING,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            references: Web search results, in citation order
+            encoder: Optional text encoder with ``encode_texts`` / ``encode_single_text`` for padding
+            padding: Number of additional references chosen by similarity
+            count_tokens: Token counting function used for logging
+        """
+        self.references = references
+        self.encoder = encoder
+        self.padding = padding if encoder is not None else 0
+        self.count_tokens = count_tokens or default_token_counter()
+        self._embeddings = None
+        self._lock = threading.Lock()
+        self._full_tokens = None
+
+    def _reference_embeddings(self) -> np.ndarray:
+        with self._lock:
+            if self._embeddings is None:
+                texts = [f"{ref.get('title', '')}\n{ref.get('snippet', '')}" for ref in self.references]
+                embeddings = np.array(self.encoder.encode_texts(texts), dtype=np.float32)
+                embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+                self._embeddings = embeddings
+            return self._embeddings
+
+    def reference_ids_for(self, section_outline) -> List[int]:
+        """
+        Get the 1-based reference numbers for a section, in ascending order.
+
+        Args:
+            section_outline: SectionOutline
+
+        Returns:
+            Reference numbers (all references if the section cites nothing valid and there is no padding)
+        """
+        count = len(self.references)
+        cited = {
+            ref_id
+            for subsection in section_outline.subsection_outlines
+            for ref_id in (getattr(subsection, 'reference_ids', None) or [])
+            if isinstance(ref_id, int) and 1 <= ref_id <= count
+        }
+
+        if self.padding and count > len(cited):
+            try:
+                query = np.array(self.encoder.encode_single_text(section_outline.title), dtype=np.float32)
+                query /= np.linalg.norm(query) + 1e-12
+                scores = self._reference_embeddings() @ query
+                extra = [i + 1 for i in np.argsort(-scores) if i + 1 not in cited][:self.padding]
+                cited.update(int(i) for i in extra)
+            except Exception as e:
+                logger.warning(f"Reference padding by similarity failed: {e}")
+
+        if not cited:
+            return list(range(1, count + 1))
+        return sorted(cited)
+
+    def format_for(self, section_outline, page_index=None) -> str:
+        """
+        Build the ``references`` input of a section writer.
+
+        Args:
+            section_outline: SectionOutline
+            page_index: Optional WebPageIndex providing full-page passages
+
+        Returns:
+            References text with explicit citation numbers
+        """
+        ids = self.reference_ids_for(section_outline)
+        if page_index:
+            text = page_index.format_references(self.references, section_outline.to_text(), ids=ids)
+        else:
+            text = format_references(self.references, ids=ids)
+
+        if self._full_tokens is None:
+            self._full_tokens = self.count_tokens(format_references(self.references))
+        routed_tokens = self.count_tokens(text)
+        reduction = 1 - routed_tokens / self._full_tokens if self._full_tokens else 0.0
+        logger.info(
+            f"Section '{section_outline.title}': {len(ids)}/{len(self.references)} references, "
+            f"references input {self._full_tokens} -> {routed_tokens} tokens ({reduction:.0%} smaller than all snippets)"
+        )
+        return text
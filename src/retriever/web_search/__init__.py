@@ -2,6 +2,14 @@
 Web search module for English learning content.
 """
 
+from .base import BaseWebRetriever
 from .duckduckgo_search import DuckDuckGoSearchWebRetriever
+from .hedged import HedgedWebRetriever
+from .local_search import LocalFileSearchWebRetriever
 
-__all__ = ["DuckDuckGoSearchWebRetriever"] 
\ No newline at end of file
+__all__ = [
+    "BaseWebRetriever",
+    "DuckDuckGoSearchWebRetriever",
+    "HedgedWebRetriever",
+    "LocalFileSearchWebRetriever",
+]
@@ -0,0 +1,227 @@
+"""
+Common interface for web search retrievers.
+"""
+
+import asyncio
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .cache import SearchResultCache
+from .throttle import CircuitOpenError, EngineGuard
+
+logger = logging.getLogger(__name__)
+
+# Default limits for concurrent fan-out (search_many)
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_QUERY_TIMEOUT = 15.0
+
+
+class _RequestTimer:
+    """Tracks the engine requests of one ``search_many`` query from its worker thread.
+
+    ``search_many`` times only the requests themselves, so waiting for the rate
+    limiter or sleeping between retries does not count toward the query timeout.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.active = 0
+        self.changed = asyncio.Event()
+
+    def _update(self, delta: int) -> None:
+        self.active += delta
+        self.changed.set()
+
+    def _notify(self, delta: int) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._update, delta)
+        except RuntimeError:
+            pass  # the loop has already closed after the query timed out
+
+    @contextmanager
+    def request(self):
+        """Mark a request as in flight (called from the worker thread)."""
+        self._notify(1)
+        try:
+            yield
+        finally:
+            self._notify(-1)
+
+
+# Timer of the current search_many query; copied into worker threads by asyncio.to_thread
+_request_timer: contextvars.ContextVar[Optional[_RequestTimer]] = contextvars.ContextVar("request_timer", default=None)
+
+
+@contextmanager
+def _timed_request():
+    timer = _request_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.request():
+            yield
+
+
+class BaseWebRetriever:
+    """Base class for web search engines.
+
+    Subclasses implement ``_search`` (blocking, may raise). The base class
+    provides caching, error handling, an async wrapper and concurrent fan-out,
+    so every engine can be used interchangeably by the research pipeline.
+    """
+
+    def __init__(
+        self,
+        search_engine: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+        cache: Optional[SearchResultCache] = None,
+        guard: Optional[EngineGuard] = None
+    ):
+        """
+        Initialize the retriever.
+
+        Args:
+            search_engine: Engine name (also part of the cache key)
+            max_concurrency: Default maximum number of concurrent queries in ``search_many``
+            query_timeout: Default per-query timeout in seconds in ``search_many``
+            cache: Optional persistent search result cache
+            guard: Optional shared rate limiter / retry policy / circuit breaker for the engine
+        """
+        self.search_engine = search_engine
+        self.max_concurrency = max_concurrency
+        self.query_timeout = query_timeout
+        self.cache = cache
+        self.guard = guard
+
+    def _search(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """Run the actual search. Must be implemented by subclasses."""
+        raise NotImplementedError
+
+    def _guarded_search(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        def request() -> List[Dict[str, Any]]:
+            with _timed_request():
+                return self._search(query, k, domains)
+
+        if self.guard:
+            return self.guard.call(request)
+        return request()
+
+    def _stale_results(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """Cached results for a query, even expired ones, or an empty list."""
+        if not self.cache:
+            return []
+        return self.cache.peek(self.cache.make_key(query, k, domains, self.search_engine)) or []
+
+    def search(self, query: str, k: int = 10, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search for English learning resources.
+
+        When the search fails, or fails fast because the engine's circuit is
+        open, cached results (even expired ones) or an empty list are returned.
+
+        Args:
+            query: Search query
+            k: Maximum number of results to return
+            domains: Optional list of domains to search
+
+        Returns:
+            List of search results
+        """
+        key = self.cache.make_key(query, k, domains, self.search_engine) if self.cache else None
+        try:
+            if self.cache:
+                return self.cache.fetch(key, lambda: self._guarded_search(query, k, domains))
+            return self._guarded_search(query, k, domains)
+        except Exception as e:
+            if isinstance(e, CircuitOpenError):
+                logger.warning(f"{e}; skipping search for '{query}'")
+            else:
+                logger.error(f"Error in {self.search_engine} search: {e}")
+            return self._stale_results(query, k, domains)
+
+    async def asearch(self, query: str, k: int = 10, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search asynchronously without blocking the event loop.
+
+        The blocking search client runs in a worker thread.
+
+        Args:
+            query: Search query
+            k: Maximum number of results to return
+            domains: Optional list of domains to search
+
+        Returns:
+            List of search results
+        """
+        return await asyncio.to_thread(self.search, query, k, domains)
+
+    async def search_many(
+        self,
+        queries: List[str],
+        k: int = 10,
+        domains: List[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches concurrently.
+
+        At most ``max_concurrency`` queries are in flight at once, counting a
+        timed-out query until its worker thread has actually finished. Each
+        engine request is given ``timeout`` seconds; waiting for the engine's
+        rate limiter and retry backoff are not counted. A query that times out
+        yields its cached results (even expired ones) or an empty list, and a
+        failed query an empty list, so the results of the other queries are
+        still returned.
+
+        Args:
+            queries: Search queries
+            k: Maximum number of results per query
+            domains: Optional list of domains to search
+            max_concurrency: Maximum number of concurrent queries (defaults to the instance setting)
+            timeout: Per-query timeout in seconds (defaults to the instance setting)
+
+        Returns:
+            List of result lists, in the same order as ``queries``
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        timeout = timeout if timeout is not None else self.query_timeout
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        def _release(task: asyncio.Future) -> None:
+            # The slot is freed when the worker finishes, not when the query times out
+            semaphore.release()
+            if not task.cancelled():
+                task.exception()  # retrieved here when the query already timed out
+
+        async def _run(query: str) -> List[Dict[str, Any]]:
+            await semaphore.acquire()
+            timer = _RequestTimer(asyncio.get_running_loop())
+            token = _request_timer.set(timer)
+            try:
+                task = asyncio.ensure_future(self.asearch(query, k, domains))
+            finally:
+                _request_timer.reset(token)
+            task.add_done_callback(_release)
+            try:
+                while not task.done():
+                    timer.changed.clear()
+                    changed = asyncio.ensure_future(timer.changed.wait())
+                    done, _ = await asyncio.wait(
+                        {task, changed},
+                        timeout=timeout if timer.active else None,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    changed.cancel()
+                    if not done:
+                        logger.warning(f"Search timed out after {timeout}s: '{query}'")
+                        return self._stale_results(query, k, domains)
+                return task.result()
+            except Exception as e:
+                logger.warning(f"Search failed for query '{query}': {e}")
+                return []
+
+        return list(await asyncio.gather(*[_run(query) for query in queries]))
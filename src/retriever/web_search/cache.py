@@ -0,0 +1,149 @@
+"""
+Persistent TTL cache for web search results.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 24 * 60 * 60  # 1 day
+DEFAULT_STALE_TTL = 7 * 24 * 60 * 60  # serve stale results for up to 1 more week while refreshing
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry."""
+    query = unicodedata.normalize("NFKC", query or "")
+    return " ".join(query.lower().split())
+
+
+class SearchResultCache:
+    """Disk-backed web search cache with TTL and stale-while-revalidate.
+
+    Entries younger than ``ttl`` are served as fresh. Entries older than ``ttl``
+    but younger than ``ttl + stale_ttl`` are served immediately while a
+    background refresh replaces them. Older entries are treated as misses.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./cache",
+        ttl: float = DEFAULT_TTL,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the cache database
+            ttl: Seconds a cached result is considered fresh
+            stale_ttl: Additional seconds a stale result may be served while it is refreshed
+            max_entries: Maximum number of cached queries (least recently used are evicted)
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.store = DiskCache(os.path.join(cache_dir, "web_search.sqlite3"), max_entries=max_entries)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def make_key(query: str, k: int, domains: Optional[List[str]], engine: str) -> str:
+        """Build a cache key from normalized (query, k, domains, engine)."""
+        payload = json.dumps(
+            {
+                "query": normalize_query(query),
+                "k": k,
+                "domains": sorted({domain.lower().strip() for domain in domains or []}),
+                "engine": engine.lower(),
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, loader: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Return cached results for ``key``, calling ``loader`` on a miss.
+
+        Empty results are never cached so that transient search failures are retried.
+
+        Args:
+            key: Cache key from ``make_key``
+            loader: Function performing the actual search
+
+        Returns:
+            List of search results
+        """
+        cached = self.store.get(key)
+        if cached is not None:
+            results, created_at = cached
+            age = time.time() - created_at
+            if age < self.ttl:
+                self._count("fresh_hits")
+                return results
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, loader)
+                return results
+
+        self._count("misses")
+        results = loader()
+        if results:
+            self.store.set(key, results)
+        return results
+
+    def peek(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results regardless of their age, or None."""
+        cached = self.store.get(key)
+        return cached[0] if cached is not None else None
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], List[Dict[str, Any]]]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                results = loader()
+                if results:
+                    self.store.set(key, results)
+                    self._count("refreshes")
+                else:
+                    self._count("refresh_failures")
+            except Exception as e:
+                self._count("refresh_failures")
+                logger.warning(f"Background refresh of cached search failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_refresh, name="web-search-cache-refresh", daemon=True).start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics for the cache."""
+        with self._lock:
+            counters = dict(self._stats)
+        lookups = counters["fresh_hits"] + counters["stale_hits"] + counters["misses"]
+        hits = counters["fresh_hits"] + counters["stale_hits"]
+        return {
+            **counters,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "size": len(self.store),
+            "evictions": self.store.stats()["evictions"],
+        }
@@ -7,41 +7,36 @@ from typing import List, Dict, Any, Optional
 import logging
 from duckduckgo_search import DDGS
 
+from .base import BaseWebRetriever, DEFAULT_MAX_CONCURRENCY, DEFAULT_QUERY_TIMEOUT
+from .cache import SearchResultCache
+from .throttle import EngineGuard
+
 logger = logging.getLogger(__name__)
 
-class DuckDuckGoSearchWebRetriever:
+class DuckDuckGoSearchWebRetriever(BaseWebRetriever):
     """DuckDuckGo search engine for English learning resources."""
     
-    def __init__(self, search_engine: str = "duckduckgo"):
+    def __init__(
+        self,
+        search_engine: str = "duckduckgo",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+        cache: Optional[SearchResultCache] = None,
+        guard: Optional[EngineGuard] = None
+    ):
         """Initialize the search engine."""
-        self.search_engine = search_engine
+        super().__init__(search_engine, max_concurrency=max_concurrency, query_timeout=query_timeout, cache=cache, guard=guard)
         self.ddgs = DDGS() if search_engine == "duckduckgo" else None
     
-    def search(self, query: str, k: int = 10, domains: List[str] = None) -> List[Dict[str, Any]]:
-        """
-        Search for English learning resources.
-        
-        Args:
-            query: Search query
-            k: Maximum number of results to return
-            domains: Optional list of domains to search
-        
-        Returns:
-            List of search results
-        """
-        try:
-            if self.search_engine == "duckduckgo":
-                return self._search_duckduckgo(query, k, domains)
-            else:
-                logger.warning(f"Unsupported search engine: {self.search_engine}")
-                return []
-                
-        except Exception as e:
-            logger.error(f"Error in search: {e}")
-            return []
+    def _search(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """Dispatch to the configured search engine."""
+        if self.search_engine == "duckduckgo":
+            return self._search_duckduckgo(query, k, domains)
+        logger.warning(f"Unsupported search engine: {self.search_engine}")
+        return []
     
     def _search_duckduckgo(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
-        """Search using DuckDuckGo."""
+        """Search using DuckDuckGo (raises on errors such as rate limiting)."""
         try:
             # Add English learning context to the query
             enhanced_query = f"English learning {query} grammar vocabulary pronunciation"
@@ -84,10 +79,9 @@ class DuckDuckGoSearchWebRetriever:
             return results[:k]
             
         except Exception as e:
-            logger.error(f"Error in DuckDuckGo search: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            return []
+            # Re-raise so rate limits and transient errors can be retried by the engine guard
+            logger.warning(f"Error in DuckDuckGo search: {e}")
+            raise
     
     def search_grammar_rules(self, topic: str) -> List[Dict[str, Any]]:
         """
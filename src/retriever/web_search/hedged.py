@@ -0,0 +1,96 @@
+"""
+Hedged web search across two engines.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from .base import BaseWebRetriever
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEDGE_DELAY = 3.0
+
+
+class HedgedWebRetriever(BaseWebRetriever):
+    """Sends a query to a secondary engine when the primary is slow.
+
+    The primary engine is queried first. If it has not answered within
+    ``hedge_delay`` seconds (or answers with nothing), the same query is sent
+    to the secondary engine and the first non-empty answer wins. The losing
+    request is cancelled where possible; a blocking client may still finish
+    in its worker thread, which at worst warms its cache.
+    """
+
+    def __init__(
+        self,
+        primary: BaseWebRetriever,
+        secondary: BaseWebRetriever,
+        hedge_delay: float = DEFAULT_HEDGE_DELAY
+    ):
+        """
+        Initialize the hedged retriever.
+
+        Args:
+            primary: Engine queried first
+            secondary: Engine queried when the primary is slow or returns nothing
+            hedge_delay: Seconds to wait for the primary before hedging
+        """
+        super().__init__(
+            f"{primary.search_engine}+{secondary.search_engine}",
+            max_concurrency=primary.max_concurrency,
+            query_timeout=primary.query_timeout
+        )
+        self.primary = primary
+        self.secondary = secondary
+        self.hedge_delay = hedge_delay
+        self._stats = {"queries": 0, "hedged": 0, "primary_wins": 0, "secondary_wins": 0}
+
+    def _search(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """Run a hedged search from synchronous code (not from a running event loop)."""
+        return asyncio.run(self.asearch(query, k, domains))
+
+    async def asearch(self, query: str, k: int = 10, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search with hedging.
+
+        Args:
+            query: Search query
+            k: Maximum number of results to return
+            domains: Optional list of domains to search
+
+        Returns:
+            Results of whichever engine first returned a non-empty answer
+        """
+        self._stats["queries"] += 1
+        primary = asyncio.ensure_future(self.primary.asearch(query, k, domains))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay)
+            if done and primary.result():
+                self._stats["primary_wins"] += 1
+                return primary.result()
+
+            self._stats["hedged"] += 1
+            reason = "returned nothing" if done else f"did not answer within {self.hedge_delay}s"
+            logger.info(f"Hedging '{query}' to {self.secondary.search_engine}: {self.primary.search_engine} {reason}")
+            secondary = asyncio.ensure_future(self.secondary.asearch(query, k, domains))
+            tasks.append(secondary)
+            winners = {primary: "primary_wins", secondary: "secondary_wins"}
+            pending = {secondary} if done else {primary, secondary}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.result():
+                        self._stats[winners[task]] += 1
+                        return task.result()
+            return []
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self):
+        """Get counters for hedged queries and which engine answered."""
+        return dict(self._stats)
@@ -0,0 +1,91 @@
+"""
+Local file-backed search engine for offline development and tests.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from .base import BaseWebRetriever, DEFAULT_MAX_CONCURRENCY, DEFAULT_QUERY_TIMEOUT
+from .cache import SearchResultCache
+from .throttle import EngineGuard
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+class LocalFileSearchWebRetriever(BaseWebRetriever):
+    """Searches documents stored in a local JSON or JSONL file.
+
+    Each document needs ``title``, ``url`` and ``snippet`` (``body`` or
+    ``content`` are accepted as aliases). Documents are ranked by how many
+    query terms they contain, title matches counting double.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        search_engine: str = "local",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        query_timeout: float = DEFAULT_QUERY_TIMEOUT,
+        cache: Optional[SearchResultCache] = None,
+        guard: Optional[EngineGuard] = None
+    ):
+        """
+        Initialize the search engine.
+
+        Args:
+            path: Path to a JSON list or JSONL file of documents
+            search_engine: Engine name
+            max_concurrency: Default maximum number of concurrent queries in ``search_many``
+            query_timeout: Default per-query timeout in seconds in ``search_many``
+            cache: Optional persistent search result cache
+            guard: Optional shared rate limiter / retry policy / circuit breaker
+        """
+        super().__init__(search_engine, max_concurrency=max_concurrency, query_timeout=query_timeout, cache=cache, guard=guard)
+        self.path = path
+        self.documents = self._load_documents(path)
+        self._index = [
+            (set(_tokenize(doc["title"])), set(_tokenize(f"{doc['title']} {doc['snippet']}")))
+            for doc in self.documents
+        ]
+
+    @staticmethod
+    def _load_documents(path: str) -> List[Dict[str, Any]]:
+        """Load and normalize documents from a JSON or JSONL file."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Local search file not found: {path}")
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                raw = [json.loads(line) for line in f if line.strip()]
+            else:
+                raw = json.load(f)
+        documents = []
+        for item in raw:
+            documents.append({
+                "title": item.get("title") or "No title",
+                "url": item.get("url") or item.get("href"),
+                "snippet": item.get("snippet") or item.get("body") or item.get("content") or "",
+            })
+        logger.info(f"Loaded {len(documents)} local search documents from {path}")
+        return documents
+
+    def _search(self, query: str, k: int, domains: List[str] = None) -> List[Dict[str, Any]]:
+        """Rank local documents by query term overlap."""
+        terms = set(_tokenize(query))
+        scored = []
+        for i, (doc, (title_terms, all_terms)) in enumerate(zip(self.documents, self._index)):
+            if domains and not any(domain in (doc["url"] or "") for domain in domains):
+                continue
+            score = len(terms & all_terms) + len(terms & title_terms)
+            if score:
+                scored.append((-score, i))
+        scored.sort()
+        return [{**self.documents[i], "source": self.search_engine} for _, i in scored[:k]]
@@ -0,0 +1,291 @@
+"""
+Full-page fetching and main-text extraction for web search results.
+"""
+
+import asyncio
+import atexit
+import codecs
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_FETCH_TIMEOUT = 5.0
+DEFAULT_MAX_BYTES = 1_000_000
+USER_AGENT = "Mozilla/5.0 (compatible; Englishy/0.1; +https://github.com/m37335/englishy)"
+
+# Elements whose text is never part of the main content
+_SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe", "button"}
+# Elements that end a block of text
+_BLOCK_TAGS = {
+    "p", "div", "li", "ul", "ol", "br", "tr", "td", "th", "table", "section", "article", "main",
+    "blockquote", "pre", "dd", "dt", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_MIN_LINE_LENGTH = 40
+# Only the head of the document is searched for a <meta> charset declaration
+_META_CHARSET_BYTES = 4096
+
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.I)
+
+
+def _known_encoding(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def detect_encoding(content_type: str, body: bytes) -> str:
+    """
+    Determine the character encoding of an HTML page.
+
+    Uses an explicit ``charset`` in the Content-Type header, then the
+    ``<meta charset>`` declaration, then UTF-8 if the bytes decode as UTF-8,
+    then detection on the bytes. requests' ISO-8859-1 default for ``text/*``
+    without a charset is deliberately not used.
+
+    Args:
+        content_type: Content-Type response header
+        body: Raw page bytes
+
+    Returns:
+        Codec name (utf-8 if nothing else applies)
+    """
+    header_match = _HEADER_CHARSET.search(content_type or "")
+    encoding = _known_encoding(header_match.group(1) if header_match else None)
+    if encoding:
+        return encoding
+
+    meta_match = _META_CHARSET.search(body[:_META_CHARSET_BYTES])
+    encoding = _known_encoding(meta_match.group(1).decode("ascii", errors="ignore") if meta_match else None)
+    if encoding:
+        return encoding
+
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the max_bytes limit is still UTF-8
+        if e.start >= len(body) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+    return _known_encoding(chardet.detect(body).get("encoding")) or "utf-8"
+
+
+class _MainTextParser(HTMLParser):
+    """Collects visible text blocks, skipping boilerplate elements."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._current = []
+        self._skip_depth = 0
+        self._in_heading = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+            self._in_heading = tag in _HEADING_TAGS
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._current.append(data)
+
+    def _flush(self):
+        text = re.sub(r"\s+", " ", "".join(self._current)).strip()
+        if text:
+            self.blocks.append((text, self._in_heading))
+        self._current = []
+        self._in_heading = False
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def extract_main_text(html: str) -> str:
+    """
+    Extract the main readable text from an HTML page.
+
+    Headings and paragraphs of reasonable length are kept; short fragments
+    such as menus, buttons and link lists are dropped.
+
+    Args:
+        html: HTML source
+
+    Returns:
+        Extracted text, one block per line
+    """
+    parser = _MainTextParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.warning(f"HTML parsing failed: {e}")
+    lines = [text for text, is_heading in parser.blocks if is_heading or len(text) >= _MIN_LINE_LENGTH]
+    return "\n".join(lines)
+
+
+class PageFetcher:
+    """Fetches web pages through a pooled HTTP session with timeouts and size caps."""
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        timeout: float = DEFAULT_FETCH_TIMEOUT,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_connections: Maximum concurrent connections (also the pool size per host)
+            timeout: Connect/read timeout per request in seconds
+            max_bytes: Maximum number of bytes read from a single page
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Fetch a single HTML page.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Decoded HTML (truncated to ``max_bytes``) or None if the page could not be fetched
+        """
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("Content-Type", "")
+                if content_type and "html" not in content_type:
+                    logger.info(f"Skipped non-HTML page ({content_type}): {url}")
+                    return None
+                body = b""
+                for chunk in response.iter_content(chunk_size=16384):
+                    body += chunk
+                    if len(body) >= self.max_bytes:
+                        body = body[:self.max_bytes]
+                        break
+                return body.decode(detect_encoding(content_type, body), errors="replace")
+        except Exception as e:
+            logger.info(f"Failed to fetch {url}: {e}")
+            return None
+
+    async def fetch_many(self, urls: List[str], timeout: Optional[float] = None) -> Dict[str, str]:
+        """
+        Fetch pages concurrently.
+
+        Args:
+            urls: Page URLs
+            timeout: Overall time limit in seconds; pages still pending are dropped
+
+        Returns:
+            Mapping of URL to HTML for the pages fetched in time
+        """
+        semaphore = asyncio.Semaphore(self.max_connections)
+
+        async def _fetch(url: str) -> Optional[str]:
+            async with semaphore:
+                return await asyncio.to_thread(self.fetch, url)
+
+        tasks = {asyncio.ensure_future(_fetch(url)): url for url in urls}
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks.keys(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.info(f"Page fetch budget exhausted: {len(pending)} of {len(tasks)} pages dropped")
+        return {tasks[task]: task.result() for task in done if task.result()}
+
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Get the shared process pool used for text extraction.
+
+    Workers are started by a forkserver rather than forked from this process,
+    which already runs fetch, cache-refresh and UI threads whose held locks a
+    fork would copy into the children.
+    """
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _extraction_pool
+
+
+@atexit.register
+def _shutdown_extraction_pool() -> None:
+    global _extraction_pool
+    with _extraction_pool_lock:
+        pool, _extraction_pool = _extraction_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def extract_many(pages: Dict[str, str], timeout: Optional[float] = None, executor=None) -> Dict[str, str]:
+    """
+    Extract main text from several pages in a process pool.
+
+    Args:
+        pages: Mapping of URL to HTML
+        timeout: Overall time limit in seconds; unfinished extractions are dropped
+        executor: Executor to use (defaults to the shared process pool)
+
+    Returns:
+        Mapping of URL to extracted text (pages without text are omitted)
+    """
+    if not pages:
+        return {}
+    loop = asyncio.get_running_loop()
+    executor = executor or get_extraction_pool()
+    futures = {loop.run_in_executor(executor, extract_main_text, html): url for url, html in pages.items()}
+    done, pending = await asyncio.wait(futures.keys(), timeout=timeout)
+    for future in pending:
+        future.cancel()
+    texts = {}
+    for future in done:
+        try:
+            text = future.result()
+        except Exception as e:
+            logger.warning(f"Text extraction failed for {futures[future]}: {e}")
+            continue
+        if text:
+            texts[futures[future]] = text
+    return texts
@@ -0,0 +1,207 @@
+"""
+Deduplication and fused ranking of web search results.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RRF_K = 60
+DEFAULT_MAX_HAMMING_DISTANCE = 6  # tuned for short search snippets
+DEFAULT_SNIPPET_TOKEN_BUDGET = 1500
+
+# Query parameters that only track the visitor and never change the page
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "source", "spm", "_ga", "_hsenc", "_hsmi",
+}
+_HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so mirrors and tracking variants of a page compare equal.
+
+    The scheme, ``www.``/mobile host prefixes, default ports, fragments,
+    tracking parameters, parameter order and trailing slashes are ignored.
+
+    Args:
+        url: URL to normalize
+
+    Returns:
+        Canonical form of the URL (the input unchanged if it cannot be parsed)
+    """
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    host = (parts.hostname or "").lower()
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/+", "/", parts.path or "/")
+    path = re.sub(r"/(index\.html?|amp)$", "/", path)
+    path = path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    return urlunsplit(("", host, path, urlencode(query), "")).lstrip("/")
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    Compute a SimHash fingerprint of a text from its words.
+
+    Single words are used as features because search snippets are too short
+    for word n-grams: one edited word would change several n-grams at once.
+
+    Near-identical texts get fingerprints with a small Hamming distance.
+
+    Args:
+        text: Text to fingerprint
+        bits: Fingerprint size in bits (at most 64)
+
+    Returns:
+        Fingerprint as an integer
+    """
+    weights = [0] * bits
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if h >> i & 1 else -1
+    return sum(1 << i for i, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], k: int = DEFAULT_RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists with reciprocal rank fusion.
+
+    Each result scores ``sum(1 / (k + rank))`` over the lists it appears in
+    (rank is 1-based), keyed by canonical URL. The first occurrence of a
+    result is kept as its representative.
+
+    Args:
+        result_lists: Ranked result lists, e.g. one per search query
+        k: RRF damping constant
+
+    Returns:
+        Unique results ordered by fused score, each with ``rrf_score`` set
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = canonicalize_url(result.get("url") or "") or f"{result.get('title')}|{result.get('snippet')}"
+            if key not in fused:
+                fused[key] = {**result, "rrf_score": 0.0}
+            fused[key]["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda result: result["rrf_score"], reverse=True)
+
+
+def collapse_near_duplicates(
+    results: List[Dict[str, Any]],
+    max_distance: int = DEFAULT_MAX_HAMMING_DISTANCE
+) -> List[Dict[str, Any]]:
+    """
+    Drop results whose title and snippet nearly duplicate a higher-ranked result.
+
+    Args:
+        results: Results in rank order
+        max_distance: Maximum SimHash Hamming distance treated as a duplicate
+
+    Returns:
+        Results without near duplicates, in the original order
+    """
+    kept, fingerprints = [], []
+    for result in results:
+        fingerprint = simhash(f"{result.get('title', '')} {result.get('snippet', '')}")
+        if any(hamming_distance(fingerprint, other) <= max_distance for other in fingerprints):
+            logger.info(f"Collapsed near-duplicate result: {result.get('title', 'No title')} - {result.get('url')}")
+            continue
+        kept.append(result)
+        fingerprints.append(fingerprint)
+    return kept
+
+
+def default_token_counter() -> Callable[[str], int]:
+    """Get a token counting function (tiktoken cl100k_base, or a chars/4 estimate)."""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text))
+    except Exception:
+        # Rough estimate for English text when tiktoken is unavailable
+        return lambda text: max(1, len(text) // 4)
+
+
+def select_under_budget(
+    results: List[Dict[str, Any]],
+    token_budget: int = DEFAULT_SNIPPET_TOKEN_BUDGET,
+    count_tokens: Optional[Callable[[str], int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Take results in rank order while their prompt text fits the token budget.
+
+    Results that do not fit are skipped so that shorter lower-ranked results
+    can still use the remaining budget. The top result is always kept.
+
+    Args:
+        results: Results in rank order
+        token_budget: Maximum tokens for the ``Title/URL/Content`` text of all results
+        count_tokens: Token counting function (tiktoken when available)
+
+    Returns:
+        Selected results in rank order
+    """
+    count_tokens = count_tokens or default_token_counter()
+    selected, used = [], 0
+    for result in results:
+        tokens = count_tokens(
+            f"Title: {result.get('title', '')}\nURL: {result.get('url', '')}\nContent: {result.get('snippet', '')}"
+        )
+        if selected and used + tokens > token_budget:
+            continue
+        selected.append(result)
+        used += tokens
+    logger.info(f"Selected {len(selected)} of {len(results)} results using {used}/{token_budget} snippet tokens")
+    return selected
+
+
+def rank_web_results(
+    result_lists: List[List[Dict[str, Any]]],
+    token_budget: int = DEFAULT_SNIPPET_TOKEN_BUDGET,
+    max_distance: int = DEFAULT_MAX_HAMMING_DISTANCE,
+    rrf_k: int = DEFAULT_RRF_K,
+    count_tokens: Optional[Callable[[str], int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fuse per-query results, collapse duplicates and select under a token budget.
+
+    Args:
+        result_lists: Ranked result lists, one per search query
+        token_budget: Maximum snippet tokens of the final selection
+        max_distance: Maximum SimHash Hamming distance treated as a duplicate
+        rrf_k: RRF damping constant
+        count_tokens: Token counting function (tiktoken when available)
+
+    Returns:
+        Final ranked results
+    """
+    fused = reciprocal_rank_fusion(result_lists, k=rrf_k)
+    unique = collapse_near_duplicates(fused, max_distance=max_distance)
+    return select_under_budget(unique, token_budget=token_budget, count_tokens=count_tokens)
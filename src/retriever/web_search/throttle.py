@@ -0,0 +1,260 @@
+"""
+Process-wide rate limiting, retries and circuit breaking for web search engines.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 1.0  # requests per second
+DEFAULT_BURST = 3
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 10.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the engine's circuit is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` calls per second with bursts of ``capacity``."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST):
+        """
+        Initialize the bucket (initially full).
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting (0.0 if a token was available immediately)
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures and probes the engine again after a cool-down.
+
+    ``closed``: calls pass. After ``failure_threshold`` consecutive failures the
+    circuit becomes ``open`` and calls are rejected for ``reset_timeout`` seconds.
+    It then turns ``half_open`` and lets a single trial call through; success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit opened after {self._failures} consecutive failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class EngineGuard:
+    """Rate limiter, retry policy and circuit breaker shared by all retrievers of one engine."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT
+    ):
+        """
+        Initialize the guard.
+
+        Args:
+            name: Engine name (for logging)
+            rate: Allowed requests per second
+            burst: Maximum burst of requests
+            max_retries: Retries after a failed request
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Maximum backoff delay in seconds
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "throttled": 0, "retried": 0, "short_circuited": 0, "failures": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def set_rate(self, rate: float, burst: int) -> None:
+        """Replace the rate limit of this guard (calls already waiting keep the old one)."""
+        self.bucket = TokenBucket(rate, burst)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry ``attempt`` (0-based): exponential with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Call ``func`` under rate limiting, retries and circuit breaking.
+
+        Args:
+            func: Blocking call that raises on failure
+
+        Returns:
+            Return value of ``func``
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: The last error once retries are exhausted
+        """
+        # The circuit is checked once per logical call; its retries belong to the same call
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        for attempt in range(self.max_retries + 1):
+            if self.bucket.acquire() > 0:
+                self._count("throttled")
+            self._count("calls")
+            try:
+                result = func()
+            except Exception as e:
+                self._count("failures")
+                if attempt >= self.max_retries:
+                    # One failure per logical call, once its retries are used up
+                    self.breaker.record_failure()
+                    raise
+                delay = self.backoff(attempt)
+                logger.info(f"{self.name} search failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                self._count("retried")
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get counters for throttled, retried and short-circuited calls and the circuit state."""
+        with self._lock:
+            return {**self._stats, "circuit": self.breaker.state}
+
+
+_guards: Dict[str, EngineGuard] = {}
+_guards_lock = threading.Lock()
+# Rate limit applied to every guard regardless of its own settings (see configure_engine_rate)
+_rate_override: Dict[str, Any] = {}
+
+
+def get_engine_guard(name: str, **kwargs) -> EngineGuard:
+    """
+    Get the process-wide guard for an engine, creating it on first use.
+
+    Args:
+        name: Engine name
+        **kwargs: EngineGuard settings, used only when the guard is created
+
+    Returns:
+        Shared EngineGuard instance
+    """
+    key = name.lower()
+    with _guards_lock:
+        if key not in _guards:
+            _guards[key] = EngineGuard(key, **{**kwargs, **_rate_override})
+        return _guards[key]
+
+
+def configure_engine_rate(rate: Optional[float] = None, burst: int = 1) -> None:
+    """
+    Set the rate limit of every engine guard, existing and future (e.g. from batch command options).
+
+    Args:
+        rate: Allowed requests per second per engine (None = remove the override;
+            guards already reconfigured keep their current rate)
+        burst: Maximum burst of requests
+    """
+    with _guards_lock:
+        _rate_override.clear()
+        if rate is None:
+            return
+        _rate_override.update(rate=rate, burst=burst)
+        guards = list(_guards.values())
+    for guard in guards:
+        guard.set_rate(rate, burst)
+
+
+def get_throttle_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the counters of every engine guard in this process."""
+    with _guards_lock:
+        guards = dict(_guards)
+    return {name: guard.stats() for name, guard in guards.items()}
@@ -0,0 +1,120 @@
+"""
+Disk-backed key/value cache utilities for Englishy.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils.logging import logger
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with LRU eviction and hit/miss metrics.
+
+    Values are stored as JSON together with their creation time, so callers can
+    apply their own freshness rules on top (TTL, stale-while-revalidate).
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Path to the SQLite database file
+            max_entries: Maximum number of entries kept; least recently used entries are evicted
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps the cache usable from worker threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (value, created_at) or None if the key is not cached
+        """
+        try:
+            with self._lock, closing(self._connect()) as conn, conn:
+                row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._stats["hits"] += 1
+                return json.loads(row[0]), row[1]
+        except Exception as e:
+            logger.warning(f"Disk cache read failed ({self.path}): {e}")
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries beyond ``max_entries``.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False)
+            with self._lock, closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now),
+                )
+                self._stats["writes"] += 1
+                overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    self._stats["evictions"] += overflow
+        except Exception as e:
+            logger.warning(f"Disk cache write failed ({self.path}): {e}")
+
+    def delete(self, key: str) -> None:
+        """Delete a cached value."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Delete all cached values."""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM entries")
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and the current size."""
+        return {**self._stats, "size": len(self), "max_entries": self.max_entries}
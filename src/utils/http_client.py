@@ -0,0 +1,271 @@
+"""
+Shared, pooled HTTP clients for LLM and embedding calls.
+"""
+
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+import openai
+
+from src.utils.logging import logger
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 16
+DEFAULT_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+_FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def connection_close_enabled() -> bool:
+    """Whether ENGLISHY_HTTP_CONNECTION_CLOSE asks for closing connections after each request."""
+    return os.getenv("ENGLISHY_HTTP_CONNECTION_CLOSE", "0").lower() not in _FALSE_VALUES
+
+
+def connection_close_headers() -> Dict[str, str]:
+    """Extra request headers for the opt-in connection-closing workaround (empty by default)."""
+    return {"Connection": "close"} if connection_close_enabled() else {}
+
+
+def http2_enabled() -> bool:
+    """Whether HTTP/2 is used: on when the ``h2`` package is installed, unless ENGLISHY_HTTP2=0."""
+    if os.getenv("ENGLISHY_HTTP2", "1").lower() in _FALSE_VALUES:
+        return False
+    return importlib.util.find_spec("h2") is not None
+
+
+def _limits() -> Tuple[httpx.Limits, int]:
+    keepalive = 0 if connection_close_enabled() else int(
+        os.getenv("ENGLISHY_HTTP_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE_CONNECTIONS)
+    )
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("ENGLISHY_HTTP_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive_connections=keepalive,
+    )
+    return limits, int(os.getenv("ENGLISHY_HTTP_MAX_PER_HOST", DEFAULT_MAX_CONNECTIONS_PER_HOST))
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(func):
+    lock = threading.Lock()
+    called = False
+
+    def wrapper():
+        nonlocal called
+        with lock:
+            if called:
+                return
+            called = True
+        func()
+    return wrapper
+
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """Transport that allows at most ``max_per_host`` in-flight requests per host.
+
+    A slot is held until the response body is closed, so long streams count
+    against their host for their whole duration.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self._max_per_host)
+            return self._semaphores[host]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        semaphore = self._semaphore(request.url.host)
+        semaphore.acquire()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if response.is_closed:
+            # Already fully read by the transport (e.g. in-memory responses)
+            semaphore.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, _once(semaphore.release))
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncHostLimitedTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of HostLimitedTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int):
+        self._transport = transport
+        self._max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._max_per_host)
+        semaphore = self._semaphores[host]
+        await semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if response.is_closed:
+            semaphore.release()
+        else:
+            response.stream = _AsyncReleasingStream(response.stream, _once(semaphore.release))
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client() -> httpx.Client:
+    """Create a pooled sync client (keep-alive, HTTP/2 when available, per-host limits)."""
+    limits, max_per_host = _limits()
+    transport = httpx.HTTPTransport(limits=limits, http2=http2_enabled())
+    return httpx.Client(transport=HostLimitedTransport(transport, max_per_host), timeout=DEFAULT_TIMEOUT, follow_redirects=True)
+
+
+def create_async_http_client() -> httpx.AsyncClient:
+    """Create a pooled async client (keep-alive, HTTP/2 when available, per-host limits)."""
+    limits, max_per_host = _limits()
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2_enabled())
+    return httpx.AsyncClient(
+        transport=AsyncHostLimitedTransport(transport, max_per_host), timeout=DEFAULT_TIMEOUT, follow_redirects=True
+    )
+
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+# Async clients are bound to the event loop that uses them (each research run has its own loop)
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_openai_clients: Dict[Tuple[Optional[str], Optional[str]], openai.OpenAI] = {}
+_async_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide pooled sync HTTP client."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = create_http_client()
+            logger.info(f"Created shared HTTP client (http2={http2_enabled()}, connection_close={connection_close_enabled()})")
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the pooled async HTTP client of the running event loop.
+
+    Raises:
+        RuntimeError: If called outside a running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_http_clients.get(loop)
+        if client is None or client.is_closed:
+            client = create_async_http_client()
+            _async_http_clients[loop] = client
+        return client
+
+
+def get_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> openai.OpenAI:
+    """
+    Get a shared sync OpenAI client backed by the pooled HTTP client.
+
+    Args:
+        api_key: API key (defaults to OPENAI_API_KEY)
+        base_url: Optional API base URL (defaults to ENGLISHY_LM_API_BASE, then OPENAI_BASE_URL)
+
+    Returns:
+        OpenAI client, one per (api_key, base_url)
+    """
+    base_url = base_url or os.getenv("ENGLISHY_LM_API_BASE") or None
+    key = (api_key, base_url)
+    http_client = get_http_client()
+    with _lock:
+        if key not in _openai_clients:
+            _openai_clients[key] = openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        return _openai_clients[key]
+
+
+def get_async_openai_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> openai.AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client of the running event loop.
+
+    Args:
+        api_key: API key (defaults to OPENAI_API_KEY)
+        base_url: Optional API base URL (defaults to ENGLISHY_LM_API_BASE, then OPENAI_BASE_URL)
+
+    Returns:
+        AsyncOpenAI client, one per (event loop, api_key, base_url)
+    """
+    base_url = base_url or os.getenv("ENGLISHY_LM_API_BASE") or None
+    loop = asyncio.get_running_loop()
+    http_client = get_async_http_client()
+    with _lock:
+        clients = _async_openai_clients.setdefault(loop, {})
+        key = (api_key, base_url)
+        if key not in clients:
+            clients[key] = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        return clients[key]
+
+
+async def aclose_async_http_client() -> None:
+    """Close the running event loop's pooled async client (call before the loop ends)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_http_clients.pop(loop, None)
+        _async_openai_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def configure_litellm() -> None:
+    """Route litellm's synchronous calls (e.g. dspy.Predict) through the pooled sync client."""
+    import litellm
+
+    litellm.client_session = get_http_client()
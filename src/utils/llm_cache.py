@@ -0,0 +1,143 @@
+"""
+Persistent completion cache for LLM calls.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from src.utils.disk_cache import DiskCache
+from src.utils.llm_limits import LimitedLM
+from src.utils.logging import logger
+
+DEFAULT_MAX_ENTRIES = 5000
+
+# Call options that do not change the generated text
+_IGNORED_KWARGS = {"api_key", "api_base", "base_url", "num_retries", "extra_headers", "timeout", "cache", "stream"}
+
+
+def is_cacheable(kwargs: Dict[str, Any]) -> bool:
+    """Whether a call is deterministic enough to cache (temperature unset or 0)."""
+    temperature = kwargs.get("temperature")
+    return temperature is None or float(temperature) <= 0
+
+
+class CompletionCache:
+    """Content-addressed, disk-backed cache of LLM completions.
+
+    Keys hash the model, the formatted messages, the generation options and
+    optionally the signature name. Entries are evicted least recently used.
+    """
+
+    def __init__(self, cache_dir: str = "./cache", max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for the cache database
+            max_entries: Maximum number of cached completions
+        """
+        self.store = DiskCache(os.path.join(cache_dir, "llm_completions.sqlite3"), max_entries=max_entries)
+
+    @staticmethod
+    def make_key(model: str, messages: Any, kwargs: Dict[str, Any], signature: Optional[str] = None) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            model: Model name
+            messages: Formatted chat messages (or prompt)
+            kwargs: Generation options (options that do not affect the output are ignored)
+            signature: Optional signature class name
+
+        Returns:
+            Hex digest key
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "signature": signature,
+                "messages": messages,
+                "kwargs": {key: value for key, value in kwargs.items() if key not in _IGNORED_KWARGS},
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached completion or None."""
+        cached = self.store.get(key)
+        return cached[0] if cached is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a completion."""
+        self.store.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and the current size."""
+        return self.store.stats()
+
+
+def _serializable_outputs(outputs: Any) -> bool:
+    if not isinstance(outputs, list) or not all(isinstance(output, (str, dict)) for output in outputs):
+        return False
+    try:
+        json.dumps(outputs)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class CachedLM(LimitedLM):
+    """dspy.LM that serves repeated deterministic calls from a CompletionCache.
+
+    Cache hits do not count against the process-wide LLMLimiter.
+
+    The streaming writers reuse ``completion_cache`` so that ``dspy.Predict``
+    modules and streamed sections share one cache.
+    """
+
+    def __init__(self, model: str, completion_cache: CompletionCache, **kwargs):
+        """
+        Initialize the LM.
+
+        Args:
+            model: Model name
+            completion_cache: Completion cache
+            **kwargs: dspy.LM arguments
+        """
+        super().__init__(model, **kwargs)
+        self.completion_cache = completion_cache
+
+    def _completion_cache_key(self, prompt, messages, kwargs) -> Optional[str]:
+        merged_kwargs = {**self.kwargs, **kwargs}
+        if not is_cacheable(merged_kwargs):
+            return None
+        return self.completion_cache.make_key(self.model, messages if messages is not None else prompt, merged_kwargs)
+
+    def __call__(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        key = self._completion_cache_key(prompt, messages, kwargs)
+        if key:
+            cached = self.completion_cache.get(key)
+            if cached is not None:
+                logger.info(f"Completion cache hit ({self.model})")
+                return cached
+        outputs = super().__call__(prompt, messages=messages, **kwargs)
+        if key and _serializable_outputs(outputs):
+            self.completion_cache.set(key, outputs)
+        return outputs
+
+    async def acall(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        key = self._completion_cache_key(prompt, messages, kwargs)
+        if key:
+            cached = self.completion_cache.get(key)
+            if cached is not None:
+                logger.info(f"Completion cache hit ({self.model})")
+                return cached
+        outputs = await super().acall(prompt, messages=messages, **kwargs)
+        if key and _serializable_outputs(outputs):
+            self.completion_cache.set(key, outputs)
+        return outputs
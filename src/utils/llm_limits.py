@@ -0,0 +1,238 @@
+"""
+Process-wide caps on concurrent LLM calls and tokens per minute.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import dspy
+
+TOKEN_WINDOW = 60.0  # seconds
+CHARS_PER_TOKEN = 4
+_ASYNC_POLL_INTERVAL = 0.02
+
+
+def estimate_tokens(messages: Any = None, text: str = "") -> int:
+    """
+    Cheap token estimate (about four characters per token) used to reserve budget before a call.
+
+    Args:
+        messages: Chat messages or prompt
+        text: Plain text
+
+    Returns:
+        Estimated token count (at least 1)
+    """
+    if messages is not None:
+        if isinstance(messages, list):
+            text += "".join(str(message.get("content", "")) if isinstance(message, dict) else str(message) for message in messages)
+        else:
+            text += str(messages)
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+@dataclass
+class LLMLease:
+    """A granted call slot and its entry in the token window."""
+
+    entry: List[float] = field(default_factory=lambda: [0.0, 0])  # [granted_at, tokens]
+
+    @property
+    def tokens(self) -> int:
+        return int(self.entry[1])
+
+
+class LLMLimiter:
+    """Thread-safe limiter shared by every LLM call of the process.
+
+    A call first reserves its estimated prompt tokens; ``release`` replaces the
+    reservation with the tokens actually used, so the sliding one-minute window
+    reflects real usage. A call larger than the whole budget is still let
+    through once the window is empty.
+    """
+
+    def __init__(self, max_concurrent_calls: Optional[int] = None, tokens_per_minute: Optional[int] = None, window: float = TOKEN_WINDOW):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_concurrent_calls: Maximum calls in flight (None or 0 = unlimited)
+            tokens_per_minute: Maximum tokens per window (None or 0 = unlimited)
+            window: Length of the token window in seconds
+        """
+        self.max_concurrent_calls = max_concurrent_calls or None
+        self.tokens_per_minute = tokens_per_minute or None
+        self.window = window
+        self._active = 0
+        self._window: deque = deque()
+        self._condition = threading.Condition()
+        self._stats = {"calls": 0, "throttled": 0, "wait_time": 0.0, "peak_active": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any cap is set."""
+        return bool(self.max_concurrent_calls or self.tokens_per_minute)
+
+    def _window_tokens(self, now: float) -> int:
+        while self._window and now - self._window[0][0] >= self.window:
+            self._window.popleft()
+        return sum(entry[1] for entry in self._window)
+
+    def _try_acquire(self, tokens: int) -> Optional[float]:
+        # 取得できればNone、できなければ再試行までの目安秒数を返す
+        now = time.monotonic()
+        if self.max_concurrent_calls and self._active >= self.max_concurrent_calls:
+            # 同期側はreleaseの通知で起きる
+            return 1.0
+        if self.tokens_per_minute:
+            used = self._window_tokens(now)
+            if used and used + tokens > self.tokens_per_minute:
+                return max(0.01, self._window[0][0] + self.window - now)
+        self._active += 1
+        self._stats["calls"] += 1
+        self._stats["peak_active"] = max(self._stats["peak_active"], self._active)
+        return None
+
+    def _grant(self, tokens: int, started: float, throttled: bool) -> LLMLease:
+        lease = LLMLease([time.monotonic(), tokens])
+        self._window.append(lease.entry)
+        if throttled:
+            self._stats["throttled"] += 1
+            self._stats["wait_time"] += lease.entry[0] - started
+        return lease
+
+    def acquire(self, tokens: int = 1) -> LLMLease:
+        """
+        Wait for a call slot and token budget (blocking).
+
+        Args:
+            tokens: Estimated tokens of the call
+
+        Returns:
+            Lease to pass to ``release``
+        """
+        started = time.monotonic()
+        throttled = False
+        with self._condition:
+            while True:
+                delay = self._try_acquire(tokens)
+                if delay is None:
+                    return self._grant(tokens, started, throttled)
+                throttled = True
+                self._condition.wait(timeout=delay)
+
+    async def aacquire(self, tokens: int = 1) -> LLMLease:
+        """
+        Wait for a call slot and token budget without blocking the event loop.
+
+        Args:
+            tokens: Estimated tokens of the call
+
+        Returns:
+            Lease to pass to ``release``
+        """
+        started = time.monotonic()
+        throttled = False
+        while True:
+            with self._condition:
+                delay = self._try_acquire(tokens)
+                if delay is None:
+                    return self._grant(tokens, started, throttled)
+            throttled = True
+            await asyncio.sleep(min(delay, _ASYNC_POLL_INTERVAL) if self.max_concurrent_calls else delay)
+
+    def release(self, lease: LLMLease, used_tokens: Optional[int] = None) -> None:
+        """
+        Free the call slot.
+
+        Args:
+            lease: Lease returned by ``acquire``/``aacquire``
+            used_tokens: Prompt and completion tokens actually used (keeps the reservation if omitted)
+        """
+        with self._condition:
+            self._active -= 1
+            if used_tokens is not None:
+                lease.entry[1] = used_tokens
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get counters: granted calls, throttled calls, total wait time, peak concurrency and calls in flight."""
+        with self._condition:
+            return {**self._stats, "wait_time": round(self._stats["wait_time"], 3), "active": self._active}
+
+
+_limiter: Optional[LLMLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_llm_limiter() -> LLMLimiter:
+    """
+    Get the process-wide limiter, creating it on first use.
+
+    ENGLISHY_LLM_MAX_CONCURRENT_CALLS and ENGLISHY_LLM_TOKENS_PER_MINUTE set
+    the caps (unset or 0 = unlimited).
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = LLMLimiter(
+                max_concurrent_calls=int(os.getenv("ENGLISHY_LLM_MAX_CONCURRENT_CALLS", "0")),
+                tokens_per_minute=int(os.getenv("ENGLISHY_LLM_TOKENS_PER_MINUTE", "0")),
+            )
+        return _limiter
+
+
+def configure_llm_limiter(max_concurrent_calls: Optional[int] = None, tokens_per_minute: Optional[int] = None) -> LLMLimiter:
+    """
+    Replace the process-wide limiter (e.g. from batch command options).
+
+    Args:
+        max_concurrent_calls: Maximum calls in flight (None or 0 = unlimited)
+        tokens_per_minute: Maximum tokens per minute (None or 0 = unlimited)
+
+    Returns:
+        The new limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        _limiter = LLMLimiter(max_concurrent_calls, tokens_per_minute)
+        return _limiter
+
+
+def _output_tokens(outputs: Any) -> int:
+    return sum(estimate_tokens(text=output if isinstance(output, str) else str(output)) for output in outputs or [])
+
+
+class LimitedLM(dspy.LM):
+    """dspy.LM whose provider calls go through the process-wide LLMLimiter."""
+
+    def __call__(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        limiter = get_llm_limiter()
+        if not limiter.enabled:
+            return super().__call__(prompt, messages=messages, **kwargs)
+        reserved = estimate_tokens(messages if messages is not None else prompt)
+        lease = limiter.acquire(reserved)
+        outputs = None
+        try:
+            outputs = super().__call__(prompt, messages=messages, **kwargs)
+            return outputs
+        finally:
+            limiter.release(lease, reserved + _output_tokens(outputs) if outputs is not None else None)
+
+    async def acall(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        limiter = get_llm_limiter()
+        if not limiter.enabled:
+            return await super().acall(prompt, messages=messages, **kwargs)
+        reserved = estimate_tokens(messages if messages is not None else prompt)
+        lease = await limiter.aacquire(reserved)
+        outputs = None
+        try:
+            outputs = await super().acall(prompt, messages=messages, **kwargs)
+            return outputs
+        finally:
+            limiter.release(lease, reserved + _output_tokens(outputs) if outputs is not None else None)
@@ -0,0 +1,186 @@
+"""
+Per-call token, latency and throughput metrics for LLM calls.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.logging import logger
+
+DEFAULT_MAX_RECORDS = 10000
+
+_current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("englishy_run_id", default=None)
+
+
+def get_run_id() -> Optional[str]:
+    """Get the research run ID of the current context, if any."""
+    return _current_run_id.get()
+
+
+@contextmanager
+def run_context(run_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Tag the LLM calls made inside the block (including tasks and threads started from it) with a run ID.
+
+    Args:
+        run_id: Run ID (a new one is generated if omitted)
+
+    Yields:
+        The run ID
+    """
+    run_id = run_id or uuid.uuid4().hex[:12]
+    token = _current_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run_id.reset(token)
+
+
+@dataclass
+class LLMCallRecord:
+    """Metrics of a single LLM call."""
+
+    signature: str
+    model: str
+    run_id: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    time_to_first_token: Optional[float] = None
+    duration: float = 0.0
+    retries: int = 0
+    cached: bool = False
+    fallback: bool = False
+    usage_estimated: bool = False
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Completion tokens per second after the first token (whole call if no token arrived)."""
+        generation_time = self.duration - (self.time_to_first_token or 0.0)
+        if self.completion_tokens <= 0 or generation_time <= 0:
+            return 0.0
+        return self.completion_tokens / generation_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        data = asdict(self)
+        data["tokens_per_second"] = round(self.tokens_per_second, 2)
+        return data
+
+
+class LLMMetrics:
+    """Thread-safe in-memory registry of LLM call records with an optional JSONL sink."""
+
+    def __init__(self, sink_path: Optional[str] = None, max_records: int = DEFAULT_MAX_RECORDS):
+        """
+        Initialize the registry.
+
+        Args:
+            sink_path: Optional JSONL file every record is appended to
+            max_records: Maximum number of records kept in memory (oldest are dropped)
+        """
+        self.sink_path = sink_path
+        self._records: deque = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        if sink_path:
+            directory = os.path.dirname(sink_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def record(self, record: LLMCallRecord) -> None:
+        """
+        Store a call record and append it to the sink.
+
+        Args:
+            record: Call record (untagged records get the current run ID)
+        """
+        if record.run_id is None:
+            record.run_id = get_run_id()
+        with self._lock:
+            self._records.append(record)
+            if self.sink_path:
+                try:
+                    with open(self.sink_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record.to_dict(), ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.warning(f"Failed to write LLM metrics to {self.sink_path}: {e}")
+
+    def records(self, run_id: Optional[str] = None) -> List[LLMCallRecord]:
+        """
+        Get call records.
+
+        Args:
+            run_id: Only return records of this run
+
+        Returns:
+            Records in call completion order
+        """
+        with self._lock:
+            records = list(self._records)
+        if run_id is not None:
+            records = [record for record in records if record.run_id == run_id]
+        return records
+
+    def summary(self, run_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate records by signature.
+
+        Args:
+            run_id: Only aggregate records of this run
+
+        Returns:
+            Per-signature calls, tokens, total/mean durations, mean time to first token and retries,
+            sorted by total duration (slowest first)
+        """
+        groups: Dict[str, List[LLMCallRecord]] = {}
+        for record in self.records(run_id):
+            groups.setdefault(record.signature, []).append(record)
+
+        summary = {}
+        for signature, records in groups.items():
+            ttfts = [record.time_to_first_token for record in records if record.time_to_first_token is not None]
+            total_duration = sum(record.duration for record in records)
+            summary[signature] = {
+                "calls": len(records),
+                "cached_calls": sum(record.cached for record in records),
+                "prompt_tokens": sum(record.prompt_tokens for record in records),
+                "completion_tokens": sum(record.completion_tokens for record in records),
+                "total_duration": round(total_duration, 3),
+                "mean_duration": round(total_duration / len(records), 3),
+                "mean_time_to_first_token": round(sum(ttfts) / len(ttfts), 3) if ttfts else None,
+                "retries": sum(record.retries for record in records),
+                "fallbacks": sum(record.fallback for record in records),
+                "errors": sum(record.error is not None for record in records),
+            }
+        return dict(sorted(summary.items(), key=lambda item: item[1]["total_duration"], reverse=True))
+
+    def clear(self) -> None:
+        """Drop all in-memory records."""
+        with self._lock:
+            self._records.clear()
+
+
+_metrics: Optional[LLMMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """
+    Get the process-wide metrics registry, creating it on first use.
+
+    ENGLISHY_LLM_METRICS_FILE enables the JSONL sink.
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics(sink_path=os.getenv("ENGLISHY_LLM_METRICS_FILE") or None)
+        return _metrics
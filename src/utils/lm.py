@@ -6,10 +6,49 @@ import os
 import dspy
 
 
+def load_completion_cache():
+    """
+    Load the persistent LLM completion cache configured by environment variables.
+    
+    ENGLISHY_LLM_CACHE=0 disables the cache. ENGLISHY_CACHE_DIR and
+    ENGLISHY_LLM_CACHE_MAX_ENTRIES tune it.
+    
+    Returns:
+        CompletionCache instance or None if caching is disabled
+    """
+    if os.getenv("ENGLISHY_LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    
+    from src.utils.llm_cache import DEFAULT_MAX_ENTRIES, CompletionCache
+    return CompletionCache(
+        cache_dir=os.getenv("ENGLISHY_CACHE_DIR", "./cache"),
+        max_entries=int(os.getenv("ENGLISHY_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def _create_lm(model_name: str, **kwargs) -> dspy.LM:
+    """Create the LM (capped by the process-wide LLMLimiter), wrapped with the completion cache when it is enabled."""
+    from src.utils.http_client import configure_litellm
+    configure_litellm()
+    
+    completion_cache = load_completion_cache()
+    if completion_cache is None:
+        from src.utils.llm_limits import LimitedLM
+        return LimitedLM(model_name, **kwargs)
+    
+    from src.utils.llm_cache import CachedLM
+    return CachedLM(model_name, completion_cache=completion_cache, **kwargs)
+
+
 def load_lm(model_name: str = None, **kwargs) -> dspy.LM:
     """
     Load a language model for DSPy.
     
+    Deterministic calls (temperature 0) are served from the persistent
+    completion cache unless ENGLISHY_LLM_CACHE=0. DSPy's own cache stays off.
+    ENGLISHY_LM_API_BASE points OpenAI models at a compatible server
+    (e.g. the local mock in ``src.utils.mock_llm_server``).
+    
     Args:
         model_name: Model name (e.g., "openai/gpt-4o-mini")
         **kwargs: Additional arguments for LM initialization
@@ -21,7 +60,7 @@ def load_lm(model_name: str = None, **kwargs) -> dspy.LM:
         model_name = os.getenv("ENGLISHY_LM", "openai/gpt-4o-mini")
     
     # Default parameters
-    kwargs = dict(max_tokens=8192, temperature=0.0, cache=False, **kwargs)
+    kwargs = {**dict(max_tokens=8192, temperature=0.0, cache=False), **kwargs}
     
     # Parse provider and model
     assert len(model_name.split("/")) == 2, f"Invalid model name format: {model_name}"
@@ -31,19 +70,21 @@ def load_lm(model_name: str = None, **kwargs) -> dspy.LM:
         api_key = os.environ.get("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
-        return dspy.LM(model_name, api_key=api_key, **kwargs)
+        if os.getenv("ENGLISHY_LM_API_BASE"):
+            kwargs.setdefault("api_base", os.getenv("ENGLISHY_LM_API_BASE"))
+        return _create_lm(model_name, api_key=api_key, **kwargs)
     
     elif provider == "anthropic":
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
-        return dspy.LM(model_name, api_key=api_key, **kwargs)
+        return _create_lm(model_name, api_key=api_key, **kwargs)
     
     elif provider == "gemini":
         api_key = os.environ.get("GOOGLE_AI_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_AI_API_KEY environment variable is required")
-        return dspy.LM(model_name, api_key=api_key, **kwargs)
+        return _create_lm(model_name, api_key=api_key, **kwargs)
     
     else:
         raise ValueError(f"Unsupported provider: {provider}. Supported providers: [openai, anthropic, gemini]") 
\ No newline at end of file
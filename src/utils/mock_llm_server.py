@@ -0,0 +1,451 @@
+"""
+Local mock of the OpenAI API for deterministic end-to-end and load tests.
+
+Serves ``/v1/chat/completions`` (streaming and non-streaming),
+``/v1/embeddings``, ``/v1/models`` and ``/stats`` on the standard library's
+HTTP server. Chat responses are shaped after the DSPy signature found in the
+prompt (``[[ ## field ## ]]`` markers, outline and mind map markdown) and are a
+pure function of the request, so runs are reproducible. Point the app at it
+with ``ENGLISHY_LM_API_BASE=http://127.0.0.1:<port>/v1``.
+
+Usage::
+
+    python -m src.utils.mock_llm_server --port 8787 --ttft uniform:0.2:0.6 --tokens-per-second 80
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+EMBEDDING_DIMENSIONS = 256
+
+_OUTPUT_FIELDS_PATTERN = re.compile(r"Your output fields are:\n(.*?)(?:\nAll interactions|\Z)", re.S)
+_FIELD_PATTERN = re.compile(r"^\d+\. `(\w+)` \(([^)]*)\)", re.M)
+_INPUT_PATTERN = re.compile(r"\[\[ ## (\w+) ## \]\]\n(.*?)(?=\n\[\[ ## |\nRespond with|\Z)", re.S)
+
+
+@dataclass
+class LatencyDistribution:
+    """Latency distribution in seconds, parsed from ``"0.3"``, ``"uniform:0.1:0.5"``,
+    ``"normal:0.3:0.05"`` or ``"exponential:0.3"`` (mean)."""
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a distribution spec.
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        parts = str(spec).split(":")
+        if len(parts) == 1:
+            return cls("fixed", (float(parts[0]),))
+        kind, params = parts[0], tuple(float(part) for part in parts[1:])
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "exponential": 1}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency distribution: {spec}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a non-negative latency."""
+        if self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        elif self.kind == "exponential":
+            value = rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        else:
+            value = self.params[0]
+        return max(0.0, value)
+
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour of the mock server."""
+
+    ttft: LatencyDistribution = field(default_factory=LatencyDistribution)
+    tokens_per_second: float = 0.0  # 0 = as fast as possible
+    response_words: int = 120  # length of free-text fields
+    error_rate: float = 0.0  # share of requests answered with HTTP 500
+    seed: int = 0
+
+
+def _request_rng(config: MockLLMConfig, payload: Dict[str, Any]) -> random.Random:
+    digest = hashlib.sha256(
+        json.dumps([config.seed, payload.get("model"), payload.get("messages") or payload.get("input")],
+                   ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+    ).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def _topic(inputs: Dict[str, str]) -> str:
+    for name in ("query", "text", "title"):
+        value = inputs.get(name, "").strip()
+        if value:
+            return value.splitlines()[0][:60]
+    return "英文法"
+
+
+def _reference_count(inputs: Dict[str, str]) -> int:
+    return max(1, min(20, sum(value.count("Title:") for value in inputs.values()) or 5))
+
+
+def _reference_ids(rng: random.Random, count: int) -> List[int]:
+    return sorted(rng.sample(range(1, count + 1), min(count, rng.randint(1, 3))))
+
+
+def _references(rng: random.Random, count: int) -> str:
+    return "".join(f"[{ref_id}]" for ref_id in _reference_ids(rng, count))
+
+
+def _outline(rng: random.Random, topic: str, reference_count: int) -> str:
+    lines = [f"# {topic}の学習ガイド"]
+    for number, section in enumerate(["基本構造", "実例と詳細解説", "実践的な活用", "発展と応用"], start=1):
+        lines.append(f"## {number}. {section}")
+        for subsection in ["形と意味", "使い方のポイント", "よくある間違い"][:rng.randint(2, 3)]:
+            lines.append(f"### {section}: {subsection}")
+            lines.append(_references(rng, reference_count))
+    return "\n".join(lines)
+
+
+def _outline_json(rng: random.Random, topic: str, reference_count: int) -> str:
+    sections = []
+    for section in ["基本構造", "実例と詳細解説", "実践的な活用", "発展と応用"][:rng.randint(3, 4)]:
+        sections.append({
+            "title": section,
+            "subsection_outlines": [
+                {"title": f"{section}: {subsection}", "reference_ids": _reference_ids(rng, reference_count)}
+                for subsection in ["形と意味", "使い方のポイント", "よくある間違い"][:rng.randint(2, 3)]
+            ],
+        })
+    return json.dumps({"title": f"{topic}の学習ガイド", "section_outlines": sections}, ensure_ascii=False)
+
+
+def _mindmap(topic: str) -> str:
+    return "\n".join([
+        f"# {topic}",
+        "## 基本構造", "### 形", "### 意味",
+        "## 実例", "### 日常会話", "### 書き言葉",
+        "## 練習", "### よくある間違い",
+    ])
+
+
+def _prose(rng: random.Random, topic: str, words: int, reference_count: int) -> str:
+    vocabulary = ["learners", "practice", "structure", "meaning", "context", "example", "usage",
+                  "form", "grammar", "sentence", "clearly", "often", "students", "understand"]
+    sentences = []
+    count = 0
+    while count < words:
+        length = rng.randint(8, 16)
+        sentence = " ".join(rng.choice(vocabulary) for _ in range(length))
+        sentences.append(f"{topic}: {sentence}{_references(rng, reference_count)}.")
+        count += length
+    paragraphs = [" ".join(sentences[i:i + 3]) for i in range(0, len(sentences), 3)]
+    return "\n\n".join(paragraphs)
+
+
+def _field_value(name: str, type_name: str, rng: random.Random, inputs: Dict[str, str], config: MockLLMConfig) -> str:
+    topic = _topic(inputs)
+    reference_count = _reference_count(inputs)
+    if type_name.startswith("list"):
+        return json.dumps([f"{topic} {suffix}" for suffix in ("basics", "examples", "practice")], ensure_ascii=False)
+    if type_name in ("int", "float"):
+        return str(rng.randint(1, 10))
+    if type_name == "bool":
+        return "true"
+    if type_name.startswith("dict"):
+        return "{}"
+    if name in ("outline", "fixed_outline"):
+        return _outline(rng, topic, reference_count)
+    if name == "outline_json":
+        return _outline_json(rng, topic, reference_count)
+    if name == "mindmap":
+        return _mindmap(topic)
+    if name == "topics":
+        return "\n".join(f"{topic} {suffix}" for suffix in ("basics", "examples", "common mistakes", "teaching methods"))
+    if name in ("grammar_structures", "verb_forms", "sentence_patterns"):
+        return ", ".join(rng.sample(["present perfect", "subjunctive mood", "passive voice", "relative clause", "gerund"], 2))
+    if name == "refined_query":
+        return f"{topic} grammar usage examples"
+    return _prose(rng, topic, config.response_words, reference_count)
+
+
+def build_completion_text(payload: Dict[str, Any], config: Optional[MockLLMConfig] = None) -> str:
+    """
+    Build the deterministic completion text for a chat request.
+
+    DSPy prompts get every output field in ``[[ ## field ## ]]`` format followed
+    by ``[[ ## completed ## ]]``; JSON-mode requests get a JSON object; other
+    prompts get prose.
+
+    Args:
+        payload: Chat completion request body
+        config: Server behaviour
+
+    Returns:
+        Completion text
+    """
+    config = config or MockLLMConfig()
+    rng = _request_rng(config, payload)
+    messages = payload.get("messages") or []
+    system = "\n".join(_message_text(message) for message in messages if message.get("role") == "system")
+    last_user = next((_message_text(message) for message in reversed(messages) if message.get("role") == "user"), "")
+    inputs = {name: value.strip() for name, value in _INPUT_PATTERN.findall(last_user)}
+
+    output_block = _OUTPUT_FIELDS_PATTERN.search(system)
+    if output_block:
+        fields = _FIELD_PATTERN.findall(output_block.group(1))
+        parts = [f"[[ ## {name} ## ]]\n{_field_value(name, type_name, rng, inputs, config)}" for name, type_name in fields]
+        return "\n\n".join(parts + ["[[ ## completed ## ]]"])
+
+    if (payload.get("response_format") or {}).get("type") in ("json_object", "json_schema"):
+        return json.dumps({"result": _topic({"query": last_user}), "items": []}, ensure_ascii=False)
+    return _prose(rng, _topic({"query": last_user}), config.response_words, 5)
+
+
+def _tokenize(text: str) -> List[str]:
+    # 空白を含めて分割し、連結すると元の文字列に戻るようにする
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def embed_text(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """Deterministic bag-of-words embedding: texts sharing words get similar vectors."""
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        index = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "big") % dimensions
+        vector[index] += 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_MockHTTPServer"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip("/")
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "englishy"}]})
+        elif path.endswith("/stats"):
+            self._send_json(200, self.server.mock.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        path = self.path.rstrip("/")
+        mock = self.server.mock
+        mock._begin()
+        try:
+            if path.endswith("/chat/completions"):
+                self._chat_completions(payload)
+            elif path.endswith("/embeddings"):
+                self._embeddings(payload)
+            else:
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+        finally:
+            mock._end()
+
+    def _embeddings(self, payload: Dict[str, Any]) -> None:
+        inputs = payload.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(payload.get("dimensions") or EMBEDDING_DIMENSIONS)
+        self._send_json(200, {
+            "object": "list",
+            "model": payload.get("model", "mock"),
+            "data": [{"object": "embedding", "index": i, "embedding": embed_text(str(text), dimensions)} for i, text in enumerate(inputs)],
+            "usage": {"prompt_tokens": sum(len(str(text).split()) for text in inputs), "total_tokens": 0},
+        })
+
+    def _chat_completions(self, payload: Dict[str, Any]) -> None:
+        config = self.server.mock.config
+        rng = _request_rng(config, payload)
+        if config.error_rate and rng.random() < config.error_rate:
+            self._send_json(500, {"error": {"message": "Injected mock failure", "type": "server_error"}})
+            return
+
+        text = build_completion_text(payload, config)
+        tokens = _tokenize(text)
+        prompt_tokens = sum(len(_message_text(message).split()) for message in payload.get("messages") or [])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)}
+        completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = payload.get("model", "mock")
+
+        time.sleep(config.ttft.sample(rng))
+        if not payload.get("stream"):
+            if config.tokens_per_second:
+                time.sleep(len(tokens) / config.tokens_per_second)
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(choices, **extra) -> None:
+            body = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": choices, **extra}
+            self._write_chunk(f"data: {json.dumps(body, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+        started = time.perf_counter()
+        for i, token in enumerate(tokens):
+            if config.tokens_per_second:
+                delay = started + i / config.tokens_per_second - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            delta = {"role": "assistant", "content": token} if i == 0 else {"content": token}
+            event([{"index": 0, "delta": delta, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockLLMServer"
+
+
+class MockLLMServer:
+    """Background-thread OpenAI-compatible mock server.
+
+    Example::
+
+        with MockLLMServer(MockLLMConfig(tokens_per_second=100)) as server:
+            os.environ["ENGLISHY_LM_API_BASE"] = server.base_url
+    """
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server (it starts with ``start`` or the context manager).
+
+        Args:
+            config: Server behaviour
+            host: Bind address
+            port: Port (0 picks a free one)
+        """
+        self.config = config or MockLLMConfig()
+        self._httpd = _MockHTTPServer((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "active": 0, "peak_active": 0}
+
+    @property
+    def base_url(self) -> str:
+        """API base URL including ``/v1``."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _begin(self) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["active"] += 1
+            self._stats["peak_active"] = max(self._stats["peak_active"], self._stats["active"])
+
+    def _end(self) -> None:
+        with self._lock:
+            self._stats["active"] -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get request counters (total, in flight, peak concurrency)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self) -> "MockLLMServer":
+        """Serve requests on a daemon thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server for Englishy load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--ttft", default="0", help='Time to first token: "0.3", "uniform:0.1:0.5", "normal:0.3:0.05", "exponential:0.3"')
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming rate (0 = unlimited)")
+    parser.add_argument("--response-words", type=int, default=120, help="Length of free-text fields")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        ttft=LatencyDistribution.parse(args.ttft),
+        tokens_per_second=args.tokens_per_second,
+        response_words=args.response_words,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port)
+    print(f"Mock LLM server listening on {server.base_url}")
+    print(f"  export ENGLISHY_LM_API_BASE={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Per-stage model profiles with latency-aware fallback.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+import dspy
+
+from src.utils.logging import logger
+
+# Stages that can be given their own model profile
+STAGES = (
+    "query_refiner",   # GrammarAnalysisSignature
+    "query_expander",  # GenerateSearchTopics
+    "outline",         # CreateOutline
+    "fix_outline",     # FixOutline
+    "mindmap",         # MindMap
+    "lead",
+    "section",
+    "conclusion",
+    "related_topics",
+    "references",
+)
+
+# Model alias for the small, fast model (ENGLISHY_FAST_LM, or the default model if unset)
+FAST_MODEL = "fast"
+
+DEFAULT_PROFILES_PATH = "./data/model_profiles.json"
+
+
+@dataclass
+class ModelProfile:
+    """Model settings of a stage.
+
+    ``None`` fields inherit from the default LM. ``timeout`` is the stage's
+    latency budget in seconds (for streamed writers: time to first token);
+    ``fallback`` is the model used when the budget is exceeded or the call
+    fails (defaults to the default model when ``model`` differs from it).
+    """
+
+    model: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None
+    fallback: Optional[str] = None
+
+    def merged(self, other: "ModelProfile") -> "ModelProfile":
+        """Return this profile overridden by the set fields of ``other``."""
+        values = asdict(self)
+        values.update({key: value for key, value in asdict(other).items() if value is not None})
+        return ModelProfile(**values)
+
+
+# Cheap stages run on the fast model with smaller output limits
+DEFAULT_PROFILES: Dict[str, ModelProfile] = {
+    "query_refiner": ModelProfile(model=FAST_MODEL, max_tokens=1024),
+    "query_expander": ModelProfile(model=FAST_MODEL, max_tokens=1024),
+    "fix_outline": ModelProfile(model=FAST_MODEL, max_tokens=4096),
+}
+
+
+def load_model_profiles(path: Optional[str] = None) -> Dict[str, ModelProfile]:
+    """
+    Load stage model profiles.
+
+    The JSON file (ENGLISHY_MODEL_PROFILES, default ./data/model_profiles.json)
+    maps stage names to profile fields and is merged over DEFAULT_PROFILES, e.g.
+    ``{"section": {"model": "openai/gpt-4o", "timeout": 30, "fallback": "openai/gpt-4o-mini"}}``.
+
+    Args:
+        path: Optional path overriding the environment variable
+
+    Returns:
+        Profiles by stage name
+
+    Raises:
+        ValueError: If the file names an unknown stage or profile field
+    """
+    path = path or os.getenv("ENGLISHY_MODEL_PROFILES", DEFAULT_PROFILES_PATH)
+    profiles = dict(DEFAULT_PROFILES)
+    if not path or not os.path.exists(path):
+        return profiles
+
+    with open(path, "r", encoding="utf-8") as f:
+        configured = json.load(f)
+    field_names = {field.name for field in fields(ModelProfile)}
+    for stage, values in configured.items():
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage in model profiles: {stage} (expected one of {', '.join(STAGES)})")
+        unknown = set(values) - field_names
+        if unknown:
+            raise ValueError(f"Unknown model profile fields for {stage}: {', '.join(sorted(unknown))}")
+        profiles[stage] = profiles.get(stage, ModelProfile()).merged(ModelProfile(**values))
+    logger.info(f"Loaded model profiles from {path}: {', '.join(configured)}")
+    return profiles
+
+
+class FallbackLM(dspy.BaseLM):
+    """LM that retries a failed or too slow call once on an alternate LM.
+
+    The primary LM gets the stage's latency budget as its request timeout.
+    Streaming writers read ``fallback_lm`` and apply the budget to the first
+    token themselves.
+    """
+
+    def __init__(self, primary: dspy.BaseLM, fallback_lm: dspy.BaseLM, stage: str = ""):
+        """
+        Initialize the LM.
+
+        Args:
+            primary: LM used first
+            fallback_lm: LM used when the primary fails or times out
+            stage: Stage name for logging
+        """
+        super().__init__(
+            model=primary.model,
+            model_type=primary.model_type,
+            cache=False,
+            num_retries=getattr(primary, "num_retries", 0),
+        )
+        self.primary = primary
+        self.fallback_lm = fallback_lm
+        self.stage = stage
+        self.kwargs = primary.kwargs
+        self.completion_cache = getattr(primary, "completion_cache", None)
+
+    def _log_fallback(self, error: Exception) -> None:
+        logger.warning(
+            f"[{self.stage}] {self.primary.model} failed or exceeded its latency budget ({error}); "
+            f"falling back to {self.fallback_lm.model}"
+        )
+
+    def __call__(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        try:
+            return self.primary(prompt, messages=messages, **kwargs)
+        except Exception as e:
+            self._log_fallback(e)
+            return self.fallback_lm(prompt, messages=messages, **kwargs)
+
+    async def acall(self, prompt=None, messages=None, **kwargs) -> List[Any]:
+        try:
+            return await self.primary.acall(prompt, messages=messages, **kwargs)
+        except Exception as e:
+            self._log_fallback(e)
+            return await self.fallback_lm.acall(prompt, messages=messages, **kwargs)
+
+
+class ModelRouter:
+    """Creates (and shares) the LM of each stage from its profile."""
+
+    def __init__(self, default_lm: dspy.BaseLM, profiles: Optional[Dict[str, ModelProfile]] = None, lm_factory=None):
+        """
+        Initialize the router.
+
+        Args:
+            default_lm: LM for stages without a profile, and the default fallback
+            profiles: Profiles by stage name (defaults to load_model_profiles())
+            lm_factory: Function ``(model_name, **kwargs) -> LM`` (defaults to load_lm)
+        """
+        if lm_factory is None:
+            from src.utils.lm import load_lm
+            lm_factory = load_lm
+        self.default_lm = default_lm
+        self.profiles = load_model_profiles() if profiles is None else profiles
+        self.lm_factory = lm_factory
+        self._lms: Dict[tuple, dspy.BaseLM] = {}
+
+    def _resolve_model(self, model: Optional[str]) -> str:
+        if model == FAST_MODEL:
+            return os.getenv("ENGLISHY_FAST_LM") or self.default_lm.model
+        return model or self.default_lm.model
+
+    def _create(self, model: str, profile: ModelProfile, with_fallback: bool) -> dspy.BaseLM:
+        overrides = {
+            key: value
+            for key, value in (("max_tokens", profile.max_tokens), ("temperature", profile.temperature), ("timeout", profile.timeout))
+            if value is not None
+        }
+        if with_fallback:
+            # 予算超過時は再試行せず代替モデルに切り替える
+            overrides["num_retries"] = 0
+        key = (model, tuple(sorted(overrides.items())))
+        if key not in self._lms:
+            if model == self.default_lm.model and not overrides:
+                self._lms[key] = self.default_lm
+            else:
+                self._lms[key] = self.lm_factory(model, **overrides)
+        return self._lms[key]
+
+    def lm_for(self, stage: str) -> dspy.BaseLM:
+        """
+        Get the LM of a stage.
+
+        Args:
+            stage: Stage name (see STAGES)
+
+        Returns:
+            The default LM, a profiled LM, or a FallbackLM wrapping it
+        """
+        profile = self.profiles.get(stage)
+        if profile is None:
+            return self.default_lm
+
+        model = self._resolve_model(profile.model)
+        fallback_model = self._resolve_model(profile.fallback) if profile.fallback else None
+        if fallback_model is None and model != self.default_lm.model:
+            fallback_model = self.default_lm.model
+        if fallback_model == model:
+            fallback_model = None
+
+        lm = self._create(model, profile, with_fallback=fallback_model is not None)
+        if fallback_model is None:
+            return lm
+        fallback_lm = self.default_lm if fallback_model == self.default_lm.model else self._create(
+            fallback_model, ModelProfile(max_tokens=profile.max_tokens, temperature=profile.temperature), False
+        )
+        logger.info(f"Stage '{stage}' uses {model} (fallback: {fallback_model})")
+        return FallbackLM(lm, fallback_lm, stage=stage)
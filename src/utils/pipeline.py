@@ -0,0 +1,194 @@
+"""
+Dependency-graph scheduler for async pipeline stages.
+"""
+
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from src.utils.logging import logger
+
+
+@dataclass
+class Stage:
+    """A pipeline stage with declared inputs and outputs.
+
+    ``func`` is called with the stage inputs as keyword arguments and may be a
+    coroutine function. With a single output its return value is stored under
+    that name; with several outputs it must return a tuple in the same order
+    or a dict keyed by output name.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    inputs: Sequence[str] = ()
+    outputs: Sequence[str] = ()
+    description: str = ""
+
+    def __post_init__(self):
+        if not self.outputs:
+            self.outputs = (self.name,)
+        if not self.description:
+            self.description = self.name
+
+
+@dataclass
+class StageEvent:
+    """Progress notification emitted by the scheduler."""
+
+    stage: Stage
+    status: str  # "started", "finished" or "failed"
+    completed: int
+    total: int
+    running: List[Stage] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class PipelineError(Exception):
+    """Raised when a stage fails; the original exception is chained as ``__cause__``."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Pipeline:
+    """Runs stages as soon as their inputs are available.
+
+    Independent stages run concurrently on the event loop, so blocking work
+    inside a stage should be moved to a thread (``asyncio.to_thread``).
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Pipeline stages
+
+        Raises:
+            ValueError: If stage names or outputs are not unique
+        """
+        self.stages = list(stages)
+        self.timings: Dict[str, float] = {}
+
+        names = [stage.name for stage in self.stages]
+        if len(names) != len(set(names)):
+            raise ValueError(f"Duplicate stage names: {names}")
+        self.producers: Dict[str, Stage] = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by both '{self.producers[output].name}' and '{stage.name}'")
+                self.producers[output] = stage
+
+    def validate(self, inputs: Sequence[str]) -> None:
+        """
+        Check that every stage can run given the initial inputs.
+
+        Args:
+            inputs: Names of the values passed to ``run``
+
+        Raises:
+            ValueError: If an input is never produced or stages depend on each other in a cycle
+        """
+        available = set(inputs)
+        for stage in self.stages:
+            for name in stage.inputs:
+                if name not in available and name not in self.producers:
+                    raise ValueError(f"Stage '{stage.name}' needs '{name}', which no stage produces")
+
+        remaining = list(self.stages)
+        while remaining:
+            ready = [stage for stage in remaining if all(name in available for name in stage.inputs)]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages: {[stage.name for stage in remaining]}")
+            for stage in ready:
+                available.update(stage.outputs)
+                remaining.remove(stage)
+
+    async def _run_stage(self, stage: Stage, values: Dict[str, Any]) -> Any:
+        result = stage.func(**{name: values[name] for name in stage.inputs})
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _store_outputs(self, stage: Stage, result: Any, values: Dict[str, Any]) -> None:
+        if len(stage.outputs) == 1:
+            values[stage.outputs[0]] = result
+        elif isinstance(result, dict):
+            for name in stage.outputs:
+                values[name] = result[name]
+        else:
+            if len(result) != len(stage.outputs):
+                raise ValueError(f"Stage '{stage.name}' returned {len(result)} values for outputs {list(stage.outputs)}")
+            values.update(zip(stage.outputs, result))
+
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        on_event: Optional[Callable[[StageEvent], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run all stages.
+
+        Args:
+            inputs: Initial values available to stages
+            on_event: Optional callback for stage start/finish/failure (called on the event loop)
+
+        Returns:
+            All initial and produced values
+
+        Raises:
+            PipelineError: If a stage fails; the stages still running are cancelled
+        """
+        self.validate(list(inputs))
+        values = dict(inputs)
+        pending = list(self.stages)
+        running: Dict[asyncio.Future, Stage] = {}
+        started_at: Dict[str, float] = {}
+        total = len(self.stages)
+        completed = 0
+        run_started = time.perf_counter()
+
+        def emit(stage: Stage, status: str, elapsed: float = 0.0) -> None:
+            if not on_event:
+                return
+            try:
+                on_event(StageEvent(stage, status, completed, total, list(running.values()), elapsed))
+            except Exception as e:
+                logger.warning(f"Pipeline progress callback failed: {e}")
+
+        try:
+            while pending or running:
+                for stage in [stage for stage in pending if all(name in values for name in stage.inputs)]:
+                    pending.remove(stage)
+                    started_at[stage.name] = time.perf_counter()
+                    running[asyncio.ensure_future(self._run_stage(stage, values))] = stage
+                    emit(stage, "started")
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage = running.pop(task)
+                    elapsed = time.perf_counter() - started_at[stage.name]
+                    self.timings[stage.name] = elapsed
+                    try:
+                        self._store_outputs(stage, task.result(), values)
+                    except Exception as e:
+                        emit(stage, "failed", elapsed)
+                        raise PipelineError(stage.name, e) from e
+                    completed += 1
+                    logger.info(f"Stage '{stage.name}' finished in {elapsed:.2f}s")
+                    emit(stage, "finished", elapsed)
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.info(
+            f"Pipeline finished in {time.perf_counter() - run_started:.2f}s; stage timings: "
+            + ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in self.timings.items())
+        )
+        return values
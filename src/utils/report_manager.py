@@ -22,12 +22,13 @@ class ReportManager:
         """Ensure the reports directory exists."""
         os.makedirs(self.reports_dir, exist_ok=True)
     
-    def save_report(self, report_data: Dict[str, Any]) -> bool:
+    def save_report(self, report_data: Dict[str, Any], report_id: Optional[str] = None) -> bool:
         """
         Save a report to disk.
         
         Args:
             report_data: Report data to save
+            report_id: Optional report ID (generated from the timestamp if omitted)
         
         Returns:
             True if successful, False otherwise
@@ -35,7 +36,7 @@ class ReportManager:
         try:
             # Generate unique ID and timestamp
             timestamp = datetime.now().isoformat()
-            report_id = f"report_{int(datetime.now().timestamp())}"
+            report_id = report_id or f"report_{int(datetime.now().timestamp())}"
             
             # Add metadata
             report_data.update({
@@ -2,19 +2,122 @@
 Web retriever utilities for Englishy.
 """
 
-def load_web_retriever(name: str):
+import os
+from typing import Callable, Dict, Optional
+
+
+def load_search_cache():
+    """
+    Load the persistent web search cache configured by environment variables.
+    
+    ENGLISHY_WEB_SEARCH_CACHE=0 disables the cache. ENGLISHY_CACHE_DIR,
+    ENGLISHY_WEB_SEARCH_CACHE_TTL, ENGLISHY_WEB_SEARCH_CACHE_STALE_TTL (seconds)
+    and ENGLISHY_WEB_SEARCH_CACHE_MAX_ENTRIES tune it.
+    
+    Returns:
+        SearchResultCache instance or None if caching is disabled
+    """
+    if os.getenv("ENGLISHY_WEB_SEARCH_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    
+    from src.retriever.web_search.cache import (
+        DEFAULT_MAX_ENTRIES, DEFAULT_STALE_TTL, DEFAULT_TTL, SearchResultCache
+    )
+    return SearchResultCache(
+        cache_dir=os.getenv("ENGLISHY_CACHE_DIR", "./cache"),
+        ttl=float(os.getenv("ENGLISHY_WEB_SEARCH_CACHE_TTL", DEFAULT_TTL)),
+        stale_ttl=float(os.getenv("ENGLISHY_WEB_SEARCH_CACHE_STALE_TTL", DEFAULT_STALE_TTL)),
+        max_entries=int(os.getenv("ENGLISHY_WEB_SEARCH_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def load_engine_guard(name: str):
+    """
+    Get the process-wide rate limiter / retry / circuit breaker guard for an engine.
+    
+    ENGLISHY_WEB_SEARCH_RATE (requests per second), ENGLISHY_WEB_SEARCH_BURST,
+    ENGLISHY_WEB_SEARCH_MAX_RETRIES, ENGLISHY_WEB_SEARCH_FAILURE_THRESHOLD and
+    ENGLISHY_WEB_SEARCH_RESET_TIMEOUT (seconds) tune it. The settings are read
+    when the guard is first created; later calls share the same guard.
+    
+    Args:
+        name: Engine name
+        
+    Returns:
+        EngineGuard instance
+    """
+    from src.retriever.web_search import throttle
+    return throttle.get_engine_guard(
+        name,
+        rate=float(os.getenv("ENGLISHY_WEB_SEARCH_RATE", throttle.DEFAULT_RATE)),
+        burst=int(os.getenv("ENGLISHY_WEB_SEARCH_BURST", throttle.DEFAULT_BURST)),
+        max_retries=int(os.getenv("ENGLISHY_WEB_SEARCH_MAX_RETRIES", throttle.DEFAULT_MAX_RETRIES)),
+        failure_threshold=int(os.getenv("ENGLISHY_WEB_SEARCH_FAILURE_THRESHOLD", throttle.DEFAULT_FAILURE_THRESHOLD)),
+        reset_timeout=float(os.getenv("ENGLISHY_WEB_SEARCH_RESET_TIMEOUT", throttle.DEFAULT_RESET_TIMEOUT)),
+    )
+
+
+def _load_duckduckgo(cache):
+    from src.retriever.web_search.duckduckgo_search import DuckDuckGoSearchWebRetriever
+    return DuckDuckGoSearchWebRetriever(cache=cache, guard=load_engine_guard("duckduckgo"))
+
+
+def _load_local(cache):
+    from src.retriever.web_search.local_search import LocalFileSearchWebRetriever
+    path = os.getenv("ENGLISHY_LOCAL_SEARCH_FILE")
+    if not path:
+        raise ValueError("ENGLISHY_LOCAL_SEARCH_FILE must be set to use the local search engine")
+    return LocalFileSearchWebRetriever(path, cache=cache)
+
+
+# Registered web search engines: name -> factory(cache)
+WEB_RETRIEVERS: Dict[str, Callable] = {
+    "duckduckgo": _load_duckduckgo,
+    "local": _load_local,
+}
+
+
+def register_web_retriever(name: str, factory: Callable) -> None:
+    """
+    Register a web search engine.
+    
+    Args:
+        name: Engine name (case-insensitive)
+        factory: Callable taking the search cache (or None) and returning a BaseWebRetriever
+    """
+    WEB_RETRIEVERS[name.lower()] = factory
+
+
+def load_web_retriever(name: Optional[str] = None):
     """
     Load a web retriever by name.
     
+    ``"primary+secondary"`` (e.g. ``"DuckDuckGo+Local"``) builds a hedged
+    retriever that sends slow queries to the secondary engine after
+    ENGLISHY_WEB_SEARCH_HEDGE_DELAY seconds.
+    
     Args:
-        name: Name of the web search engine
+        name: Name of the web search engine (defaults to ENGLISHY_WEB_SEARCH_ENGINE)
         
     Returns:
         Web retriever instance
     """
-    name_lower = name.lower()
-    if name_lower == "duckduckgo":
-        from src.retriever.web_search.duckduckgo_search import DuckDuckGoSearchWebRetriever
-        return DuckDuckGoSearchWebRetriever()
-    else:
-        raise ValueError(f"Unsupported web search engine: {name}") 
\ No newline at end of file
+    name = name or os.getenv("ENGLISHY_WEB_SEARCH_ENGINE", "DuckDuckGo")
+    names = [part.strip().lower() for part in name.split("+")]
+    for part in names:
+        if part not in WEB_RETRIEVERS:
+            raise ValueError(f"Unsupported web search engine: {name}")
+    if len(names) > 2:
+        raise ValueError(f"Hedging supports exactly two engines: {name}")
+    
+    cache = load_search_cache()
+    retrievers = [WEB_RETRIEVERS[part](cache) for part in names]
+    if len(retrievers) == 1:
+        return retrievers[0]
+    
+    from src.retriever.web_search.hedged import DEFAULT_HEDGE_DELAY, HedgedWebRetriever
+    return HedgedWebRetriever(
+        retrievers[0],
+        retrievers[1],
+        hedge_delay=float(os.getenv("ENGLISHY_WEB_SEARCH_HEDGE_DELAY", DEFAULT_HEDGE_DELAY)),
+    )
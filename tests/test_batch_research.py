@@ -0,0 +1,140 @@
+"""
+Test cases for headless batch research.
+"""
+
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.app.batch_research import configure_batch_limits, load_batch_jobs, load_completed_job_ids, make_job_id, run_batch
+from src.app.research_pipeline import ResearchOptions
+from src.retriever.web_search import throttle
+from src.utils import llm_limits
+from src.utils.report_manager import ReportManager
+
+
+class TestLoadBatchJobs:
+    """load_batch_jobsのテスト"""
+
+    def test_text_file(self, tmp_path):
+        """1行1クエリのファイルを読み込み、重複と空行・コメントを除くことを確認"""
+        path = tmp_path / "queries.txt"
+        path.write_text("仮定法\n\n# comment\n現在完了\n仮定法\n", encoding="utf-8")
+        defaults = ResearchOptions(include_web_search=False)
+
+        jobs = load_batch_jobs(str(path), defaults)
+        assert [job.query for job in jobs] == ["仮定法", "現在完了"]
+        assert jobs[0].id == make_job_id("仮定法", defaults)
+        assert jobs[0].options is defaults
+
+    def test_job_id_ignores_transport_options(self):
+        """ストリーミング設定はジョブIDに影響せず、内容に関わるオプションは影響することを確認"""
+        options = ResearchOptions(streaming_outline=False)
+        assert make_job_id("仮定法", options) == make_job_id("仮定法", ResearchOptions(streaming_outline=True))
+        assert make_job_id("仮定法", options) != make_job_id("仮定法", ResearchOptions(search_depth="Deep"))
+
+    def test_jsonl_options(self, tmp_path):
+        """JSONLの各行でIDとオプションを上書きできることを確認"""
+        path = tmp_path / "queries.jsonl"
+        path.write_text(
+            '{"query": "仮定法", "id": "subjunctive", "search_depth": "Deep"}\n{"query": "現在完了"}\n',
+            encoding="utf-8"
+        )
+        jobs = load_batch_jobs(str(path), ResearchOptions(report_style="Advanced"))
+        assert jobs[0].id == "subjunctive"
+        assert (jobs[0].options.search_depth, jobs[0].options.report_style) == ("Deep", "Advanced")
+        assert jobs[1].options.search_depth == "Comprehensive"
+
+    def test_invalid_jsonl(self, tmp_path):
+        """未知のオプションやクエリのない行はエラーになることを確認"""
+        path = tmp_path / "queries.jsonl"
+        path.write_text('{"query": "仮定法", "depth": "Deep"}\n', encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_batch_jobs(str(path))
+        path.write_text('{"search_depth": "Deep"}\n', encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_batch_jobs(str(path))
+
+
+def _jobs(tmp_path, queries):
+    path = tmp_path / "queries.txt"
+    path.write_text("\n".join(queries), encoding="utf-8")
+    return load_batch_jobs(str(path), ResearchOptions(include_web_search=False))
+
+
+class TestRunBatch:
+    """run_batchのテスト"""
+
+    def test_concurrency_output_and_resume(self, tmp_path):
+        """同時実行数を守ってJSONLに書き出し、再実行時は完了済みを飛ばすことを確認"""
+        jobs = _jobs(tmp_path, ["q1", "q2", "q3", "q4", "fail"])
+        output = str(tmp_path / "out" / "reports.jsonl")
+        active, peak, calls = [0], [0], []
+
+        async def fake_run_research(query, components, options):
+            calls.append(query)
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.02)
+            active[0] -= 1
+            if query == "fail":
+                raise RuntimeError("boom")
+            return {"query": query, "report": f"report of {query}"}
+
+        with patch("src.app.batch_research.run_research", fake_run_research):
+            summary = asyncio.run(run_batch(jobs, components=None, output_path=output, concurrency=2))
+            assert (summary["succeeded"], summary["failed"], summary["skipped"]) == (4, 1, 0)
+            assert peak[0] == 2
+
+            entries = [json.loads(line) for line in open(output, encoding="utf-8")]
+            assert {entry["query"]: entry["status"] for entry in entries}["fail"] == "error"
+            assert next(entry for entry in entries if entry["query"] == "q1")["report"]["report"] == "report of q1"
+
+            # 中断で途中まで書かれた行は無視し、失敗したジョブだけを再実行する
+            with open(output, "a", encoding="utf-8") as f:
+                f.write('{"id": "trunc')
+            calls.clear()
+            summary = asyncio.run(run_batch(jobs, components=None, output_path=output, concurrency=2))
+
+        assert calls == ["fail"]
+        assert summary["skipped"] == 4
+        assert len(load_completed_job_ids(output)) == 4
+
+    def test_report_store(self, tmp_path):
+        """レポートストアに保存し、保存済みのジョブを再実行しないことを確認"""
+        jobs = _jobs(tmp_path, ["q1", "q2"])
+        manager = ReportManager(str(tmp_path / "reports"))
+        calls = []
+
+        async def fake_run_research(query, components, options):
+            calls.append(query)
+            return {"query": query, "report": "text"}
+
+        with patch("src.app.batch_research.run_research", fake_run_research):
+            asyncio.run(run_batch(jobs, components=None, report_manager=manager))
+            asyncio.run(run_batch(jobs, components=None, report_manager=manager))
+
+        assert sorted(calls) == ["q1", "q2"]
+        assert manager.get_report(f"batch_{jobs[0].id}")["query"] == "q1"
+
+
+def test_web_search_cap_reconfigures_guards(monkeypatch):
+    """検索レートの上限が環境変数を変えずに既存と新規のエンジンガードへ適用されることを確認"""
+    monkeypatch.delenv("ENGLISHY_WEB_SEARCH_RATE", raising=False)
+    monkeypatch.setattr(llm_limits, "_limiter", llm_limits._limiter)
+    existing = throttle.get_engine_guard("batch-existing-test", rate=10.0, burst=5)
+    try:
+        configure_batch_limits(web_searches_per_minute=30)
+        created = throttle.get_engine_guard("batch-created-test", rate=10.0, burst=5)
+        for guard in (existing, created):
+            assert (guard.bucket.rate, guard.bucket.capacity) == (0.5, 1)
+        assert "ENGLISHY_WEB_SEARCH_RATE" not in os.environ
+    finally:
+        throttle.configure_engine_rate(None)
@@ -0,0 +1,131 @@
+"""
+Test cases for the incremental DSPy field-marker parser.
+"""
+
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.utils.field_parser import FieldMarkerParser
+from src.ai.utils.stream_writer import StreamLineWriter
+
+
+COMPLETION = (
+    "[[ ## answer ## ]]\nThe subjunctive, e.g., \"If I were\" is used. It costs 3.5 points!\n"
+    "Second paragraph。次の文。\n\n"
+    "[[ ## notes ## ]]\nKeep [[ ## unknown ## ]] and [[ brackets ]].\n\n"
+    "[[ ## completed ## ]]"
+)
+FIELDS = ["answer", "notes", "completed"]
+
+
+def _parse(pieces, granularity="token", fields=FIELDS):
+    parser = FieldMarkerParser(fields, granularity=granularity)
+    events = []
+    for piece in pieces:
+        events.extend(parser.feed(piece))
+    events.extend(parser.close())
+    return parser, events
+
+
+def _splits(text):
+    # 2か所で区切ったすべての分割
+    for i in range(0, len(text), 3):
+        for j in range(i, len(text), 11):
+            yield [text[:i], text[i:j], text[j:]]
+
+
+class TestFieldMarkerParser:
+    """FieldMarkerParserのテスト"""
+
+    def test_markers_removed_at_any_chunk_boundary(self):
+        """マーカーがどこで分割されても取り除かれ、フィールドごとに振り分けられることを確認"""
+        _, reference = _parse([COMPLETION])
+        expected = {field: "".join(e.text for e in reference if e.field == field) for field in ("answer", "notes")}
+        assert expected["answer"].startswith("\nThe subjunctive")
+        assert expected["notes"] == "\nKeep [[ ## unknown ## ]] and [[ brackets ]].\n\n"
+
+        for pieces in _splits(COMPLETION):
+            parser, events = _parse(pieces)
+            assert "".join(e.text for e in events) == "".join(e.text for e in reference)
+            assert {field: parser.values[field] for field in ("answer", "notes")} == expected
+            assert "[[ ## answer" not in "".join(e.text for e in events)
+
+    def test_sentence_events_independent_of_chunking(self):
+        """文単位のイベント列が差分の区切り方によらず同じになることを確認"""
+        _, reference = _parse([COMPLETION], granularity="sentence")
+        assert [e.text for e in reference if e.field == "answer"] == [
+            "\n",
+            "The subjunctive, e.g., \"If I were\" is used. ",
+            "It costs 3.5 points!\n",
+            "Second paragraph。",
+            "次の文。\n\n",
+        ]
+        for pieces in _splits(COMPLETION):
+            assert _parse(pieces, granularity="sentence")[1] == reference
+        # 1文字ずつでも同じ
+        assert _parse(list(COMPLETION), granularity="sentence")[1] == reference
+
+    def test_line_events(self):
+        """行単位では改行ごとにイベントを返すことを確認"""
+        _, events = _parse(["[[ ## answer ## ]]\nline one\nline", " two\nthree"], granularity="line", fields=["answer"])
+        assert [e.text for e in events] == ["\n", "line one\n", "line two\n", "three"]
+
+    def test_preamble_and_any_field_name(self):
+        """最初のマーカーより前はNone、フィールド名未指定なら任意の名前を扱うことを確認"""
+        parser, events = _parse(["Sure.\n[[ ## foo_bar ## ]]\nvalue"], fields=None)
+        assert [(e.field, e.text) for e in events] == [(None, "Sure.\n"), ("foo_bar", "\nvalue")]
+
+    def test_pending_is_bounded(self):
+        """保留される文字列がマーカー長を超えないことを確認"""
+        parser = FieldMarkerParser(FIELDS)
+        for char in "[[ ## not a marker at all, just text ## ]] " * 50:
+            parser.feed(char)
+            assert len(parser._pending) <= parser._max_marker_length
+
+    def test_invalid_granularity(self):
+        """未知の単位はエラーになることを確認"""
+        with pytest.raises(ValueError):
+            FieldMarkerParser(FIELDS, granularity="word")
+
+
+class AnswerWithNotes(dspy.Signature):
+    question = dspy.InputField()
+    answer = dspy.OutputField()
+    notes = dspy.OutputField()
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.choices = [{"delta": {"content": content}}]
+        self.usage = None
+
+
+def test_stream_events_split_fields():
+    """複数フィールドのシグネチャをストリーミング中に分割できることを確認"""
+    pieces = [COMPLETION[i:i + 5] for i in range(0, len(COMPLETION), 5)]
+
+    async def acompletion(**kwargs):
+        async def stream():
+            for piece in pieces:
+                yield FakeChunk(piece)
+        return stream()
+
+    lm = dspy.LM("openai/gpt-4o-mini", api_key="x", temperature=0.0, cache=False)
+    writer = StreamLineWriter(lm=lm, signature_cls=AnswerWithNotes)
+
+    async def run():
+        return [event async for event in writer.stream_events({"question": "q"}, granularity="sentence")]
+
+    with patch("litellm.acompletion", acompletion):
+        events = asyncio.run(run())
+
+    assert "".join(e.text for e in events if e.field == "notes").strip() == "Keep [[ ## unknown ## ]] and [[ brackets ]]."
+    assert events[1].text == "The subjunctive, e.g., \"If I were\" is used. "
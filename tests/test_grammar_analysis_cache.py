@@ -0,0 +1,136 @@
+"""
+Test cases for the per-run grammar-analysis context and the shared LRU.
+"""
+
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai import grammar_analysis_cache
+from src.ai.grammar_analysis_cache import (
+    GrammarAnalysisCache,
+    analysis_context,
+    cached_analysis,
+    normalize_text,
+)
+from src.ai.grammar_analyzer import GrammarAnalyzer
+
+
+@pytest.fixture
+def cache():
+    """テストごとに新しい共有キャッシュを使う"""
+    cache = GrammarAnalysisCache(max_entries=2)
+    with patch.object(grammar_analysis_cache, "_cache", cache):
+        yield cache
+
+
+class Counter:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        return {"grammar_structures": [text], "key_points": []}
+
+
+def test_normalize_text():
+    """空白の違いだけのテキストが同じキーになり、大文字小文字は区別されることを確認"""
+    assert normalize_text("  If I were\n a bird.  ") == "If I were a bird."
+    assert normalize_text("If I Were") != normalize_text("if i were")
+
+
+def test_shared_lru_and_copies(cache):
+    """正規化したテキストごとに1回だけ解析し、結果はコピーで返すことを確認"""
+    analyze = Counter()
+    first = cached_analysis("rule", "If I were a bird.", analyze)
+    first["grammar_structures"].append("mutated")
+    second = cached_analysis("rule", " If I were\ta bird. ", analyze)
+
+    assert analyze.texts == ["If I were a bird."]
+    assert second == {"grammar_structures": ["If I were a bird."], "key_points": []}
+    # 解析器の種類が違えば別のキー
+    cached_analysis("llm:gpt-4o", "If I were a bird.", analyze)
+    assert len(analyze.texts) == 2
+
+
+def test_lru_eviction(cache):
+    """上限を超えると最も古いものから追い出されることを確認"""
+    analyze = Counter()
+    for text in ("a", "b", "a", "c", "a", "b"):
+        cached_analysis("rule", text, analyze)
+    assert analyze.texts == ["a", "b", "c", "b"]
+    assert cache.stats() == {"hits": 2, "misses": 4, "evictions": 2, "size": 2}
+
+
+def test_run_context_outlives_eviction(cache):
+    """実行コンテキスト内ではLRUから追い出されても再解析しないことを確認"""
+    analyze = Counter()
+    with analysis_context() as results:
+        for text in ("a", "b", "c", "a", "b", "c"):
+            cached_analysis("rule", text, analyze)
+        assert len(results) == 3
+    assert analyze.texts == ["a", "b", "c"]
+
+    # コンテキストの外では共有キャッシュだけが使われる
+    cached_analysis("rule", "a", analyze)
+    assert analyze.texts == ["a", "b", "c", "a"]
+
+
+def test_run_only_results(cache):
+    """shared=Falseの結果と失敗した結果は実行をまたいで再利用しないことを確認"""
+    analyze = Counter()
+    with analysis_context():
+        cached_analysis("llm", "a", analyze, shared=False)
+        cached_analysis("llm", "a", analyze, shared=False)
+    with analysis_context():
+        cached_analysis("llm", "a", analyze, shared=False)
+    assert analyze.texts == ["a", "a"]
+    assert cache.stats()["size"] == 0
+
+    failures = []
+
+    def failing(text):
+        failures.append(text)
+        return {"grammar_structures": [], "error": "timeout"}
+
+    with analysis_context():
+        cached_analysis("llm", "b", failing, shared=False)
+        cached_analysis("llm", "b", failing, shared=False)
+    assert failures == ["b", "b"]
+
+
+def test_context_shared_with_tasks_and_threads(cache):
+    """実行内のタスクやスレッドから同じコンテキストを使えることを確認"""
+    analyze = Counter()
+
+    async def run():
+        with analysis_context():
+            await asyncio.gather(*[
+                asyncio.to_thread(cached_analysis, "rule", text, analyze) for text in ("x", "y")
+            ])
+            # 共有キャッシュを空にしても実行内の結果が使われる
+            cache.clear()
+            await asyncio.gather(*[
+                asyncio.to_thread(cached_analysis, "rule", text, analyze) for text in ("x", "y")
+            ])
+
+    asyncio.run(run())
+    assert sorted(analyze.texts) == ["x", "y"]
+
+
+def test_grammar_analyzer_uses_cache(cache):
+    """GrammarAnalyzer.analyze_textが同じテキストを再解析しないことを確認"""
+    analyzer = GrammarAnalyzer()
+    with patch.object(GrammarAnalyzer, "_analyze_text", wraps=analyzer._analyze_text) as analyze:
+        first = analyzer.analyze_text("仮定法過去と受動態の例文について")
+        second = analyzer.analyze_text("仮定法過去と受動態の例文について\n")
+
+    assert analyze.call_count == 1
+    assert first == second
+    assert any("subjunctive" in s for s in first["grammar_structures"])
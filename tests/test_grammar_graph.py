@@ -0,0 +1,142 @@
+"""
+Test cases for the GrammarDictionary related-links graph and learning-path queries.
+"""
+
+import json
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.grammar_analyzer import GrammarAnalyzer
+from ai.grammar_dictionary import GrammarDictionary
+from ai.grammar_graph import GrammarGraph
+
+
+def _item(filename, title, links=(), summary=""):
+    return {
+        "filename": filename,
+        "title": title,
+        "summary": summary or title,
+        "tags": [],
+        "content": "",
+        "related_links": [{"file": link, "text": link} for link in links],
+    }
+
+
+# リンク先は前提となる項目: 仮定法過去完了 → 仮定法過去 → 過去形 → be動詞
+ITEMS = [
+    _item("be.md", "be動詞"),
+    _item("past.md", "過去形", ["be.md"]),
+    _item("subjunctive.md", "仮定法過去", ["past.md", "aux.md"]),
+    _item("subjunctive_perfect.md", "仮定法過去完了", ["subjunctive.md", "perfect.md", "missing.md"]),
+    _item("perfect.md", "現在完了", ["past.md", "perfect.md"]),
+    _item("aux.md", "助動詞", ["be.md"]),
+    _item("relative.md", "関係代名詞"),
+]
+
+
+def _write(tmp_path, items):
+    path = tmp_path / "english_grammar_data.json"
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    return GrammarDictionary(data_path=str(tmp_path))
+
+
+def _titles(items):
+    return [item["title"] for item in items]
+
+
+class TestGrammarGraph:
+    """GrammarGraphのテスト"""
+
+    def test_edges_and_degrees(self):
+        """存在しないリンク先と自己ループを除いて隣接リストと次数を作ることを確認"""
+        graph = GrammarGraph(ITEMS)
+        assert graph.find("perfect.md") == 4
+        assert graph.find("missing.md") is None
+        assert graph.out_edges[3] == [2, 4]
+        assert graph.out_edges[4] == [1]
+        assert graph.in_degree[0] == 2 and graph.in_degree[1] == 2
+        assert graph.out_degree[6] == 0 and graph.in_degree[6] == 0
+
+    def test_neighbourhood(self):
+        """kホップ以内の項目を距離付きで返すことを確認"""
+        graph = GrammarGraph(ITEMS)
+        assert graph.neighbourhood([3], k=1, directed=True) == {3: 0, 2: 1, 4: 1}
+        assert graph.neighbourhood([3], k=2, directed=True) == {3: 0, 2: 1, 4: 1, 1: 2, 5: 2}
+        assert graph.neighbourhood([0], k=1) == {0: 0, 1: 1, 5: 1}
+        assert graph.related([0], k=2) == [1, 5, 2, 4]
+
+    def test_paths(self):
+        """最短の経路と学習順を返し、たどれない場合はNoneになることを確認"""
+        graph = GrammarGraph(ITEMS)
+        assert graph.shortest_path(3, 0) == [3, 2, 1, 0]
+        assert graph.prerequisite_path(3, 0) == [0, 1, 2, 3]
+        assert graph.shortest_path(0, 3) is None
+        assert graph.shortest_path(6, 0) is None
+
+    def test_study_order(self):
+        """前提が先に来て、循環があっても全項目を返すことを確認"""
+        graph = GrammarGraph(ITEMS)
+        assert graph.study_order([3, 2, 1, 0, 5]) == [0, 1, 5, 2, 3]
+
+        cycle = GrammarGraph([_item("a.md", "A", ["b.md"]), _item("b.md", "B", ["a.md"]), _item("c.md", "C", ["a.md"])])
+        order = cycle.study_order([2, 1, 0])
+        assert sorted(order) == [0, 1, 2]
+        assert order.index(2) > order.index(0)
+
+
+class TestDictionaryQueries:
+    """GrammarDictionaryのグラフを使う検索のテスト"""
+
+    def test_related_topics(self, tmp_path):
+        """検索結果とその関連リンク先を重複なしで最大5件返すことを確認"""
+        dictionary = _write(tmp_path, ITEMS)
+        assert _titles(dictionary.get_related_topics("仮定法過去")) == ["仮定法過去", "過去形", "助動詞", "仮定法過去完了", "現在完了"]
+        assert dictionary._find_by_filename("aux.md")["title"] == "助動詞"
+        assert dictionary._find_by_filename("missing.md") is None
+
+    def test_learning_path_queries(self, tmp_path):
+        """近傍、前提の経路、学習順をトピック名から求められることを確認"""
+        dictionary = _write(tmp_path, ITEMS)
+        assert _titles(dictionary.get_neighbourhood(["仮定法過去完了"], k=1)) == ["仮定法過去", "現在完了"]
+        assert _titles(dictionary.get_prerequisite_path("仮定法過去完了", "be動詞")) == ["be動詞", "過去形", "仮定法過去", "仮定法過去完了"]
+        assert dictionary.get_prerequisite_path("be動詞", "関係代名詞") == []
+        assert _titles(dictionary.get_study_order(["仮定法過去", "過去形", "存在しない"])) == ["過去形", "仮定法過去"]
+
+    def test_learning_path_order(self, tmp_path):
+        """学習パスがレベル順、同じレベルでは前提が先の順に並ぶことを確認"""
+        analyzer = GrammarAnalyzer()
+        analyzer.grammar_dict = _write(tmp_path, ITEMS)
+        path = analyzer.get_learning_path(["仮定法過去完了", "関係代名詞", "仮定法過去", "be動詞", "past simple"])
+        assert [entry["title"] for entry in path] == ["be動詞", "仮定法過去", "仮定法過去完了", "関係代名詞"]
+        assert path[1]["related_items"] == ["past.md", "aux.md"]
+        assert "_index" not in path[0]
+
+    def test_empty_dictionary(self, tmp_path):
+        """データがない場合も空の結果を返すことを確認"""
+        dictionary = GrammarDictionary(data_path=str(tmp_path / "missing"))
+        assert dictionary.get_related_topics("仮定法") == []
+        assert dictionary.get_neighbourhood(["仮定法"]) == []
+        assert dictionary.get_study_order(["仮定法"]) == []
+
+
+def test_large_graph_queries():
+    """数千項目のグラフでも経路が辺をたどる最短経路になり、学習順が前提を守ることを確認"""
+    count = 5000
+    items = [_item(f"{i}.md", f"item {i}", [f"{j}.md" for j in (i // 2, i // 3, i - 1) if j >= 0]) for i in range(count)]
+    graph = GrammarGraph(items)
+
+    assert sum(graph.out_degree) == sum(graph.in_degree) == sum(len(edges) for edges in graph.out_edges)
+    for i in range(count - 100, count):
+        path = graph.shortest_path(i, 0)
+        assert path[0] == i and path[-1] == 0
+        assert all(b in graph.out_edges[a] for a, b in zip(path, path[1:]))
+        assert len(path) - 1 == graph.neighbourhood([i], k=count, directed=True)[0]
+        assert len(graph.related([i], k=2, limit=5)) == 5
+
+    order = graph.study_order(range(count - 1, -1, -1))
+    position = {node: rank for rank, node in enumerate(order)}
+    assert len(order) == count
+    assert all(position[target] < position[node] for node in range(count) for target in graph.out_edges[node])
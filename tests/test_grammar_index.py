@@ -0,0 +1,117 @@
+"""
+Test cases for the GrammarDictionary inverted index and ranked search.
+"""
+
+import json
+import random
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.grammar_dictionary import GrammarDictionary
+
+
+ITEMS = [
+    {"title": "受動態の基本", "tags": ["受動態", "be動詞"], "summary": "be + 過去分詞で受け身を表す", "content": "The letter was written by him.", "filename": "passive.md"},
+    {"title": "仮定法過去", "tags": ["仮定法", "subjunctive"], "summary": "現在の事実に反する仮定", "content": "If I were a bird, I would fly. 受動態とは異なる。", "filename": "subjunctive.md"},
+    {"title": "Subjunctive Mood", "tags": ["subjunctive mood"], "summary": "English subjunctive", "content": "I wish I were taller.", "filename": "subjunctive_en.md"},
+    {"title": "受動態", "tags": ["passive voice"], "summary": "受動態のまとめ", "content": "Passive voice summary.", "filename": "passive_summary.md"},
+    {"title": "関係代名詞", "tags": ["relative pronoun"], "summary": "who / which / that", "content": "The man who lives here.", "filename": "relative.md"},
+]
+
+
+def _write(tmp_path, items):
+    path = tmp_path / "english_grammar_data.json"
+    path.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    return GrammarDictionary(data_path=str(tmp_path))
+
+
+def _reference_search(items, keyword):
+    # 以前の実装: 毎回すべての項目を連結・小文字化して部分一致を調べる
+    keyword_lower = keyword.lower()
+    return [
+        item for item in items
+        if keyword_lower in f"{item.get('title', '')} {' '.join(item.get('tags', []))} {item.get('summary', '')} {item.get('content', '')}".lower()
+    ]
+
+
+def _synthetic_items(count, seed=0):
+    rng = random.Random(seed)
+    words = "subjunctive passive voice relative pronoun infinitive gerund tense perfect continuous 仮定法 受動態 不定詞 動名詞 比較級 関係代名詞 例文 用法 基本 応用".split()
+    return [
+        {
+            "title": f"{rng.choice(words)} {rng.choice(words)} {i}",
+            "tags": rng.sample(words, 3),
+            "summary": " ".join(rng.choice(words) for _ in range(10)),
+            "content": " ".join(rng.choice(words) for _ in range(150)),
+            "filename": f"item_{i}.md",
+        }
+        for i in range(count)
+    ]
+
+
+class TestKeywordSearch:
+    """search_by_keywordのテスト"""
+
+    def test_same_matches_as_full_scan(self, tmp_path):
+        """結果の集合が全件走査と同じになることを確認"""
+        items = _synthetic_items(300)
+        dictionary = _write(tmp_path, items)
+        for keyword in ["受動態", "Passive", "ve r", "a", "用法 基", "item", "存在しない", "e 1"]:
+            expected = [item["filename"] for item in _reference_search(items, keyword)]
+            actual = [item["filename"] for item in dictionary.search_by_keyword(keyword)]
+            assert sorted(actual) == sorted(expected), keyword
+
+    def test_ranked_by_field_weight(self, tmp_path):
+        """タイトルの完全一致、タイトル、タグ、本文の順に並ぶことを確認"""
+        dictionary = _write(tmp_path, ITEMS)
+        assert [item["filename"] for item in dictionary.search_by_keyword("受動態")] == [
+            "passive_summary.md", "passive.md", "subjunctive.md"
+        ]
+        assert dictionary.search_by_keyword("SUBJUNCTIVE")[0]["filename"] == "subjunctive_en.md"
+        assert dictionary.get_grammar_explanation("受動態") == "Passive voice summary."
+
+    def test_tags_and_empty(self, tmp_path):
+        """タグ検索はファイル内の順で、空の辞書でも動くことを確認"""
+        dictionary = _write(tmp_path, ITEMS)
+        assert [item["filename"] for item in dictionary.search_by_tags(["PASSIVE VOICE", "仮定法"])] == [
+            "subjunctive.md", "passive_summary.md"
+        ]
+        empty = GrammarDictionary(data_path=str(tmp_path / "missing"))
+        assert empty.search_by_keyword("受動態") == []
+        assert empty.search_by_prefix("受") == []
+
+
+class TestPrefixSearch:
+    """search_by_prefixのテスト"""
+
+    def test_prefix(self, tmp_path):
+        """タイトル、タグ、タイトル中の語の接頭辞で検索できることを確認"""
+        dictionary = _write(tmp_path, ITEMS)
+        assert [item["filename"] for item in dictionary.search_by_prefix("受動")] == ["passive_summary.md", "passive.md"]
+        assert [item["filename"] for item in dictionary.search_by_prefix("subj")] == ["subjunctive_en.md", "subjunctive.md"]
+        assert [item["filename"] for item in dictionary.search_by_prefix("mood")] == ["subjunctive_en.md"]
+        assert dictionary.search_by_prefix("subj", limit=1)[0]["filename"] == "subjunctive_en.md"
+
+
+def test_lookup_checks_few_candidates(tmp_path):
+    """項目が増えても絞り込める検索は少数の候補だけを調べ、繰り返しの検索はキャッシュから返ることを確認"""
+    items = _synthetic_items(3000)
+    dictionary = _write(tmp_path, items)
+
+    for item in items[::300]:
+        before = dictionary.index.stats()["candidates_checked"]
+        results = dictionary.search_by_keyword(item["title"])
+        assert results[0] is dictionary.grammar_data[items.index(item)]
+        assert dictionary.index.stats()["candidates_checked"] - before < 10
+
+    # 多くの項目に一致する語も2回目以降は候補を調べ直さない
+    dictionary.search_by_keyword("subjunctive")
+    before = dictionary.index.stats()
+    for _ in range(100):
+        dictionary.search_by_keyword("subjunctive")
+    after = dictionary.index.stats()
+    assert after["cache_hits"] - before["cache_hits"] == 100
+    assert after["candidates_checked"] == before["candidates_checked"]
@@ -0,0 +1,117 @@
+"""
+Test cases for the compiled grammar label matcher, with an opt-in micro-benchmark on long web pages.
+"""
+
+import random
+import re
+import sys
+import os
+import time
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ai.english_extractor import GRAMMAR_STRUCTURE_PATTERNS
+from ai.grammar_analyzer import TRADITIONAL_GRAMMAR_PATTERNS
+from ai.grammar_utils import (
+    GrammarLabelMatcher,
+    english_grammar_patterns,
+    extract_grammar_labels,
+    grammar_en_map,
+    translate_to_english_grammar,
+)
+
+
+def _reference_labels(text, patterns=english_grammar_patterns, terms=grammar_en_map):
+    # 以前の実装: 呼び出しごとに表を並べ替え、パターンを1つずつ検索する
+    labels = set()
+    for jp, en in sorted(terms.items(), key=lambda x: -len(x[0])):
+        if jp in text:
+            labels.add(en)
+    for en in terms.values():
+        if en in text:
+            labels.add(en)
+    for structure_name, pattern_list in patterns.items():
+        for pattern in pattern_list:
+            if re.search(pattern, text, re.IGNORECASE):
+                labels.add(structure_name)
+                break
+    return labels
+
+
+WORDS = (
+    "The the a cat walked Walking is was Were have HAS had been to To if If would could should might wish hope "
+    "who Which that whose will can may must am are played loved running 仮定法過去 受動態 受け身 比較級 "
+    "passive voice subjunctive mood there is/are construction , . ! \n"
+).split(" ")
+
+
+def _random_texts(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 25)))
+
+
+def _web_page(words=20000, seed=1):
+    # 文法パターンの少ない長いページ（ナビゲーションや定型文が中心）
+    rng = random.Random(seed)
+    boilerplate = "home about contact menu privacy policy copyright news article page site content login search".split()
+    return " ".join(rng.choice(boilerplate) for _ in range(words)) + ". He has been studying. If I were you."
+
+
+class TestGrammarLabelMatcher:
+    """GrammarLabelMatcherのテスト"""
+
+    def test_same_labels_as_reference(self):
+        """以前の実装と同じラベルを検出することを確認"""
+        for text in _random_texts(3000):
+            assert set(extract_grammar_labels(text)) == _reference_labels(text), text
+
+    def test_traditional_tables(self):
+        """GrammarAnalyzerとEnglishExtractorの表でも同じ結果になることを確認"""
+        for patterns in (TRADITIONAL_GRAMMAR_PATTERNS, GRAMMAR_STRUCTURE_PATTERNS):
+            matcher = GrammarLabelMatcher(patterns)
+            for text in _random_texts(1000, seed=2):
+                assert set(matcher.find_patterns(text)) == _reference_labels(text, patterns, {}), text
+            # 結果は表の順
+            labels = matcher.find_patterns("I wish I were walking to school with friends who have finished.")
+            assert labels == [label for label in patterns if label in labels]
+
+    def test_translate(self):
+        """文法語の変換が以前と同じであることを確認"""
+        assert translate_to_english_grammar("仮定法過去と受け身") == "passive voice subjunctive mood"
+        assert translate_to_english_grammar("一般的な文") == "一般的な文"
+
+    def test_anchor_requires_whole_word(self):
+        """先頭の単語が語の一部である場合は一致しないことを確認"""
+        matcher = GrammarLabelMatcher({"infinitive": [r"\bto\s+\w+\b"], "prefix": [r"\btoo\w*"]})
+        assert matcher.find_patterns("A toolbox, toward it") == ["prefix"]
+        assert matcher.find_patterns("Went TO school") == ["infinitive"]
+
+
+def test_long_web_page_matches_reference():
+    """長いWebページでも以前の実装と同じラベルを返すことを確認"""
+    page = _web_page()
+    assert set(extract_grammar_labels(page)) == _reference_labels(page)
+
+
+@pytest.mark.skipif(not os.getenv("ENGLISHY_RUN_BENCHMARKS"), reason="set ENGLISHY_RUN_BENCHMARKS=1 to run benchmarks")
+def test_benchmark_long_web_page():
+    """長いWebページで以前の実装より速いことを確認するマイクロベンチマーク"""
+    page = _web_page()
+
+    def best_of(func, runs=5):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func(page)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    reference = best_of(_reference_labels)
+    compiled = best_of(extract_grammar_labels)
+    assert compiled * 2 < reference, (
+        f"long page ({len(page)} chars): reference {reference * 1000:.1f} ms, compiled {compiled * 1000:.1f} ms"
+    )
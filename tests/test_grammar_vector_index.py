@@ -0,0 +1,171 @@
+"""
+Test cases for the GrammarDictionary semantic vector index and the refiner's k-NN matching.
+"""
+
+import json
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai import grammar_vector_index, query_refiner
+from src.ai.grammar_vector_index import GrammarVectorIndex, get_grammar_vector_index, vectors_path_for
+from src.ai.query_refiner import GrammarAwareQueryRefiner
+from src.utils.mock_llm_server import embed_text
+
+
+class CountingEncoder:
+    """モックサーバーと同じ語の袋の埋め込みを返し、埋め込んだテキストを記録するエンコーダー"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode_texts(self, texts):
+        self.calls.append(list(texts))
+        return [embed_text(text) for text in texts]
+
+
+ITEMS = [
+    {"title": "Subjunctive Mood", "tags": ["subjunctive", "if I were"], "summary": "unreal conditions and wishes"},
+    {"title": "Passive Voice", "tags": ["passive"], "summary": "be plus past participle"},
+    {"title": "Relative Pronoun", "tags": ["who", "which"], "summary": "relative clause with who or which"},
+    {"title": "Gerund", "tags": ["ing form"], "summary": "verb ing used as a noun"},
+]
+
+
+class FailingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode_texts(self, texts):
+        self.calls += 1
+        raise RuntimeError("no embeddings")
+
+
+@pytest.fixture(autouse=True)
+def clear_indexes():
+    grammar_vector_index._vector_indexes.clear()
+    grammar_vector_index._failed_until.clear()
+    yield
+    grammar_vector_index._vector_indexes.clear()
+    grammar_vector_index._failed_until.clear()
+
+
+def _write_dictionary(tmp_path, monkeypatch):
+    json_path = tmp_path / "english_grammar_data.json"
+    json_path.write_text(json.dumps(ITEMS), encoding="utf-8")
+    monkeypatch.setattr(query_refiner, "GRAMMAR_DICTIONARY_FILE", str(json_path))
+    return json_path
+
+
+class TestGrammarVectorIndex:
+    """GrammarVectorIndexのテスト"""
+
+    def test_batched_knn(self, tmp_path):
+        """複数の文法構造を1回の埋め込み呼び出しで検索し、近い項目を返すことを確認"""
+        encoder = CountingEncoder()
+        index = GrammarVectorIndex(ITEMS, encoder, tmp_path / "vectors.npz")
+        assert index.embedded_count == 4
+
+        matches = index.search_many(["unreal conditions", "passive past participle", "zzz"], k=2)
+        assert len(encoder.calls) == 2 and len(encoder.calls[1]) == 3
+        assert matches[0][0][0] == 0
+        assert matches[1][0][0] == 1
+        assert matches[2] == []
+        assert all(score >= grammar_vector_index.DEFAULT_MIN_SCORE for row in matches for _, score in row)
+
+    def test_embeds_in_chunks(self, tmp_path):
+        """項目をbatch_sizeごとに分けて埋め込むことを確認"""
+        encoder = CountingEncoder()
+        index = GrammarVectorIndex(ITEMS, encoder, tmp_path / "vectors.npz", batch_size=3)
+        assert [len(call) for call in encoder.calls] == [3, 1]
+        assert index.embedded_count == 4
+
+    def test_vectors_reused_across_processes(self, tmp_path):
+        """保存した埋め込みを再利用し、変わった項目だけを埋め込み直すことを確認"""
+        path = tmp_path / "vectors.npz"
+        first = GrammarVectorIndex(ITEMS, CountingEncoder(), path)
+
+        encoder = CountingEncoder()
+        second = GrammarVectorIndex(ITEMS, encoder, path)
+        assert second.embedded_count == 0 and encoder.calls == []
+        assert np.allclose(second.vectors, first.vectors)
+
+        changed = ITEMS[:3] + [{**ITEMS[3], "summary": "verb ing as a noun"}]
+        encoder = CountingEncoder()
+        third = GrammarVectorIndex(changed, encoder, path)
+        assert third.embedded_count == 1 and len(encoder.calls[0]) == 1
+
+        other_model = GrammarVectorIndex(ITEMS, CountingEncoder(), path, model="other")
+        assert other_model.embedded_count == 4
+
+    def test_empty_and_shared(self, tmp_path):
+        """空のデータでも動き、同じデータファイルのインデックスはプロセス内で共有されることを確認"""
+        empty = GrammarVectorIndex([], CountingEncoder(), tmp_path / "empty.npz")
+        assert empty.search_many(["passive"]) == [[]]
+
+        json_path = tmp_path / "english_grammar_data.json"
+        assert vectors_path_for(json_path) == tmp_path / "english_grammar_data.embeddings.npz"
+        index = get_grammar_vector_index(ITEMS, json_path, encoder=CountingEncoder(), build=True)
+        assert get_grammar_vector_index(ITEMS, json_path, encoder=CountingEncoder()) is index
+        assert vectors_path_for(json_path).exists()
+
+    def test_load_only_uses_saved_vectors(self, tmp_path):
+        """build=Falseでは保存済みの埋め込みだけを読み込み、項目を埋め込まないことを確認"""
+        json_path = tmp_path / "english_grammar_data.json"
+        encoder = CountingEncoder()
+        assert get_grammar_vector_index(ITEMS, json_path, encoder=encoder) is None
+        assert encoder.calls == []
+
+        GrammarVectorIndex(ITEMS, CountingEncoder(), vectors_path_for(json_path))
+        grammar_vector_index._failed_until.clear()
+        index = get_grammar_vector_index(ITEMS, json_path, encoder=encoder)
+        assert index is not None and index.embedded_count == 0 and encoder.calls == []
+
+    def test_failed_build_is_remembered(self, tmp_path, monkeypatch):
+        """失敗した構築は再試行までの間、埋め込みを呼ばずにNoneを返すことを確認"""
+        json_path = tmp_path / "english_grammar_data.json"
+        encoder = FailingEncoder()
+        assert get_grammar_vector_index(ITEMS, json_path, encoder=encoder, build=True) is None
+        assert get_grammar_vector_index(ITEMS, json_path, encoder=encoder) is None
+        assert encoder.calls == 1
+
+        monkeypatch.setattr(grammar_vector_index, "FAILED_BUILD_RETRY_AFTER", 0.0)
+        grammar_vector_index._failed_until.clear()
+        assert get_grammar_vector_index(ITEMS, json_path, encoder=CountingEncoder(), build=True) is not None
+
+
+class TestRefinerMatching:
+    """GrammarAwareQueryRefinerの辞書照合のテスト"""
+
+    def test_semantic_match(self, tmp_path, monkeypatch):
+        """部分一致しない言い換えも近い項目に照合され、照合時には辞書を埋め込まないことを確認"""
+        json_path = _write_dictionary(tmp_path, monkeypatch)
+        GrammarVectorIndex(ITEMS, CountingEncoder(), vectors_path_for(json_path))
+        encoder = CountingEncoder()
+        refiner = GrammarAwareQueryRefiner(lm=None, encoder=encoder)
+        assert encoder.calls == []
+
+        related = refiner._match_with_grammar_dictionary(["unreal conditions", "clause with who"])
+        assert [(item["title"], item["matched_structure"]) for item in related][:1] == [("Subjunctive Mood", "unreal conditions")]
+        assert ("Relative Pronoun", "clause with who") in [(item["title"], item["matched_structure"]) for item in related]
+        assert refiner._match_by_substring(["unreal conditions"]) == []
+        assert [len(call) for call in encoder.calls] == [2]
+
+    def test_fallback_to_substring(self, tmp_path, monkeypatch):
+        """保存済みの埋め込みがない場合や埋め込みが失敗した場合は部分一致で照合することを確認"""
+        json_path = _write_dictionary(tmp_path, monkeypatch)
+        encoder = CountingEncoder()
+        refiner = GrammarAwareQueryRefiner(lm=None, encoder=encoder)
+        assert refiner.vector_index is None
+        assert [item["title"] for item in refiner._match_with_grammar_dictionary(["passive voice"])] == ["Passive Voice"]
+        assert encoder.calls == []
+
+        refiner.vector_index = GrammarVectorIndex(ITEMS, CountingEncoder(), vectors_path_for(json_path))
+        refiner.vector_index.encoder = FailingEncoder()
+        assert [item["title"] for item in refiner._match_with_grammar_dictionary(["passive voice"])] == ["Passive Voice"]
+        assert refiner._match_with_grammar_dictionary([]) == []
@@ -0,0 +1,157 @@
+"""
+Test cases for the shared, pooled HTTP clients.
+"""
+
+import asyncio
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils import http_client
+from src.utils.http_client import (
+    AsyncHostLimitedTransport,
+    HostLimitedTransport,
+    connection_close_headers,
+    create_async_http_client,
+    create_http_client,
+    get_async_http_client,
+    get_async_openai_client,
+    get_openai_client,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    _Handler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def test_sync_client_reuses_connections():
+    """同期クライアントがkeep-aliveで接続を再利用することを確認"""
+    server, url = _serve()
+    try:
+        with create_http_client() as client:
+            for _ in range(5):
+                assert client.get(url).text == "ok"
+    finally:
+        server.shutdown()
+    assert len(_Handler.connections) == 1
+
+
+def test_async_client_reuses_connections():
+    """非同期クライアントがkeep-aliveで接続を再利用することを確認"""
+    server, url = _serve()
+
+    async def run():
+        async with create_async_http_client() as client:
+            for _ in range(5):
+                assert (await client.get(url)).text == "ok"
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+    assert len(_Handler.connections) == 1
+
+
+def test_connection_close_opt_in(monkeypatch):
+    """ENGLISHY_HTTP_CONNECTION_CLOSE=1 で接続を毎回閉じることを確認"""
+    assert connection_close_headers() == {}
+    monkeypatch.setenv("ENGLISHY_HTTP_CONNECTION_CLOSE", "1")
+    assert connection_close_headers() == {"Connection": "close"}
+
+    server, url = _serve()
+    try:
+        with create_http_client() as client:
+            for _ in range(3):
+                client.get(url)
+    finally:
+        server.shutdown()
+    assert len(_Handler.connections) == 3
+
+
+def test_per_host_limit():
+    """ホストごとの同時リクエスト数が制限されることを確認"""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        threading.Event().wait(0.02)
+        with lock:
+            state["active"] -= 1
+        return httpx.Response(200, text="ok")
+
+    client = httpx.Client(transport=HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2))
+    threads = [threading.Thread(target=client.get, args=("http://example.com/",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert state["peak"] == 2
+
+
+def test_async_per_host_limit_holds_until_stream_closed():
+    """ストリーミング応答は本文を閉じるまで枠を保持することを確認"""
+
+    class ChunkStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            yield b"chunk"
+
+    async def handler(request):
+        return httpx.Response(200, stream=ChunkStream())
+
+    async def run():
+        transport = AsyncHostLimitedTransport(httpx.MockTransport(handler), max_per_host=1)
+        async with httpx.AsyncClient(transport=transport) as client:
+            async with client.stream("GET", "http://a.example/"):
+                # 本文を読み終える前は同じホストは待たされ、別ホストは待たされない
+                other_host = await asyncio.wait_for(client.get("http://b.example/"), 1)
+                assert other_host.status_code == 200
+                same_host = asyncio.ensure_future(client.get("http://a.example/"))
+                await asyncio.sleep(0.05)
+                assert not same_host.done()
+            assert (await asyncio.wait_for(same_host, 1)).status_code == 200
+
+    asyncio.run(run())
+
+
+def test_shared_clients():
+    """共有クライアントがプロセス内・イベントループ内で使い回されることを確認"""
+    assert get_openai_client(api_key="k") is get_openai_client(api_key="k")
+    assert get_openai_client(api_key="k") is not get_openai_client(api_key="other")
+
+    async def run():
+        first = get_async_openai_client(api_key="k")
+        assert get_async_openai_client(api_key="k") is first
+        assert get_async_http_client() is get_async_http_client()
+        await http_client.aclose_async_http_client()
+        return first
+
+    # イベントループが変われば非同期クライアントも作り直される
+    assert asyncio.run(run()) is not asyncio.run(run())
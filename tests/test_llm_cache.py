@@ -0,0 +1,111 @@
+"""
+Test cases for the persistent LLM completion cache.
+"""
+
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+
+import dspy
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.report_writer import StreamLeadWriter
+from src.utils.llm_cache import CachedLM, CompletionCache, is_cacheable
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.choices = [{"delta": {"content": content}}]
+
+
+def _fake_acompletion(pieces, calls):
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+
+        async def stream():
+            for piece in pieces:
+                yield FakeChunk(piece)
+        return stream()
+    return acompletion
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestCompletionCache:
+    """CompletionCacheのテスト"""
+
+    def test_key_ignores_transport_options(self, tmp_path):
+        """APIキーやリトライ設定がキーに影響しないことを確認"""
+        messages = [{"role": "user", "content": "hi"}]
+        key = CompletionCache.make_key("openai/m", messages, {"temperature": 0.0, "api_key": "a", "num_retries": 3})
+        assert key == CompletionCache.make_key("openai/m", messages, {"temperature": 0.0, "api_key": "b"})
+        assert key != CompletionCache.make_key("openai/m", messages, {"temperature": 0.0, "max_tokens": 10})
+        assert key != CompletionCache.make_key("openai/m", messages, {"temperature": 0.0}, signature="WriteLead")
+
+    def test_temperature_opt_out(self):
+        """temperature > 0 はキャッシュ対象外であることを確認"""
+        assert is_cacheable({"temperature": 0.0})
+        assert is_cacheable({})
+        assert not is_cacheable({"temperature": 0.7})
+
+
+class TestCachedLM:
+    """CachedLMのテスト"""
+
+    def test_predict_calls_are_cached(self, tmp_path):
+        """同一のdspy呼び出しが2回目以降キャッシュから返ることを確認"""
+        lm = CachedLM("openai/gpt-4o-mini", completion_cache=CompletionCache(str(tmp_path)), api_key="x", temperature=0.0, cache=False)
+        with patch.object(dspy.LM, "__call__", return_value=["[[ ## answer ## ]]\nyes\n\n[[ ## completed ## ]]"]) as call:
+            first = lm(messages=[{"role": "user", "content": "q"}])
+            second = lm(messages=[{"role": "user", "content": "q"}])
+            lm(messages=[{"role": "user", "content": "other"}])
+        assert first == second
+        assert call.call_count == 2
+
+    def test_sampling_is_not_cached(self, tmp_path):
+        """temperature > 0 の呼び出しは毎回実行されることを確認"""
+        lm = CachedLM("openai/gpt-4o-mini", completion_cache=CompletionCache(str(tmp_path)), api_key="x", temperature=0.9, cache=False)
+        with patch.object(dspy.LM, "__call__", return_value=["text"]) as call:
+            lm(messages=[{"role": "user", "content": "q"}])
+            lm(messages=[{"role": "user", "content": "q"}])
+        assert call.call_count == 2
+
+    def test_async_calls_are_cached(self, tmp_path):
+        """acallもキャッシュされることを確認"""
+        lm = CachedLM("openai/gpt-4o-mini", completion_cache=CompletionCache(str(tmp_path)), api_key="x", temperature=0.0, cache=False)
+
+        async def fake_acall(self, prompt=None, messages=None, **kwargs):
+            fake_acall.count += 1
+            return ["text"]
+        fake_acall.count = 0
+
+        with patch.object(dspy.LM, "acall", fake_acall):
+            for _ in range(2):
+                assert asyncio.run(lm.acall(messages=[{"role": "user", "content": "q"}])) == ["text"]
+        assert fake_acall.count == 1
+
+
+class TestStreamingCache:
+    """ストリーミングライターのキャッシュ再生のテスト"""
+
+    def test_replay_matches_live_stream(self, tmp_path):
+        """キャッシュ再生が同じ行単位の出力になることを確認"""
+        lm = CachedLM("openai/gpt-4o-mini", completion_cache=CompletionCache(str(tmp_path)), api_key="x", temperature=0.0, cache=False)
+        pieces = ["[[ ## lead ## ]]\nFirst li", "ne.\nSecond line.\n", "[[ ## completed ## ]]"]
+        calls = []
+        writer = StreamLeadWriter(lm=lm)
+
+        with patch("litellm.acompletion", _fake_acompletion(pieces, calls)):
+            live = asyncio.run(_collect(writer(query="q", title="t", draft="d")))
+            replayed = asyncio.run(_collect(writer(query="q", title="t", draft="d")))
+            asyncio.run(_collect(writer(query="other", title="t", draft="d")))
+
+        assert replayed == live
+        assert "".join(live).strip() == "First line.\nSecond line."
+        assert writer.get_generated_text() == "".join(live)
+        assert len(calls) == 2
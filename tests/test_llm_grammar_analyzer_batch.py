@@ -0,0 +1,134 @@
+"""
+Test cases for the async, batched LLMGrammarAnalyzer.
+"""
+
+import asyncio
+import json
+import re
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai import grammar_analysis_cache
+from src.ai.grammar_analysis_cache import GrammarAnalysisCache
+from src.ai.llm_grammar_analyzer import LLMGrammarAnalyzer
+
+
+def _response(data):
+    message = SimpleNamespace(content=json.dumps(data))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=10))
+
+
+def _analysis(text):
+    return {"grammar_structures": [f"structure of {text}"], "related_topics": "topic", "key_points": []}
+
+
+class FakeCompletions:
+    """入力テキストごとの解析結果をJSONで返し、リクエストを記録する"""
+
+    def __init__(self, drop_index=None, fail=False):
+        self.requests = []
+        self.drop_index = drop_index
+        self.fail = fail
+
+    def _reply(self, request):
+        self.requests.append(request)
+        if self.fail:
+            raise RuntimeError("boom")
+        prompt = request["messages"][0]["content"]
+        numbered = re.findall(r"^\[(\d+)\] (.*)$", prompt, re.MULTILINE)
+        if not numbered:
+            return _response(_analysis(re.search(r"Input text: (.*)", prompt).group(1)))
+        results = [{"index": int(i), **_analysis(text)} for i, text in numbered if int(i) != self.drop_index]
+        return _response({"results": results})
+
+    async def create(self, **request):
+        await asyncio.sleep(0)
+        return self._reply(request)
+
+
+class FakeClient:
+    def __init__(self, completions):
+        self.chat = SimpleNamespace(completions=completions)
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    """テストごとに新しい共有キャッシュを使う"""
+    cache = GrammarAnalysisCache()
+    with patch.object(grammar_analysis_cache, "_cache", cache):
+        yield cache
+
+
+def _analyzer(completions, **kwargs):
+    analyzer = LLMGrammarAnalyzer(api_key="x", **kwargs)
+    patcher = patch("src.ai.llm_grammar_analyzer.get_async_openai_client", lambda api_key=None: FakeClient(completions))
+    return analyzer, patcher
+
+
+def test_analyze_many_batches_and_caches():
+    """キャッシュにないテキストだけをバッチにまとめ、入力順に結果を返すことを確認"""
+    completions = FakeCompletions()
+    analyzer, patcher = _analyzer(completions, batch_size=2)
+    texts = ["If I were you.", "He is loved.", "If I were  you.", "She has gone.", "To learn is fun."]
+    with patcher:
+        results = asyncio.run(analyzer.analyze_many(texts))
+        assert len(completions.requests) == 2
+        assert all(r["response_format"] == {"type": "json_object"} for r in completions.requests)
+        assert [r["grammar_structures"] for r in results] == [
+            ["structure of If I were you."],
+            ["structure of He is loved."],
+            ["structure of If I were you."],
+            ["structure of She has gone."],
+            ["structure of To learn is fun."],
+        ]
+        assert results[0]["related_topics"] == ["topic"]
+
+        # 2回目はすべてキャッシュから返る
+        again = asyncio.run(analyzer.analyze_many(texts[:2] + ["New sentence here."]))
+        assert len(completions.requests) == 3
+        assert again[:2] == results[:2]
+        assert asyncio.run(analyzer.aanalyze_text("He is loved.")) == results[1]
+        assert len(completions.requests) == 3
+
+
+def test_missing_batch_results_fall_back_to_single_requests():
+    """バッチ応答に欠けた結果は1件ずつ解析し直すことを確認"""
+    completions = FakeCompletions(drop_index=1)
+    analyzer, patcher = _analyzer(completions, batch_size=3)
+    with patcher:
+        results = asyncio.run(analyzer.analyze_many(["A one.", "B two.", "C three."]))
+    assert [r["grammar_structures"] for r in results] == [["structure of A one."], ["structure of B two."], ["structure of C three."]]
+    assert len(completions.requests) == 2
+    assert "Input text: B two." in completions.requests[1]["messages"][0]["content"]
+
+
+def test_errors_are_not_cached(cache):
+    """失敗した結果はエラー付きで返し、キャッシュしないことを確認"""
+    completions = FakeCompletions(fail=True)
+    analyzer, patcher = _analyzer(completions)
+    with patcher:
+        result = asyncio.run(analyzer.aanalyze_text("If I were you."))
+        assert result["grammar_structures"] == [] and "boom" in result["error"]
+        results = asyncio.run(analyzer.analyze_many(["A one.", "B two."]))
+    assert all("error" in r for r in results)
+    assert cache.stats()["size"] == 0
+
+
+def test_sync_analyze_text_uses_json_mode():
+    """同期版もJSONモードで解析し、キャッシュを共有することを確認"""
+    completions = FakeCompletions()
+    analyzer = LLMGrammarAnalyzer(api_key="x")
+    analyzer.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **request: completions._reply(request))))
+    result = analyzer.analyze_text("If I were you.")
+    assert result["grammar_structures"] == ["structure of If I were you."]
+    assert completions.requests[0]["response_format"] == {"type": "json_object"}
+
+    analyzer.analyze_text(" If I were you. ")
+    assert len(completions.requests) == 1
@@ -0,0 +1,102 @@
+"""
+Test cases for the process-wide LLM call and token limiter.
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import dspy
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.utils.llm_limits import LimitedLM, LLMLimiter, estimate_tokens
+from src.utils.mock_llm_server import MockLLMConfig, MockLLMServer
+
+
+class TestLLMLimiter:
+    """LLMLimiterのテスト"""
+
+    def test_concurrency_cap_across_threads(self):
+        """スレッドをまたいで同時呼び出し数が上限を超えないことを確認"""
+        limiter = LLMLimiter(max_concurrent_calls=2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call():
+            lease = limiter.acquire()
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            limiter.release(lease)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 2
+        stats = limiter.stats()
+        assert stats["calls"] == 6 and stats["peak_active"] == 2 and stats["active"] == 0
+        assert stats["throttled"] > 0
+
+    def test_async_concurrency_cap(self):
+        """非同期の呼び出しでも上限が守られることを確認"""
+        limiter = LLMLimiter(max_concurrent_calls=3)
+
+        async def call():
+            lease = await limiter.aacquire()
+            await asyncio.sleep(0.03)
+            limiter.release(lease)
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(9)))
+
+        asyncio.run(run())
+        assert limiter.stats()["peak_active"] == 3
+
+    def test_token_window(self):
+        """トークン上限に達したら窓が空くまで待つことを確認"""
+        limiter = LLMLimiter(tokens_per_minute=100, window=0.2)
+        limiter.release(limiter.acquire(10), used_tokens=90)
+
+        started = time.monotonic()
+        limiter.release(limiter.acquire(20))
+        assert time.monotonic() - started >= 0.15
+
+        # 予算より大きな呼び出しも窓が空なら通す
+        assert limiter.acquire(500).tokens == 500
+
+    def test_disabled(self):
+        """上限がなければ無効として扱われることを確認"""
+        assert not LLMLimiter().enabled
+        assert LLMLimiter(tokens_per_minute=10).enabled
+
+
+def test_estimate_tokens():
+    """メッセージの文字数からトークン数を概算することを確認"""
+    assert estimate_tokens([{"role": "user", "content": "a" * 40}]) == 10
+    assert estimate_tokens(text="") == 1
+
+
+def test_limited_lm_goes_through_limiter():
+    """LimitedLMの呼び出しがプロセス共通のリミッターを通ることを確認"""
+    limiter = LLMLimiter(max_concurrent_calls=1)
+    with MockLLMServer(MockLLMConfig(response_words=20)) as server, \
+            patch("src.utils.llm_limits.get_llm_limiter", return_value=limiter):
+        lm = LimitedLM("openai/mock", api_key="mock", api_base=server.base_url, cache=False, num_retries=0)
+        predict = dspy.Predict("question -> answer")
+        predict.lm = lm
+        assert predict(question="q").answer
+        assert asyncio.run(predict.acall(question="q2")).answer
+
+    stats = limiter.stats()
+    assert stats["calls"] == 2 and stats["active"] == 0
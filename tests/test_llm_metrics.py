@@ -0,0 +1,161 @@
+"""
+Test cases for per-call LLM metrics of the streaming writers.
+"""
+
+import asyncio
+import json
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.report_writer import StreamLeadWriter
+from src.utils.llm_metrics import LLMCallRecord, LLMMetrics, get_run_id, run_context
+
+
+class FakeChunk:
+    def __init__(self, content=None, usage=None):
+        self.choices = [{"delta": {"content": content}}] if content is not None else []
+        self.usage = usage
+
+
+def _fake_acompletion(pieces, calls, usage=None, failures=0):
+    async def acompletion(**kwargs):
+        calls.append(kwargs)
+        if len(calls) <= failures:
+            raise ConnectionError("connection reset")
+
+        async def stream():
+            for piece in pieces:
+                await asyncio.sleep(0.01)
+                yield FakeChunk(piece)
+            if usage:
+                yield FakeChunk(usage=SimpleNamespace(**usage))
+        return stream()
+    return acompletion
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+async def _no_sleep(delay):
+    return None
+
+
+def _lm(num_retries=0):
+    return dspy.LM("openai/gpt-4o-mini", api_key="x", temperature=0.0, cache=False, num_retries=num_retries)
+
+
+class TestLLMMetrics:
+    """LLMMetricsのテスト"""
+
+    def test_summary_groups_by_signature(self):
+        """シグネチャごとに集計され、遅い順に並ぶことを確認"""
+        metrics = LLMMetrics()
+        metrics.record(LLMCallRecord("WriteLead", "m", prompt_tokens=100, completion_tokens=50, duration=1.0, time_to_first_token=0.5))
+        metrics.record(LLMCallRecord("WriteSection", "m", prompt_tokens=300, completion_tokens=200, duration=4.0, time_to_first_token=1.0))
+        metrics.record(LLMCallRecord("WriteSection", "m", prompt_tokens=200, completion_tokens=100, duration=2.0, retries=1))
+
+        summary = metrics.summary()
+        assert list(summary) == ["WriteSection", "WriteLead"]
+        assert summary["WriteSection"]["calls"] == 2
+        assert summary["WriteSection"]["prompt_tokens"] == 500
+        assert summary["WriteSection"]["retries"] == 1
+        assert summary["WriteSection"]["mean_time_to_first_token"] == 1.0
+
+    def test_tokens_per_second(self):
+        """最初のトークン以降の時間でスループットを計算することを確認"""
+        record = LLMCallRecord("WriteLead", "m", completion_tokens=100, duration=3.0, time_to_first_token=1.0)
+        assert record.tokens_per_second == 50.0
+        assert LLMCallRecord("WriteLead", "m").tokens_per_second == 0.0
+
+    def test_run_id_tagging(self):
+        """run_context内の記録に実行IDが付与されることを確認"""
+        metrics = LLMMetrics()
+        with run_context("run-1") as run_id:
+            assert get_run_id() == run_id == "run-1"
+            metrics.record(LLMCallRecord("WriteLead", "m"))
+        metrics.record(LLMCallRecord("WriteLead", "m"))
+
+        assert get_run_id() is None
+        assert len(metrics.records("run-1")) == 1
+        assert len(metrics.records()) == 2
+
+    def test_jsonl_sink(self, tmp_path):
+        """JSONLシンクに1行1レコードで書き出されることを確認"""
+        path = tmp_path / "metrics" / "llm.jsonl"
+        metrics = LLMMetrics(sink_path=str(path))
+        metrics.record(LLMCallRecord("WriteLead", "m", completion_tokens=10, duration=2.0, time_to_first_token=1.0))
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        data = json.loads(lines[0])
+        assert data["signature"] == "WriteLead"
+        assert data["tokens_per_second"] == 10.0
+
+
+class TestStreamWriterMetrics:
+    """StreamLineWriterの計測のテスト"""
+
+    def test_usage_and_latency_are_recorded(self):
+        """ストリームの使用量・TTFT・所要時間が記録されることを確認"""
+        metrics = LLMMetrics()
+        calls = []
+        pieces = ["[[ ## lead ## ]]\nFirst line.\n", "Second line.\n", "[[ ## completed ## ]]"]
+        acompletion = _fake_acompletion(pieces, calls, usage={"prompt_tokens": 120, "completion_tokens": 8})
+
+        with patch("litellm.acompletion", acompletion), \
+                patch("ai.utils.stream_writer.get_llm_metrics", return_value=metrics):
+            with run_context("run-2"):
+                asyncio.run(_collect(StreamLeadWriter(lm=_lm())(query="q", title="t", draft="d")))
+
+        assert calls[0]["stream_options"] == {"include_usage": True}
+        [record] = metrics.records("run-2")
+        assert record.signature == "WriteLeadJapanese"
+        assert record.model == "openai/gpt-4o-mini"
+        assert (record.prompt_tokens, record.completion_tokens) == (120, 8)
+        assert not record.usage_estimated
+        assert 0 < record.time_to_first_token < record.duration
+        assert record.retries == 0
+
+    def test_retries_are_counted(self):
+        """最初のチャンク前の失敗が再試行され、回数が記録されることを確認"""
+        metrics = LLMMetrics()
+        calls = []
+        acompletion = _fake_acompletion(["[[ ## lead ## ]]\nText.\n"], calls, failures=2)
+
+        with patch("litellm.acompletion", acompletion), \
+                patch("ai.utils.stream_writer.asyncio.sleep", _no_sleep), \
+                patch("ai.utils.stream_writer.get_llm_metrics", return_value=metrics):
+            chunks = asyncio.run(_collect(StreamLeadWriter(lm=_lm(num_retries=3))(query="q", title="t", draft="d")))
+
+        assert "".join(chunks).strip() == "Text."
+        assert len(calls) == 3
+        [record] = metrics.records()
+        assert record.retries == 2
+        # 使用量がない場合は概算値が記録される
+        assert record.usage_estimated
+        assert record.prompt_tokens > 0 and record.completion_tokens > 0
+
+    def test_failure_is_recorded(self):
+        """再試行を使い切った失敗もエラーとして記録されることを確認"""
+        metrics = LLMMetrics()
+        calls = []
+        acompletion = _fake_acompletion(["unused"], calls, failures=5)
+
+        with patch("litellm.acompletion", acompletion), \
+                patch("ai.utils.stream_writer.asyncio.sleep", _no_sleep), \
+                patch("ai.utils.stream_writer.get_llm_metrics", return_value=metrics):
+            with pytest.raises(ConnectionError):
+                asyncio.run(_collect(StreamLeadWriter(lm=_lm(num_retries=1))(query="q", title="t", draft="d")))
+
+        [record] = metrics.records()
+        assert record.retries == 1
+        assert record.error == "connection reset"
@@ -0,0 +1,147 @@
+"""
+Test cases for the local mock LLM server.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import os
+import time
+
+import dspy
+import httpx
+import litellm
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import CreateOutline, IncrementalOutlineParser
+from src.utils.mock_llm_server import LatencyDistribution, MockLLMConfig, MockLLMServer, build_completion_text
+
+
+@pytest.fixture
+def server():
+    with MockLLMServer(MockLLMConfig(response_words=40)) as server:
+        yield server
+
+
+def _outline_payload():
+    messages = dspy.ChatAdapter().format(
+        CreateOutline, demos=[], inputs={"query": "仮定法", "topics": "topic", "references": "Title: A\nTitle: B\nTitle: C"}
+    )
+    return {"model": "mock", "messages": messages}
+
+
+class TestLatencyDistribution:
+    """LatencyDistributionのテスト"""
+
+    def test_parse_and_sample(self):
+        """各分布の指定が解析され、負でない値が得られることを確認"""
+        rng = random.Random(0)
+        assert LatencyDistribution.parse("0.25").sample(rng) == 0.25
+        assert 0.1 <= LatencyDistribution.parse("uniform:0.1:0.2").sample(rng) <= 0.2
+        assert LatencyDistribution.parse("normal:0:1").sample(rng) >= 0.0
+        assert LatencyDistribution.parse("exponential:0.3").sample(rng) >= 0.0
+
+    def test_invalid_spec(self):
+        """不正な指定はエラーになることを確認"""
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("uniform:0.1")
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("pareto:1:2")
+
+
+class TestCompletionText:
+    """build_completion_textのテスト"""
+
+    def test_signature_shaped_and_deterministic(self):
+        """DSPyの出力フィールド形式で、同じリクエストには同じ応答を返すことを確認"""
+        payload = _outline_payload()
+        text = build_completion_text(payload)
+        assert text == build_completion_text(payload)
+        assert text.startswith("[[ ## outline ## ]]\n# 仮定法")
+        assert text.endswith("[[ ## completed ## ]]")
+
+        parser = IncrementalOutlineParser()
+        parser.feed(text.split("\n", 1)[1].split("[[ ## completed")[0])
+        parser.close()
+        outline = parser.outline()
+        assert len(outline.section_outlines) == 4
+        # 参照番号はプロンプト内の文献数の範囲に収まる
+        ids = {ref_id for section in outline.section_outlines for sub in section.subsection_outlines for ref_id in sub.reference_ids}
+        assert ids and ids <= {1, 2, 3}
+
+    def test_seed_changes_response(self):
+        """シードを変えると応答が変わることを確認"""
+        payload = {"model": "mock", "messages": [{"role": "user", "content": "hello"}]}
+        assert build_completion_text(payload) != build_completion_text(payload, MockLLMConfig(seed=1))
+
+
+class TestMockLLMServer:
+    """MockLLMServerのテスト"""
+
+    def test_dspy_predict_round_trip(self, server):
+        """dspy.Predictがモックの応答をそのまま解析できることを確認"""
+        lm = dspy.LM("openai/mock", api_key="mock", api_base=server.base_url, cache=False, num_retries=0)
+        predict = dspy.Predict("question -> answer, topics: list[str]")
+        predict.lm = lm
+        result = predict(question="What is the subjunctive?")
+        assert result.answer
+        assert isinstance(result.topics, list) and result.topics
+
+    def test_streaming_with_usage(self, server):
+        """ストリーミング応答がSSEで届き、使用量チャンクが付くことを確認"""
+        payload = _outline_payload()
+
+        async def run():
+            response = await litellm.acompletion(
+                model="openai/mock", api_key="mock", api_base=server.base_url, messages=payload["messages"],
+                stream=True, stream_options={"include_usage": True}, num_retries=0,
+            )
+            pieces, usage = [], None
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                usage = getattr(chunk, "usage", None) or usage
+            return pieces, usage
+
+        pieces, usage = asyncio.run(run())
+        assert len(pieces) > 1
+        assert "".join(pieces) == build_completion_text(payload)
+        assert usage.completion_tokens == len(pieces)
+        assert server.stats()["requests"] == 1
+
+    def test_embeddings_and_stats(self, server):
+        """埋め込みは決定的で、統計エンドポイントが同時実行数を返すことを確認"""
+        with httpx.Client(base_url=server.base_url) as client:
+            body = client.post("/embeddings", json={"model": "mock", "input": ["present perfect", "present perfect"]}).json()
+            first, second = (item["embedding"] for item in body["data"])
+            assert first == second and len(first) == 256
+            assert client.get("/stats").json()["requests"] == 1
+
+    def test_error_injection(self):
+        """エラー率1ではHTTP 500を返すことを確認"""
+        with MockLLMServer(MockLLMConfig(error_rate=1.0)) as server:
+            response = httpx.post(f"{server.base_url}/chat/completions", json={"model": "mock", "messages": []})
+        assert response.status_code == 500
+        assert json.loads(response.text)["error"]["type"] == "server_error"
+
+    def test_latency_and_token_rate(self):
+        """最初のトークンまでの遅延とトークンレートが守られることを確認"""
+        config = MockLLMConfig(ttft=LatencyDistribution.parse("0.2"), tokens_per_second=200, response_words=40)
+        payload = {"model": "mock", "stream": True, "messages": [{"role": "user", "content": "hello"}]}
+        tokens = 0
+        with MockLLMServer(config) as server:
+            started = time.perf_counter()
+            with httpx.stream("POST", f"{server.base_url}/chat/completions", json=payload) as response:
+                for line in response.iter_lines():
+                    if line.startswith("data: {") and '"content"' in line:
+                        if tokens == 0:
+                            time_to_first_token = time.perf_counter() - started
+                        tokens += 1
+            duration = time.perf_counter() - started
+
+        assert time_to_first_token >= 0.2
+        assert duration >= 0.2 + (tokens - 1) / 200
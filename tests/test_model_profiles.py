@@ -0,0 +1,209 @@
+"""
+Test cases for per-stage model profiles and latency-aware fallback.
+"""
+
+import asyncio
+import json
+import sys
+import os
+from unittest.mock import patch
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.report_writer import StreamLeadWriter
+from src.utils.llm_cache import CachedLM, CompletionCache
+from src.utils.llm_metrics import LLMMetrics
+from src.utils.model_profiles import DEFAULT_PROFILES, FallbackLM, ModelProfile, ModelRouter, load_model_profiles
+
+
+class FakeLM(dspy.LM):
+    """呼び出しを記録し、固定の応答または例外を返すテスト用LM"""
+
+    def __init__(self, model, answer="yes", error=None, **kwargs):
+        super().__init__(model, api_key="x", cache=False, **kwargs)
+        self.answer = answer
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [f"[[ ## answer ## ]]\n{self.answer}\n\n[[ ## completed ## ]]"]
+
+    async def acall(self, prompt=None, messages=None, **kwargs):
+        return self(prompt, messages=messages, **kwargs)
+
+
+def _factory(created):
+    def factory(model, **kwargs):
+        lm = FakeLM(model, **kwargs)
+        created.append((model, kwargs))
+        return lm
+    return factory
+
+
+class TestLoadModelProfiles:
+    """load_model_profilesのテスト"""
+
+    def test_file_is_merged_over_defaults(self, tmp_path):
+        """設定ファイルが既定のプロファイルに上書きマージされることを確認"""
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps({
+            "section": {"model": "openai/gpt-4o", "timeout": 30},
+            "fix_outline": {"max_tokens": 2048},
+        }))
+        profiles = load_model_profiles(str(path))
+
+        assert profiles["section"] == ModelProfile(model="openai/gpt-4o", timeout=30)
+        assert profiles["fix_outline"].model == DEFAULT_PROFILES["fix_outline"].model
+        assert profiles["fix_outline"].max_tokens == 2048
+        assert profiles["query_expander"] == DEFAULT_PROFILES["query_expander"]
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        """設定ファイルがなければ既定値を使うことを確認"""
+        assert load_model_profiles(str(tmp_path / "missing.json")) == DEFAULT_PROFILES
+
+    def test_unknown_stage_or_field(self, tmp_path):
+        """未知のステージやフィールドはエラーになることを確認"""
+        path = tmp_path / "profiles.json"
+        path.write_text(json.dumps({"summary": {"model": "x"}}))
+        with pytest.raises(ValueError):
+            load_model_profiles(str(path))
+        path.write_text(json.dumps({"section": {"modle": "x"}}))
+        with pytest.raises(ValueError):
+            load_model_profiles(str(path))
+
+
+class TestModelRouter:
+    """ModelRouterのテスト"""
+
+    def test_stage_models(self, monkeypatch):
+        """軽量ステージは高速モデル、その他は既定モデルを使うことを確認"""
+        monkeypatch.setenv("ENGLISHY_FAST_LM", "openai/fast-model")
+        default_lm = FakeLM("openai/big-model")
+        created = []
+        router = ModelRouter(default_lm, profiles=dict(DEFAULT_PROFILES), lm_factory=_factory(created))
+
+        assert router.lm_for("section") is default_lm
+        expander = router.lm_for("query_expander")
+        assert isinstance(expander, FallbackLM)
+        assert expander.primary.model == "openai/fast-model"
+        assert expander.fallback_lm is default_lm
+        # 同じ設定のLMは共有される
+        assert router.lm_for("query_refiner").primary is expander.primary
+        assert created == [("openai/fast-model", {"max_tokens": 1024, "num_retries": 0})]
+
+    def test_fast_alias_without_fast_model(self, monkeypatch):
+        """ENGLISHY_FAST_LMがなければ既定モデルで出力上限だけを変えることを確認"""
+        monkeypatch.delenv("ENGLISHY_FAST_LM", raising=False)
+        default_lm = FakeLM("openai/big-model")
+        created = []
+        router = ModelRouter(default_lm, profiles=dict(DEFAULT_PROFILES), lm_factory=_factory(created))
+
+        lm = router.lm_for("fix_outline")
+        assert not isinstance(lm, FallbackLM)
+        assert lm.model == "openai/big-model"
+        assert created == [("openai/big-model", {"max_tokens": 4096})]
+
+    def test_explicit_fallback_and_budget(self):
+        """タイムアウトと代替モデルが設定どおりに作られることを確認"""
+        default_lm = FakeLM("openai/mini")
+        created = []
+        profiles = {"section": ModelProfile(model="openai/big", timeout=20, fallback="openai/other")}
+        lm = ModelRouter(default_lm, profiles=profiles, lm_factory=_factory(created)).lm_for("section")
+
+        assert lm.primary.model == "openai/big"
+        assert lm.fallback_lm.model == "openai/other"
+        assert created[0] == ("openai/big", {"timeout": 20, "num_retries": 0})
+
+
+class TestFallbackLM:
+    """FallbackLMのテスト"""
+
+    def test_predict_falls_back_on_error(self):
+        """主モデルが失敗したらdspy.Predictが代替モデルの結果を返すことを確認"""
+        primary = FakeLM("openai/big", error=TimeoutError("budget exceeded"))
+        fallback = FakeLM("openai/mini", answer="from fallback")
+        predict = dspy.Predict("question -> answer")
+        predict.lm = FallbackLM(primary, fallback, stage="query_expander")
+
+        assert predict(question="q").answer == "from fallback"
+        assert (primary.calls, fallback.calls) == (1, 1)
+
+    def test_primary_success(self):
+        """主モデルが成功すれば代替モデルは呼ばれないことを確認"""
+        primary = FakeLM("openai/big")
+        fallback = FakeLM("openai/mini")
+        lm = FallbackLM(primary, fallback)
+        assert asyncio.run(lm.acall(messages=[{"role": "user", "content": "q"}]))
+        assert fallback.calls == 0
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.choices = [{"delta": {"content": content}}]
+        self.usage = None
+
+
+def test_stream_writer_falls_back_after_first_token_budget():
+    """最初のトークンが予算内に届かなければ代替モデルでストリーミングすることを確認"""
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs["model"])
+
+        async def stream():
+            if kwargs["model"] == "openai/slow":
+                await asyncio.sleep(5)
+            yield FakeChunk(f"[[ ## lead ## ]]\nfrom {kwargs['model']}\n")
+        return stream()
+
+    primary = dspy.LM("openai/slow", api_key="x", temperature=0.0, cache=False, num_retries=0, timeout=0.1)
+    fallback = dspy.LM("openai/fast", api_key="x", temperature=0.0, cache=False, num_retries=0)
+    metrics = LLMMetrics()
+
+    with patch("litellm.acompletion", acompletion), \
+            patch("ai.utils.stream_writer.get_llm_metrics", return_value=metrics):
+        writer = StreamLeadWriter(lm=FallbackLM(primary, fallback, stage="lead"))
+        chunks = asyncio.run(_collect(writer(query="q", title="t", draft="d")))
+
+    assert "".join(chunks).strip() == "from openai/fast"
+    assert calls == ["openai/slow", "openai/fast"]
+    [record] = metrics.records()
+    assert record.fallback and record.model == "openai/fast"
+
+
+def test_stream_writer_does_not_cache_fallback_output(tmp_path):
+    """代替モデルの応答は主モデルのキーでキャッシュされず、次回も主モデルを試すことを確認"""
+    calls = []
+
+    async def acompletion(**kwargs):
+        calls.append(kwargs["model"])
+
+        async def stream():
+            if kwargs["model"] == "openai/slow":
+                await asyncio.sleep(5)
+            yield FakeChunk(f"[[ ## lead ## ]]\nfrom {kwargs['model']}\n")
+        return stream()
+
+    primary = CachedLM("openai/slow", completion_cache=CompletionCache(str(tmp_path)), api_key="x",
+                       temperature=0.0, cache=False, num_retries=0, timeout=0.1)
+    fallback = dspy.LM("openai/fast", api_key="x", temperature=0.0, cache=False, num_retries=0)
+
+    with patch("litellm.acompletion", acompletion), \
+            patch("ai.utils.stream_writer.get_llm_metrics", return_value=LLMMetrics()):
+        writer = StreamLeadWriter(lm=FallbackLM(primary, fallback, stage="lead"))
+        for _ in range(2):
+            chunks = asyncio.run(_collect(writer(query="q", title="t", draft="d")))
+            assert "".join(chunks).strip() == "from openai/fast"
+
+    assert calls == ["openai/slow", "openai/fast", "openai/slow", "openai/fast"]
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
@@ -0,0 +1,80 @@
+"""
+Test cases for the async streaming OpenAIClient operations, against the local mock LLM server.
+"""
+
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.openai_client import OpenAIClient
+from src.utils.http_client import aclose_async_http_client
+from src.utils.mock_llm_server import LatencyDistribution, MockLLMConfig, MockLLMServer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    config = MockLLMConfig(ttft=LatencyDistribution.parse("0.05"), tokens_per_second=400, response_words=30)
+    with MockLLMServer(config) as server:
+        monkeypatch.setenv("ENGLISHY_LM_API_BASE", server.base_url)
+        yield server
+
+
+async def _collect(stream):
+    chunks = [chunk async for chunk in stream]
+    await aclose_async_http_client()
+    return chunks
+
+
+def test_streams_incrementally(server):
+    """各操作が本文を複数の差分に分けて返すことを確認"""
+    client = OpenAIClient(api_key="x")
+    streams = [
+        client.astream_english_report("仮定法", ["If I were a bird."], style="beginner"),
+        client.astream_english_query_analysis("仮定法"),
+        client.astream_practice_exercises("subjunctive mood"),
+        client.astream_references("仮定法", "report", ["https://example.com"]),
+    ]
+    for stream in streams:
+        chunks = asyncio.run(_collect(stream))
+        assert len(chunks) > 1
+        assert "".join(chunks).strip()
+    assert server.stats()["requests"] == 4
+
+
+def test_bulk_exercises_concurrency_cap(server):
+    """一括生成が重複を1回にまとめ、同時実行数の上限を守ることを確認"""
+    client = OpenAIClient(api_key="x")
+    topics = [f"topic {i}" for i in range(6)] + ["topic 0"]
+
+    async def run():
+        try:
+            return await client.create_practice_exercises_bulk(topics, max_concurrency=2)
+        finally:
+            await aclose_async_http_client()
+
+    results = asyncio.run(run())
+    assert list(results) == [f"topic {i}" for i in range(6)]
+    assert all(result["status"] == "success" and result["exercises"] for result in results.values())
+    assert server.stats()["requests"] == 6
+    assert server.stats()["peak_active"] <= 2
+
+
+def test_bulk_exercises_error_per_topic(monkeypatch):
+    """失敗したトピックはエラー結果になり、全体は失敗しないことを確認"""
+    with MockLLMServer(MockLLMConfig(error_rate=1.0)) as server:
+        monkeypatch.setenv("ENGLISHY_LM_API_BASE", server.base_url)
+        client = OpenAIClient(api_key="x")
+
+        async def run():
+            try:
+                return await client.create_practice_exercises_bulk(["a", "b"])
+            finally:
+                await aclose_async_http_client()
+
+        results = asyncio.run(run())
+    assert [result["status"] for result in results.values()] == ["error", "error"]
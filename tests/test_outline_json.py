@@ -0,0 +1,114 @@
+"""
+Test cases for JSON outline generation with local repair.
+"""
+
+import json
+import sys
+import os
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import OutlineCreater, repair_outline
+
+
+def _outline_json(sections, title="仮定法の完全ガイド"):
+    return json.dumps({
+        "title": title,
+        "section_outlines": [
+            {"title": section, "subsection_outlines": [{"title": f"{section}の節", "reference_ids": ids}]}
+            for section, ids in sections
+        ],
+    }, ensure_ascii=False)
+
+
+class TestRepairOutline:
+    """repair_outlineのテスト"""
+
+    def test_drops_invalid_reference_ids(self):
+        """存在しない・重複・数値でない引用番号が除かれることを確認"""
+        raw = "```json\n" + _outline_json([("基本", [1, 2, 2, 9]), ("実例", ["3", "x", 0]), ("実践", [])]) + "\n```"
+        outline = repair_outline(raw, reference_count=3)
+        assert [section.subsection_outlines[0].reference_ids for section in outline.section_outlines] == [[1, 2], [3], []]
+        assert outline.title == "仮定法の完全ガイド"
+
+    def test_merges_empty_sections_and_conclusion(self):
+        """節のない章は隣の章に統合され、結論の章は除かれることを確認"""
+        data = json.loads(_outline_json([("基本", [1]), ("実例", [2]), ("実践", [3])]))
+        data["section_outlines"].insert(0, {"title": "## はじめに", "subsection_outlines": []})
+        data["section_outlines"].insert(2, {"title": "補足", "subsection_outlines": []})
+        data["section_outlines"].append({"title": "4. 結論", "subsection_outlines": [{"title": "まとめ", "reference_ids": [1]}]})
+
+        outline = repair_outline(json.dumps(data, ensure_ascii=False), reference_count=3)
+        assert [section.title for section in outline.section_outlines] == ["基本", "実例", "実践"]
+        assert [sub.title for sub in outline.section_outlines[0].subsection_outlines] == ["はじめに", "基本の節", "補足"]
+
+    def test_enforces_section_count(self):
+        """4章を超える分は最後の章に統合され、3章未満は修復できないことを確認"""
+        outline = repair_outline(_outline_json([(f"章{i}", [1]) for i in range(6)]))
+        assert len(outline.section_outlines) == 4
+        assert len(outline.section_outlines[3].subsection_outlines) == 3
+
+        with pytest.raises(ValueError):
+            repair_outline(_outline_json([("基本", [1]), ("実例", [2])]))
+
+    def test_markdown_and_missing_title(self):
+        """JSONでない出力はMarkdownとして解析し、タイトルがなければ既定値を使うことを確認"""
+        raw = "## 基本\n### 形\n[1][5]\n## 実例\n### 例文\n[2]\n## 実践\n### 練習\n[3]\n"
+        outline = repair_outline(raw, reference_count=3, default_title="仮定法")
+        assert outline.title == "仮定法"
+        assert outline.section_outlines[0].subsection_outlines[0].reference_ids == [1]
+
+        with pytest.raises(ValueError):
+            repair_outline("Sorry, I cannot help with that.")
+
+
+class FakeLM(dspy.LM):
+    """シグネチャごとに固定の出力を返し、呼び出されたシグネチャを記録するLM"""
+
+    def __init__(self, outputs):
+        super().__init__("openai/fake", api_key="x", cache=False)
+        self.outputs = outputs
+        self.calls = []
+
+    def __call__(self, prompt=None, messages=None, **kwargs):
+        field = next(name for name in self.outputs if f"`{name}`" in messages[0]["content"])
+        self.calls.append(field)
+        return [f"[[ ## {field} ## ]]\n{self.outputs[field]}\n\n[[ ## completed ## ]]"]
+
+
+REFERENCES = [{"title": f"Ref {i}", "url": f"https://example.com/{i}", "snippet": "subjunctive"} for i in range(1, 4)]
+
+
+class TestJSONMode:
+    """OutlineCreaterのJSONモードのテスト"""
+
+    def test_fix_outline_skipped_when_repairable(self):
+        """ローカルで修復できればFixOutlineを呼ばないことを確認"""
+        lm = FakeLM({"outline_json": _outline_json([("基本", [1, 7]), ("実例", [2]), ("実践", [3])])})
+        creater = OutlineCreater(lm=lm, fix_lm=lm, mode="json")
+        outline = creater(query="仮定法", topics=["topic"], references=REFERENCES).outline
+
+        assert lm.calls == ["outline_json"]
+        assert outline.section_outlines[0].subsection_outlines[0].reference_ids == [1]
+
+    def test_fix_outline_fallback(self):
+        """修復できない場合だけFixOutlineを使うことを確認"""
+        lm = FakeLM({
+            "outline_json": _outline_json([("基本", [1])]),
+            "fixed_outline": "# 仮定法ガイド\n## 基本\n### 形\n[1]\n## 実例\n### 例文\n[2]\n## 実践\n### 練習\n[3]",
+        })
+        creater = OutlineCreater(lm=lm, fix_lm=lm, mode="json")
+        outline = creater(query="仮定法", topics=["topic"], references=REFERENCES).outline
+
+        assert lm.calls == ["outline_json", "fixed_outline"]
+        assert outline.title == "仮定法ガイド"
+        assert len(outline.section_outlines) == 3
+
+    def test_invalid_mode(self):
+        """未知のモードはエラーになることを確認"""
+        with pytest.raises(ValueError):
+            OutlineCreater(lm=None, mode="yaml")
@@ -0,0 +1,199 @@
+"""
+Test cases for the streaming outline and early section kickoff.
+"""
+
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import IncrementalOutlineParser, OutlineCreater, OutlineStream
+from src.app.research_pipeline import ResearchOptions, build_research_pipeline, generate_report_with_integration, run_research
+
+
+OUTLINE_TEXT = """```markdown
+# 仮定法の使い方
+## 1. 基本構造
+### 仮定法過去の形
+[1][2]
+### 仮定法過去完了の形 [3]
+## 2. 空のセクション
+## 3. 実例
+### 日常会話での例
+[2]
+[4]
+```"""
+
+
+async def _lines(text, delay=0.0):
+    for line in text.splitlines(keepends=True):
+        await asyncio.sleep(delay)
+        yield line
+
+
+class TestIncrementalOutlineParser:
+    """IncrementalOutlineParserのテスト"""
+
+    def test_sections_are_emitted_when_complete(self):
+        """次の ## 見出しが来た時点で直前のセクションが返ることを確認"""
+        parser = IncrementalOutlineParser()
+        emitted = []
+        # 行の途中で分割されたチャンクでも解析できる
+        for i in range(0, len(OUTLINE_TEXT), 7):
+            emitted.extend(section.title for section in parser.feed(OUTLINE_TEXT[i:i + 7]))
+        assert emitted == ["1. 基本構造"]
+
+        emitted.extend(section.title for section in parser.close())
+        assert emitted == ["1. 基本構造", "3. 実例"]
+
+        outline = parser.outline()
+        assert outline.title == "仮定法の使い方"
+        first, second = outline.section_outlines
+        assert [(sub.title, sub.reference_ids) for sub in first.subsection_outlines] == [
+            ("仮定法過去の形", [1, 2]), ("仮定法過去完了の形", [3])
+        ]
+        assert second.subsection_outlines[0].reference_ids == [2, 4]
+
+    def test_missing_title_and_empty_outline(self):
+        """タイトルがなければ既定値を使い、セクションがなければエラーになることを確認"""
+        parser = IncrementalOutlineParser(default_title="query")
+        parser.feed("## Section\n### Sub\n[1]\n")
+        parser.close()
+        assert parser.outline().title == "query"
+
+        empty = IncrementalOutlineParser()
+        empty.feed("# Title\nSorry, I cannot help.\n")
+        empty.close()
+        with pytest.raises(ValueError):
+            empty.outline()
+
+    def test_repair_rules_are_applied_per_section(self):
+        """結論の章、存在しない引用番号、上限を超える章が完成時に除かれることを確認"""
+        text = "# Title\n" + "".join(f"## {i}. Section {i}\n### Sub {i}\n[1][{i + 2}]\n" for i in range(1, 6))
+        text = text.replace("## 2. Section 2", "## 2. まとめ")
+        parser = IncrementalOutlineParser(reference_count=4, max_sections=3)
+        emitted = [section.title for section in parser.feed(text)] + [section.title for section in parser.close()]
+        assert emitted == ["1. Section 1", "3. Section 3", "4. Section 4"]
+        assert [section.subsection_outlines[0].reference_ids for section in parser.outline().section_outlines] == [
+            [1, 3], [1], [1]
+        ]
+
+
+class FakeSectionWriter:
+    """呼び出し時にアウトライン生成が終わっていたかを記録するライター"""
+
+    def __init__(self):
+        self.calls = []
+        self.stream = None
+
+    async def __call__(self, **kwargs):
+        self.calls.append((kwargs.get("section_outline", "lead").splitlines()[0], self.stream.done))
+        yield "text\n"
+
+
+class TestEarlySectionKickoff:
+    """セクションの先行生成のテスト"""
+
+    def test_sections_start_before_outline_finishes(self):
+        """最初のセクションがアウトライン完成前に書き始められることを確認"""
+        sections = FakeSectionWriter()
+        lead = FakeSectionWriter()
+        conclusion = FakeSectionWriter()
+
+        async def run():
+            stream = OutlineStream(_lines(OUTLINE_TEXT, delay=0.02), IncrementalOutlineParser())
+            sections.stream = lead.stream = conclusion.stream = stream
+            return await generate_report_with_integration(
+                "query", stream, [], lead, sections, conclusion
+            ), stream
+
+        report, stream = asyncio.run(run())
+        assert sections.calls == [("## 1. 基本構造", False), ("## 3. 実例", True)]
+        # リードはアウトライン全体が必要なので完成後に開始する
+        assert lead.calls == [("lead", True)]
+        assert report.startswith("仮定法の使い方\n\ntext")
+        assert stream.outline.title == "仮定法の使い方"
+
+    def test_stream_failure_propagates(self):
+        """アウトライン生成の失敗がレポート生成の失敗として扱われることを確認"""
+
+        async def failing_lines():
+            yield "# Title\n## Section\n"
+            raise ConnectionError("stream broken")
+
+        async def run():
+            stream = OutlineStream(failing_lines(), IncrementalOutlineParser())
+            writer = FakeSectionWriter()
+            writer.stream = stream
+            return await generate_report_with_integration("query", stream, [], writer, writer, writer)
+
+        assert "stream broken" in asyncio.run(run())
+
+
+class FakeChunk:
+    def __init__(self, content):
+        self.choices = [{"delta": {"content": content}}]
+
+
+class TestOutlineCreaterStream:
+    """OutlineCreater.astreamのテスト"""
+
+    def test_astream_parses_streamed_completion(self):
+        """CreateOutlineのストリームからセクションが順に得られることを確認"""
+        pieces = ["[[ ## outline ## ]]\n"] + [line for line in OUTLINE_TEXT.splitlines(keepends=True)] + ["\n\n[[ ## completed ## ]]"]
+
+        async def acompletion(**kwargs):
+            async def stream():
+                for piece in pieces:
+                    yield FakeChunk(piece)
+            return stream()
+
+        references = [{"id": 1, "title": "Subjunctive", "url": "https://example.com", "snippet": "subjunctive mood"}]
+        lm = dspy.LM("openai/gpt-4o-mini", api_key="x", temperature=0.0, cache=False)
+
+        async def run():
+            stream = OutlineCreater(lm=lm).astream(query="仮定法", topics=["topic"], references=references)
+            titles = [section.title async for section in stream]
+            return titles, await stream.result()
+
+        with patch("litellm.acompletion", acompletion):
+            titles, outline = asyncio.run(run())
+
+        assert titles == ["1. 基本構造", "3. 実例"]
+        assert outline.title == "仮定法の使い方"
+
+
+def test_pipeline_streaming_outline_mode():
+    """ストリーミングモードでもパイプラインが最後まで実行できることを確認"""
+
+    class FakeOutlineCreater:
+        def astream(self, query, topics, references):
+            return OutlineStream(_lines(OUTLINE_TEXT), IncrementalOutlineParser())
+
+    async def writer(**kwargs):
+        yield "text\n"
+
+    components = SimpleNamespace(
+        query_refiner=SimpleNamespace(grammar_aware_refiner=lambda text: {"refined_query": text}),
+        query_expander=lambda query, web_search_results: SimpleNamespace(topics=["topic"]),
+        outline_creater=FakeOutlineCreater(),
+        mindmap_maker=lambda **kwargs: dspy.Prediction(mindmap="# Map"),
+        lead_writer=writer,
+        integrated_section_writer=writer,
+        conclusion_writer=writer,
+        related_topics_writer=writer,
+        references_writer=writer,
+    )
+    options = ResearchOptions(include_web_search=False, use_llm_analysis=False, streaming_outline=True)
+    build_research_pipeline(components, options).validate(["query"])
+
+    report_data = asyncio.run(run_research("仮定法", components, options))
+    assert report_data["report"].startswith("仮定法の使い方\n\ntext")
+    assert "## 結論" in report_data["report"]
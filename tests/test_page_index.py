@@ -0,0 +1,206 @@
+"""
+Test cases for full-page extraction and the per-query page index.
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.page_fetcher import PageFetcher, detect_encoding, extract_main_text, extract_many
+from retriever.article_search.page_index import WebPageIndex
+
+
+PAGE_HTML = """
+<html><head><title>Subjunctive</title><style>body {color: red}</style><script>var x = 1;</script></head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<h1>The Subjunctive Mood</h1>
+<p>The subjunctive mood is used to talk about hypothetical situations, such as "I wish I were taller".</p>
+<div>Share</div>
+<p>In the past subjunctive, "were" is used for all persons: if I were you, I would study harder.</p>
+<footer>Copyright 2024 Example Grammar Site. All rights reserved worldwide.</footer>
+</body></html>
+"""
+
+VOCABULARY = ["subjunctive", "wish", "were", "perfect", "have", "past"]
+
+
+class KeywordEncoder:
+    """単語の出現回数をベクトルにするテスト用エンコーダー"""
+
+    def encode_texts(self, texts):
+        return [self.encode_single_text(text) for text in texts]
+
+    def encode_single_text(self, text):
+        text = text.lower()
+        return [float(text.count(word)) + 0.01 for word in VOCABULARY]
+
+
+class FakeFetcher:
+    """URLごとのHTMLと遅延を返すフェイクフェッチャー"""
+
+    def __init__(self, pages, delays=None):
+        self.pages = pages
+        self.delays = delays or {}
+
+    async def fetch_many(self, urls, timeout=None):
+        fetcher = PageFetcher()
+        fetcher.fetch = lambda url: (time.sleep(self.delays.get(url, 0)), self.pages.get(url))[1]
+        return await fetcher.fetch_many(urls, timeout=timeout)
+
+
+class TestDetectEncoding:
+    """文字コード判定のテスト"""
+
+    def test_header_meta_and_detection(self):
+        """ヘッダー、metaタグ、UTF-8、バイト列からの推定の順に判定することを確認"""
+        assert detect_encoding("text/html; charset=Shift_JIS", b"") == "shift_jis"
+        assert detect_encoding("text/html", '<meta charset="utf-8"><p>café</p>'.encode()) == "utf-8"
+        assert detect_encoding("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=EUC-JP">') == "euc_jp"
+        assert detect_encoding("text/html", "<p>仮定法</p>".encode()[:-5]) == "utf-8"
+        sjis = ("<p>これは日本語のページです。仮定法過去について説明します。</p>" * 5).encode("shift_jis")
+        assert sjis.decode(detect_encoding("text/html", sjis)) == sjis.decode("shift_jis")
+
+    def test_fetch_ignores_latin1_default(self):
+        """charsetなしのtext/htmlでもmetaタグのUTF-8で復号することを確認"""
+        html = '<html><head><meta charset="utf-8"></head><body><p>仮定法過去 – café</p></body></html>'.encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(html)))
+                self.end_headers()
+                self.wfile.write(html)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            page = PageFetcher().fetch(f"http://127.0.0.1:{server.server_address[1]}/")
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert "仮定法過去 – café" in page
+
+
+class TestExtractMainText:
+    """本文抽出のテスト"""
+
+    def test_keeps_headings_and_paragraphs(self):
+        """見出しと本文段落が抽出されることを確認"""
+        text = extract_main_text(PAGE_HTML)
+        assert "The Subjunctive Mood" in text
+        assert "I wish I were taller" in text
+        assert "if I were you" in text
+
+    def test_drops_boilerplate(self):
+        """スクリプト・ナビゲーション・フッター・短い断片が除外されることを確認"""
+        text = extract_main_text(PAGE_HTML)
+        assert "var x" not in text
+        assert "color: red" not in text
+        assert "Home" not in text
+        assert "Copyright" not in text
+        assert "Share" not in text
+
+    def test_shared_pool_uses_forkserver(self):
+        """共有プロセスプールが同時呼び出しでも1つだけ作られ、forkserverで抽出できることを確認"""
+        import retriever.web_search.page_fetcher as page_fetcher
+        page_fetcher._shutdown_extraction_pool()
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                pools = list(executor.map(lambda _: page_fetcher.get_extraction_pool(max_workers=1), range(4)))
+            assert all(pool is pools[0] for pool in pools)
+            assert pools[0]._mp_context.get_start_method() == "forkserver"
+            assert "I wish I were taller" in asyncio.run(extract_many({"a": PAGE_HTML}))["a"]
+        finally:
+            page_fetcher._shutdown_extraction_pool()
+
+    def test_extract_many_in_pool(self):
+        """executor上で複数ページを抽出できることを確認"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            texts = asyncio.run(extract_many({"a": PAGE_HTML, "b": "<p>short</p>"}, executor=executor))
+        assert "a" in texts
+        assert "b" not in texts
+
+
+class TestWebPageIndex:
+    """WebPageIndexのテスト"""
+
+    def _results(self):
+        return [
+            {"title": "Subjunctive", "url": "https://a.example/subjunctive", "snippet": "snippet a"},
+            {"title": "Perfect", "url": "https://b.example/perfect", "snippet": "snippet b"},
+        ]
+
+    def _pages(self):
+        return {
+            "https://a.example/subjunctive": PAGE_HTML,
+            "https://b.example/perfect": "<p>The present perfect uses have plus the past participle, as in I have finished my homework.</p>",
+        }
+
+    def test_build_and_route_passages(self):
+        """関連する本文抜粋が正しいURLにひも付くことを確認"""
+        index = WebPageIndex(encoder=KeywordEncoder(), fetcher=FakeFetcher(self._pages()))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            import retriever.web_search.page_fetcher as page_fetcher
+            page_fetcher._extraction_pool = executor
+            try:
+                count = asyncio.run(index.build(self._results()))
+            finally:
+                page_fetcher._extraction_pool = None
+
+        assert count >= 2
+        passages = index.passages_for("present perfect have", k=1)
+        assert list(passages) == ["https://b.example/perfect"]
+
+    def test_format_references_keeps_order_and_falls_back_to_snippet(self):
+        """参照順序が維持され、抜粋がない参照はスニペットを使うことを確認"""
+        index = WebPageIndex(encoder=KeywordEncoder(), fetcher=FakeFetcher(self._pages()))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            import retriever.web_search.page_fetcher as page_fetcher
+            page_fetcher._extraction_pool = executor
+            try:
+                asyncio.run(index.build(self._results()))
+            finally:
+                page_fetcher._extraction_pool = None
+
+        text = index.format_references(self._results(), "present perfect have", k=1)
+        assert text.index("https://a.example") < text.index("https://b.example")
+        assert "snippet a" in text
+        assert "snippet b" not in text
+        assert "present perfect uses have" in text
+
+    def test_latency_budget(self):
+        """予算内に取得できないページは除外されることを確認"""
+        fetcher = FakeFetcher(self._pages(), delays={"https://a.example/subjunctive": 1.0})
+        index = WebPageIndex(encoder=KeywordEncoder(), fetcher=fetcher, latency_budget=0.3)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            import retriever.web_search.page_fetcher as page_fetcher
+            page_fetcher._extraction_pool = executor
+            try:
+                start = time.perf_counter()
+                asyncio.run(index.build(self._results()))
+                elapsed = time.perf_counter() - start
+            finally:
+                page_fetcher._extraction_pool = None
+
+        assert elapsed < 1.5
+        assert list(index.passages_for("subjunctive wish", k=5)) == ["https://b.example/perfect"]
+
+    def test_empty_index(self):
+        """ページが取得できない場合は未構築のままになることを確認"""
+        index = WebPageIndex(encoder=KeywordEncoder(), fetcher=FakeFetcher({}))
+        assert asyncio.run(index.build(self._results())) == 0
+        assert not index.is_ready
+        assert index.passages_for("anything") == {}
@@ -0,0 +1,193 @@
+"""
+Test cases for the stage scheduler and the research pipeline graph.
+"""
+
+import asyncio
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+import dspy
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import Outline, SectionOutline, SubsectionOutline
+from src.app.research_pipeline import ResearchOptions, build_research_pipeline, run_research
+from src.utils.pipeline import Pipeline, PipelineError, Stage
+
+
+class TestPipeline:
+    """Pipelineスケジューラーのテスト"""
+
+    def test_independent_stages_run_concurrently(self):
+        """独立したステージが並行に実行されることを確認"""
+        events = []
+
+        def record(name, value):
+            async def func(**kwargs):
+                events.append(("start", name))
+                await asyncio.sleep(0.05)
+                events.append(("finish", name))
+                return value
+            return func
+
+        pipeline = Pipeline([
+            Stage("a", record("a", 1), inputs=["x"]),
+            Stage("b", record("b", 2), inputs=["x"]),
+            Stage("c", lambda a, b: a + b, inputs=["a", "b"]),
+        ])
+        values = asyncio.run(pipeline.run({"x": 0}))
+        # both stages start before either one finishes
+        assert {event for event, _ in events[:2]} == {"start"}
+        assert values["c"] == 3
+        assert set(pipeline.timings) == {"a", "b", "c"}
+
+    def test_stage_starts_when_inputs_ready(self):
+        """入力が揃ったステージは他の遅いステージを待たずに開始することを確認"""
+        started = {}
+        finished = {}
+
+        def record(name, delay):
+            async def func(**kwargs):
+                started[name] = time.perf_counter()
+                await asyncio.sleep(delay)
+                finished[name] = time.perf_counter()
+                return name
+            return func
+
+        pipeline = Pipeline([
+            Stage("slow", record("slow", 0.3), inputs=["x"]),
+            Stage("fast", record("fast", 0.0), inputs=["x"]),
+            Stage("after_fast", record("after_fast", 0.0), inputs=["fast"]),
+        ])
+        asyncio.run(pipeline.run({"x": 0}))
+        assert started["after_fast"] < finished["slow"]
+
+    def test_multiple_outputs(self):
+        """タプル・辞書で複数の出力を返せることを確認"""
+        pipeline = Pipeline([
+            Stage("split", lambda x: (x, x * 2), inputs=["x"], outputs=["one", "two"]),
+            Stage("named", lambda two: {"three": two + 1, "four": two + 2}, inputs=["two"], outputs=["three", "four"]),
+        ])
+        values = asyncio.run(pipeline.run({"x": 1}))
+        assert (values["one"], values["two"], values["three"], values["four"]) == (1, 2, 3, 4)
+
+    def test_progress_events(self):
+        """開始・終了イベントと完了数が通知されることを確認"""
+        events = []
+        pipeline = Pipeline([
+            Stage("a", lambda x: x, inputs=["x"], description="Doing A"),
+            Stage("b", lambda a: a, inputs=["a"]),
+        ])
+        asyncio.run(pipeline.run({"x": 1}, on_event=lambda event: events.append((event.stage.name, event.status, event.completed))))
+        assert events == [("a", "started", 0), ("a", "finished", 1), ("b", "started", 1), ("b", "finished", 2)]
+        assert pipeline.stages[0].description == "Doing A"
+        assert pipeline.stages[1].description == "b"
+
+    def test_failure_cancels_running_stages(self):
+        """ステージの失敗で他の実行中ステージが取り消されることを確認"""
+        cancelled = []
+
+        async def slow(x):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        def fail(x):
+            raise RuntimeError("boom")
+
+        pipeline = Pipeline([Stage("slow", slow, inputs=["x"]), Stage("fail", fail, inputs=["x"])])
+
+        async def main():
+            with pytest.raises(PipelineError) as excinfo:
+                await pipeline.run({"x": 0})
+            await asyncio.sleep(0)
+            return excinfo
+
+        excinfo = asyncio.run(main())
+        assert excinfo.value.stage == "fail"
+        assert isinstance(excinfo.value.__cause__, RuntimeError)
+        assert cancelled == [True]
+
+    def test_validation(self):
+        """未定義の入力・循環・重複出力が検出されることを確認"""
+        with pytest.raises(ValueError):
+            Pipeline([Stage("a", lambda missing: 1, inputs=["missing"])]).validate([])
+        with pytest.raises(ValueError):
+            Pipeline([Stage("a", lambda b: 1, inputs=["b"]), Stage("b", lambda a: 1, inputs=["a"])]).validate([])
+        with pytest.raises(ValueError):
+            Pipeline([Stage("a", lambda: 1, outputs=["v"]), Stage("b", lambda: 2, outputs=["v"])])
+
+
+class FakeStreamWriter:
+    """固定の行を返すテスト用ストリームライター"""
+
+    def __init__(self, text, delay=0.0, log=None):
+        self.text = text
+        self.delay = delay
+        self.log = log if log is not None else []
+
+    async def __call__(self, **kwargs):
+        self.log.append(("start", self.text, time.perf_counter()))
+        await asyncio.sleep(self.delay)
+        yield self.text + "\n"
+
+
+def _fake_components(log):
+    outline = Outline(
+        title="Report",
+        section_outlines=[SectionOutline(title="Usage", subsection_outlines=[SubsectionOutline(title="Form", reference_ids=[], keywords=["have"])])]
+    )
+
+    def refine(text):
+        time.sleep(0.1)
+        log.append(("finish", "refine", time.perf_counter()))
+        return {"refined_query": f"refined {text}"}
+
+    return SimpleNamespace(
+        query_refiner=SimpleNamespace(grammar_aware_refiner=refine),
+        query_expander=lambda query, web_search_results: SimpleNamespace(topics=["topic"]),
+        outline_creater=lambda query, topics, references: dspy.Prediction(outline=outline),
+        mindmap_maker=lambda **kwargs: dspy.Prediction(mindmap="# Map\n## Node"),
+        lead_writer=FakeStreamWriter("lead"),
+        integrated_section_writer=FakeStreamWriter("section"),
+        conclusion_writer=FakeStreamWriter("conclusion"),
+        related_topics_writer=FakeStreamWriter("related", delay=0.2, log=log),
+        references_writer=FakeStreamWriter("references"),
+    )
+
+
+class TestResearchPipeline:
+    """研究パイプラインのステージ構成のテスト"""
+
+    def test_graph_is_valid(self):
+        """クエリだけを入力として全ステージが実行可能であることを確認"""
+        pipeline = build_research_pipeline(components=None, options=ResearchOptions())
+        pipeline.validate(["query"])
+        producers = pipeline.producers
+        assert producers["grammar_analysis"].inputs == ["refined_query"]
+        assert producers["related_topics"].inputs == ["query"]
+        assert "report_body" in producers["mindmap"].inputs
+        assert "report_body" in producers["references"].inputs
+
+    def test_run_without_web_search(self):
+        """Web検索なしで最後まで実行でき、関連トピックが並行に生成されることを確認"""
+        log = []
+        options = ResearchOptions(include_web_search=False, use_llm_analysis=False)
+        report_data = asyncio.run(run_research("present perfect", _fake_components(log), options))
+
+        assert report_data["refined_query"] == "refined present perfect"
+        assert report_data["report"].startswith("Report\n\nlead")
+        assert "## 結論" in report_data["report"]
+        assert report_data["mindmap"].startswith("# Map")
+        assert report_data["search_results"] == []
+        assert report_data["related_topics"] == "related\n"
+        # related topics only needs the original query, so it starts before refinement finishes
+        times = {(event, name): at for event, name, at in log}
+        assert times[("start", "related")] < times[("finish", "refine")]
+        assert set(report_data["stage_timings"]) >= {"refine", "grammar", "related_topics", "mindmap"}
@@ -0,0 +1,118 @@
+"""
+Test cases for per-section reference routing.
+"""
+
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import SectionOutline, SubsectionOutline
+from retriever.article_search.reference_router import ReferenceRouter, format_references
+
+
+REFERENCES = [
+    {"title": "Subjunctive mood", "url": "https://example.com/1", "snippet": "I wish I were taller."},
+    {"title": "Present perfect", "url": "https://example.com/2", "snippet": "I have lived here for years."},
+    {"title": "Past perfect", "url": "https://example.com/3", "snippet": "She had left before I arrived."},
+    {"title": "Conditionals", "url": "https://example.com/4", "snippet": "If I were you, I would wish for more."},
+    {"title": "Phrasal verbs", "url": "https://example.com/5", "snippet": "Give up, look after, run into."},
+]
+
+VOCABULARY = ["subjunctive", "wish", "were", "perfect", "have", "phrasal"]
+
+
+class KeywordEncoder:
+    """単語の出現回数をベクトルにするテスト用エンコーダー"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode_texts(self, texts):
+        self.calls += 1
+        return [self.encode_single_text(text) for text in texts]
+
+    def encode_single_text(self, text):
+        text = text.lower()
+        return [float(text.count(word)) + 0.01 for word in VOCABULARY]
+
+
+def _section(title, *reference_ids):
+    return SectionOutline(
+        title=title,
+        subsection_outlines=[SubsectionOutline(title=f"{title} {i}", reference_ids=ids) for i, ids in enumerate(reference_ids)]
+    )
+
+
+def _count_words(text):
+    return len(text.split())
+
+
+def test_cited_references_only():
+    """サブセクションが引用する参考文献だけが選ばれること"""
+    router = ReferenceRouter(REFERENCES, count_tokens=_count_words)
+    section = _section("Perfect tenses", [2], [3, 2], [99, 0])
+
+    assert router.reference_ids_for(section) == [2, 3]
+
+    text = router.format_for(section)
+    assert "Present perfect" in text
+    assert "Past perfect" in text
+    assert "Subjunctive mood" not in text
+
+
+def test_global_citation_numbers_are_kept():
+    """部分的な参考文献リストでも元の引用番号が明示されること"""
+    text = format_references(REFERENCES, ids=[2, 4])
+    lines = [line for line in text.splitlines() if line.startswith("[")]
+    assert lines == ["[2] Title: Present perfect", "[4] Title: Conditionals"]
+
+    # idsを指定しなければ従来通りの形式
+    assert format_references(REFERENCES).splitlines()[0] == "Title: Subjunctive mood"
+
+
+def test_fallback_to_all_references():
+    """有効な引用がないセクションには全参考文献を渡すこと"""
+    router = ReferenceRouter(REFERENCES, count_tokens=_count_words)
+    section = _section("Introduction", [], [42])
+
+    assert router.reference_ids_for(section) == [1, 2, 3, 4, 5]
+
+
+def test_padding_by_similarity():
+    """類似度の高い参考文献で引用を補完し、埋め込みは一度だけ計算すること"""
+    encoder = KeywordEncoder()
+    router = ReferenceRouter(REFERENCES, encoder=encoder, padding=1, count_tokens=_count_words)
+
+    assert router.reference_ids_for(_section("Subjunctive wish", [2])) == [1, 2]
+    assert router.reference_ids_for(_section("Phrasal verbs", [])) == [5]
+    assert encoder.calls == 1
+
+
+def test_padding_failure_keeps_cited_references():
+    """エンコーダーが失敗しても引用済みの参考文献は使われること"""
+
+    class BrokenEncoder:
+        def encode_texts(self, texts):
+            raise RuntimeError("embedding service unavailable")
+
+        def encode_single_text(self, text):
+            raise RuntimeError("embedding service unavailable")
+
+    router = ReferenceRouter(REFERENCES, encoder=BrokenEncoder(), padding=2, count_tokens=_count_words)
+    assert router.reference_ids_for(_section("Conditionals", [4])) == [4]
+
+
+def test_token_reduction_is_logged(caplog):
+    """ルーティング前後のトークン数がログに記録されること"""
+    import logging
+
+    router = ReferenceRouter(REFERENCES, count_tokens=_count_words)
+    full_tokens = _count_words(format_references(REFERENCES))
+    routed = router.format_for(_section("Conditionals", [4]))
+
+    assert _count_words(routed) < full_tokens
+    with caplog.at_level(logging.INFO):
+        router.format_for(_section("Conditionals", [4]))
+    assert f"references input {full_tokens} -> {_count_words(routed)} tokens" in caplog.text
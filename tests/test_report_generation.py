@@ -0,0 +1,79 @@
+"""
+Test cases for concurrent report generation in the research pipeline.
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.ai.outline_creater import Outline, SectionOutline, SubsectionOutline
+from src.app.research_pipeline import generate_report_with_integration
+
+
+class FakeWriter:
+    """遅延付きでチャンクを返すテスト用ライター"""
+
+    def __init__(self, name, delays=None):
+        self.name = name
+        self.delays = delays or {}
+        self.active = 0
+        self.max_active = 0
+
+    async def __call__(self, **kwargs):
+        key = kwargs.get("section_outline", self.name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            delay = next((d for title, d in self.delays.items() if title in key), 0.0)
+            await asyncio.sleep(delay / 2)
+            yield f"{self.name}:{key.splitlines()[0]}\n"
+            await asyncio.sleep(delay / 2)
+            yield "done\n"
+        finally:
+            self.active -= 1
+
+
+def _outline():
+    return Outline(
+        title="Report",
+        section_outlines=[
+            SectionOutline(
+                title=title,
+                subsection_outlines=[SubsectionOutline(title=f"{title} sub", reference_ids=[1], keywords=[title.lower()])]
+            )
+            for title in ["Alpha", "Beta", "Gamma", "Delta"]
+        ]
+    )
+
+
+class TestConcurrentSections:
+    """セクション並行生成のテスト"""
+
+    def test_sections_in_outline_order_and_concurrent(self, monkeypatch):
+        """遅いセクションがあってもアウトライン順に組み立てられ、並行に生成されることを確認"""
+        monkeypatch.setenv("ENGLISHY_SECTION_CONCURRENCY", "8")
+        sections = FakeWriter("section", delays={"Alpha": 0.4, "Beta": 0.1, "Gamma": 0.3, "Delta": 0.2})
+
+        start = time.perf_counter()
+        report = asyncio.run(generate_report_with_integration(
+            "query", _outline(), [], FakeWriter("lead", {"lead": 0.4}), sections, FakeWriter("conclusion")
+        ))
+        elapsed = time.perf_counter() - start
+
+        positions = [report.index(f"section:## {title}") for title in ["Alpha", "Beta", "Gamma", "Delta"]]
+        assert positions == sorted(positions)
+        assert report.index("lead:") < positions[0] < report.index("## 結論")
+        assert elapsed < 0.9
+
+    def test_concurrency_cap(self, monkeypatch):
+        """同時実行数が設定値以下に制限されることを確認"""
+        monkeypatch.setenv("ENGLISHY_SECTION_CONCURRENCY", "2")
+        sections = FakeWriter("section", delays={"": 0.05})
+        asyncio.run(generate_report_with_integration(
+            "query", _outline(), [], FakeWriter("lead"), sections, FakeWriter("conclusion")
+        ))
+        assert sections.max_active <= 2
@@ -0,0 +1,96 @@
+"""
+Test cases for web result deduplication and fused ranking.
+"""
+
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.ranking import (
+    canonicalize_url, collapse_near_duplicates, hamming_distance, rank_web_results,
+    reciprocal_rank_fusion, select_under_budget, simhash
+)
+
+
+def _result(url, title="Title", snippet="snippet"):
+    return {"title": title, "url": url, "snippet": snippet}
+
+
+SNIPPET = "The present perfect tense connects past actions to the present, as in I have lived here for ten years."
+
+
+class TestCanonicalizeUrl:
+    """URL正規化のテスト"""
+
+    def test_tracking_and_mirror_variants(self):
+        """トラッキングパラメータやwww・スキームの違いが無視されることを確認"""
+        urls = [
+            "https://www.example.com/grammar/perfect/",
+            "http://example.com/grammar/perfect?utm_source=ddg&utm_medium=web",
+            "https://m.example.com/grammar/perfect#examples",
+            "https://example.com/grammar/perfect/index.html?fbclid=abc",
+        ]
+        assert len({canonicalize_url(url) for url in urls}) == 1
+
+    def test_meaningful_parameters_kept(self):
+        """意味のあるクエリパラメータは順序に関係なく維持されることを確認"""
+        assert canonicalize_url("https://example.com/q?b=2&a=1") == canonicalize_url("https://example.com/q?a=1&b=2")
+        assert canonicalize_url("https://example.com/q?page=1") != canonicalize_url("https://example.com/q?page=2")
+
+
+class TestSimhash:
+    """SimHashのテスト"""
+
+    def test_near_duplicates_are_close(self):
+        """ほぼ同じ文章は距離が小さく、異なる文章は大きいことを確認"""
+        a = simhash(SNIPPET)
+        b = simhash(SNIPPET.replace("ten", "10"))
+        c = simhash("Phrasal verbs combine a verb with a particle such as up, off or out to create new meanings.")
+        assert hamming_distance(a, b) < hamming_distance(a, c)
+        assert hamming_distance(a, c) > 10
+
+    def test_collapse_keeps_highest_ranked(self):
+        """重複のうち上位の結果が残ることを確認"""
+        results = [
+            _result("https://a.example/1", "Present perfect", SNIPPET),
+            _result("https://syndicated.example/copy", "Present perfect", SNIPPET + " Read more."),
+            _result("https://b.example/2", "Phrasal verbs", "Phrasal verbs combine a verb with a particle."),
+        ]
+        kept = collapse_near_duplicates(results)
+        assert [r["url"] for r in kept] == ["https://a.example/1", "https://b.example/2"]
+
+
+class TestFusion:
+    """RRFとトークン予算選択のテスト"""
+
+    def test_rrf_rewards_agreement(self):
+        """複数クエリで上位の結果が先頭になることを確認"""
+        lists = [
+            [_result("https://a.example"), _result("https://shared.example")],
+            [_result("https://www.shared.example/?utm_source=x"), _result("https://b.example")],
+        ]
+        fused = reciprocal_rank_fusion(lists)
+        assert fused[0]["url"] == "https://shared.example"
+        assert len(fused) == 3
+        assert abs(fused[0]["rrf_score"] - (1 / 62 + 1 / 61)) < 1e-9
+
+    def test_budget_selection(self):
+        """トークン予算内で結果が選ばれ、先頭は必ず含まれることを確認"""
+        results = [_result(f"https://example.com/{i}", snippet="word " * 20) for i in range(10)]
+        count_words = lambda text: len(text.split())
+        per_result = count_words("Title: Title\nURL: https://example.com/0\nContent: " + "word " * 20)
+
+        selected = select_under_budget(results, token_budget=per_result * 3, count_tokens=count_words)
+        assert len(selected) == 3
+        assert len(select_under_budget(results, token_budget=1, count_tokens=count_words)) == 1
+
+    def test_rank_web_results(self):
+        """統合処理で重複が除かれ予算内に収まることを確認"""
+        lists = [
+            [_result("https://a.example/p", "Present perfect", SNIPPET), _result("https://b.example", "Phrasal", "Verbs with particles.")],
+            [_result("https://mirror.example/p", "Present perfect", SNIPPET), _result("https://a.example/p?utm_campaign=x", "Present perfect", SNIPPET)],
+        ]
+        ranked = rank_web_results(lists, token_budget=10_000)
+        assert [r["url"] for r in ranked] == ["https://a.example/p", "https://b.example"]
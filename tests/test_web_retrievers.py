@@ -0,0 +1,151 @@
+"""
+Test cases for the web retriever registry, local engine and hedged search.
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.base import BaseWebRetriever
+from retriever.web_search.hedged import HedgedWebRetriever
+from retriever.web_search.local_search import LocalFileSearchWebRetriever
+
+
+DOCUMENTS = [
+    {"title": "Present perfect tense", "url": "https://grammar.example/present-perfect", "snippet": "Use have plus past participle."},
+    {"title": "Past simple", "url": "https://other.example/past-simple", "snippet": "Finished actions, often with perfect time words."},
+    {"title": "Phrasal verbs", "url": "https://grammar.example/phrasal", "snippet": "Verbs with particles."},
+]
+
+
+class FakeRetriever(BaseWebRetriever):
+    """遅延と結果を指定できるテスト用エンジン"""
+
+    def __init__(self, name, delay=0.0, results=None):
+        super().__init__(name)
+        self.delay = delay
+        self.results = results if results is not None else [{"title": name, "url": f"https://{name}.example", "snippet": ""}]
+        self.calls = 0
+
+    def _search(self, query, k, domains=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.results
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "local_search.jsonl"
+    path.write_text("\n".join(json.dumps(doc) for doc in DOCUMENTS), encoding="utf-8")
+    return str(path)
+
+
+class TestLocalFileSearch:
+    """ローカルファイル検索エンジンのテスト"""
+
+    def test_ranks_by_term_overlap(self, local_file):
+        """タイトル一致を重視して順位付けされることを確認"""
+        retriever = LocalFileSearchWebRetriever(local_file)
+        results = retriever.search("present perfect", k=2)
+        assert [r["url"] for r in results] == [
+            "https://grammar.example/present-perfect",
+            "https://other.example/past-simple",
+        ]
+        assert results[0]["source"] == "local"
+
+    def test_domain_filter(self, local_file):
+        """ドメイン指定で絞り込まれることを確認"""
+        retriever = LocalFileSearchWebRetriever(local_file)
+        results = retriever.search("perfect", domains=["other.example"])
+        assert [r["url"] for r in results] == ["https://other.example/past-simple"]
+
+    def test_json_list_and_search_many(self, tmp_path):
+        """JSON配列ファイルとsearch_manyが使えることを確認"""
+        path = tmp_path / "docs.json"
+        path.write_text(json.dumps(DOCUMENTS), encoding="utf-8")
+        retriever = LocalFileSearchWebRetriever(str(path))
+        results = asyncio.run(retriever.search_many(["phrasal", "nothing matches"], k=3))
+        assert len(results[0]) == 1
+        assert results[1] == []
+
+
+class TestHedgedWebRetriever:
+    """ヘッジ検索のテスト"""
+
+    def test_fast_primary_is_not_hedged(self):
+        """プライマリが速い場合はセカンダリを呼ばないことを確認"""
+        primary, secondary = FakeRetriever("primary"), FakeRetriever("secondary")
+        retriever = HedgedWebRetriever(primary, secondary, hedge_delay=0.5)
+        results = asyncio.run(retriever.asearch("query"))
+        assert results[0]["title"] == "primary"
+        assert secondary.calls == 0
+        assert retriever.stats()["hedged"] == 0
+
+    def test_slow_primary_is_hedged(self):
+        """プライマリが遅い場合はセカンダリの結果が先に返ることを確認"""
+        primary, secondary = FakeRetriever("primary", delay=1.0), FakeRetriever("secondary")
+        retriever = HedgedWebRetriever(primary, secondary, hedge_delay=0.1)
+        start = time.perf_counter()
+        results = asyncio.run(retriever.asearch("query"))
+        elapsed = time.perf_counter() - start
+        assert results[0]["title"] == "secondary"
+        assert retriever.stats()["secondary_wins"] == 1
+        # asyncio.run waits for the abandoned worker thread, so only check the answer came first
+        assert elapsed < 1.5
+
+    def test_empty_primary_falls_back(self):
+        """プライマリが空の場合はすぐにセカンダリを使うことを確認"""
+        primary, secondary = FakeRetriever("primary", results=[]), FakeRetriever("secondary")
+        retriever = HedgedWebRetriever(primary, secondary, hedge_delay=5.0)
+        start = time.perf_counter()
+        results = asyncio.run(retriever.asearch("query"))
+        assert time.perf_counter() - start < 1.0
+        assert results[0]["title"] == "secondary"
+
+    def test_sync_search(self):
+        """同期searchでもヘッジされることを確認"""
+        retriever = HedgedWebRetriever(FakeRetriever("primary", delay=0.5), FakeRetriever("secondary"), hedge_delay=0.05)
+        assert retriever.search("query")[0]["title"] == "secondary"
+
+
+class TestRegistry:
+    """load_web_retrieverのテスト"""
+
+    def test_load_local_and_hedged(self, local_file, monkeypatch):
+        """環境変数からローカル・ヘッジ構成を読み込めることを確認"""
+        from src.utils.web_retriever import load_web_retriever
+
+        monkeypatch.setenv("ENGLISHY_LOCAL_SEARCH_FILE", local_file)
+        monkeypatch.setenv("ENGLISHY_WEB_SEARCH_CACHE", "0")
+        monkeypatch.setenv("ENGLISHY_WEB_SEARCH_HEDGE_DELAY", "0.2")
+
+        local = load_web_retriever("Local")
+        assert local.search_engine == "local"
+
+        hedged = load_web_retriever("Local+Local")
+        assert hedged.search_engine == "local+local"
+        assert hedged.hedge_delay == 0.2
+
+    def test_register_and_unknown(self, monkeypatch):
+        """独自エンジンの登録と未知エンジンのエラーを確認"""
+        from src.utils.web_retriever import WEB_RETRIEVERS, load_web_retriever, register_web_retriever
+
+        monkeypatch.setenv("ENGLISHY_WEB_SEARCH_CACHE", "0")
+        monkeypatch.setitem(WEB_RETRIEVERS, "fake", lambda cache: FakeRetriever("fake"))
+        assert load_web_retriever("FAKE").search_engine == "fake"
+
+        register_web_retriever("Fake2", lambda cache: FakeRetriever("fake2"))
+        try:
+            assert load_web_retriever("fake2").search_engine == "fake2"
+        finally:
+            WEB_RETRIEVERS.pop("fake2")
+
+        with pytest.raises(ValueError):
+            load_web_retriever("bing")
@@ -0,0 +1,69 @@
+"""
+Test cases for DuckDuckGoSearchWebRetriever concurrent search.
+"""
+
+import asyncio
+import sys
+import os
+import time
+from unittest.mock import Mock
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.duckduckgo_search import DuckDuckGoSearchWebRetriever
+
+
+def _fake_text(delays):
+    """クエリごとに遅延を設定できるDDGS.textのフェイク"""
+    def text(enhanced_query, max_results=10):
+        for keyword, delay in delays.items():
+            if keyword in enhanced_query:
+                time.sleep(delay)
+                return [{"title": f"{keyword} title", "href": f"https://example.com/{keyword}", "body": keyword}]
+        return []
+    return text
+
+
+class TestSearchMany:
+    """search_manyの並行検索テスト"""
+
+    def setup_method(self):
+        self.retriever = DuckDuckGoSearchWebRetriever()
+        self.retriever.ddgs = Mock()
+
+    def test_results_keep_query_order(self):
+        """結果がクエリ順に返されることを確認"""
+        self.retriever.ddgs.text.side_effect = _fake_text({"alpha": 0.2, "beta": 0.0, "gamma": 0.1})
+
+        results = asyncio.run(self.retriever.search_many(["alpha", "beta", "gamma"], k=4))
+
+        assert [r[0]["snippet"] for r in results] == ["alpha", "beta", "gamma"]
+
+    def test_queries_run_concurrently(self):
+        """クエリが並行に実行されることを確認"""
+        self.retriever.ddgs.text.side_effect = _fake_text({"alpha": 0.3, "beta": 0.3, "gamma": 0.3})
+
+        start = time.perf_counter()
+        asyncio.run(self.retriever.search_many(["alpha", "beta", "gamma"], k=4, max_concurrency=3))
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.8
+
+    def test_partial_results_on_timeout(self):
+        """タイムアウトしたクエリのみ空リストになることを確認"""
+        self.retriever.ddgs.text.side_effect = _fake_text({"slow": 1.0, "fast": 0.0})
+
+        results = asyncio.run(self.retriever.search_many(["slow", "fast"], k=4, timeout=0.2))
+
+        assert results[0] == []
+        assert len(results[1]) == 1
+        assert results[1][0]["url"] == "https://example.com/fast"
+
+    def test_asearch(self):
+        """asearchが同期searchと同じ結果を返すことを確認"""
+        self.retriever.ddgs.text.side_effect = _fake_text({"alpha": 0.0})
+
+        results = asyncio.run(self.retriever.asearch("alpha", k=4))
+
+        assert results == self.retriever.search("alpha", k=4)
@@ -0,0 +1,136 @@
+"""
+Test cases for the persistent web search cache.
+"""
+
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.cache import SearchResultCache, normalize_query
+from retriever.web_search.duckduckgo_search import DuckDuckGoSearchWebRetriever
+
+
+RESULTS = [{"title": "Subjunctive", "url": "https://example.com/a", "snippet": "I wish I were", "source": "duckduckgo"}]
+
+
+class TestSearchResultCache:
+    """SearchResultCacheのテスト"""
+
+    def test_key_normalization(self):
+        """正規化されたクエリ・ドメインが同じキーになることを確認"""
+        key1 = SearchResultCache.make_key("  仮定法過去  I wish I were ", 4, ["b.com", "A.com"], "duckduckgo")
+        key2 = SearchResultCache.make_key("仮定法過去 i wish i were", 4, ["a.com", "b.com"], "DuckDuckGo")
+        assert key1 == key2
+        assert SearchResultCache.make_key("present perfect", 4, None, "duckduckgo") != \
+            SearchResultCache.make_key("present perfect", 5, None, "duckduckgo")
+        assert normalize_query("Ｐresent  Perfect") == "present perfect"
+
+    def test_fresh_hit_and_miss_metrics(self, tmp_path):
+        """キャッシュヒット時にloaderが呼ばれないことを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=60)
+        loader = Mock(return_value=RESULTS)
+        key = cache.make_key("present perfect vs past", 4, None, "duckduckgo")
+
+        assert cache.fetch(key, loader) == RESULTS
+        assert cache.fetch(key, loader) == RESULTS
+        assert loader.call_count == 1
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["fresh_hits"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_metrics_under_concurrent_lookups(self, tmp_path):
+        """複数スレッドから参照しても統計の合計が参照回数と一致することを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=60)
+        key = cache.make_key("present perfect vs past", 4, None, "duckduckgo")
+        cache.fetch(key, Mock(return_value=RESULTS))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: cache.fetch(key, Mock(return_value=RESULTS)), range(200)))
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["fresh_hits"] == 200
+
+    def test_persists_across_instances(self, tmp_path):
+        """別インスタンスからもディスク上のキャッシュが読めることを確認"""
+        key = SearchResultCache.make_key("gerund", 4, None, "duckduckgo")
+        SearchResultCache(cache_dir=str(tmp_path)).fetch(key, Mock(return_value=RESULTS))
+
+        loader = Mock(return_value=[])
+        assert SearchResultCache(cache_dir=str(tmp_path)).fetch(key, loader) == RESULTS
+        loader.assert_not_called()
+
+    def test_empty_results_not_cached(self, tmp_path):
+        """空の結果はキャッシュされないことを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path))
+        key = cache.make_key("gerund", 4, None, "duckduckgo")
+        loader = Mock(return_value=[])
+
+        cache.fetch(key, loader)
+        cache.fetch(key, loader)
+        assert loader.call_count == 2
+
+    def test_stale_while_revalidate(self, tmp_path):
+        """期限切れのエントリを返しつつバックグラウンドで更新することを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=60, stale_ttl=60)
+        key = cache.make_key("gerund", 4, None, "duckduckgo")
+        cache.fetch(key, Mock(return_value=RESULTS))
+
+        refreshed = [dict(RESULTS[0], snippet="refreshed")]
+        loader = Mock(return_value=refreshed)
+        with patch("retriever.web_search.cache.time.time", return_value=time.time() + 90):
+            assert cache.fetch(key, loader) == RESULTS
+
+        for _ in range(50):
+            if cache.stats()["refreshes"]:
+                break
+            time.sleep(0.02)
+        assert cache.peek(key) == refreshed
+        assert cache.stats()["stale_hits"] == 1
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        """stale期間も過ぎたエントリはミスとして扱われることを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=60, stale_ttl=60)
+        key = cache.make_key("gerund", 4, None, "duckduckgo")
+        cache.fetch(key, Mock(return_value=RESULTS))
+
+        loader = Mock(return_value=RESULTS)
+        with patch("retriever.web_search.cache.time.time", return_value=time.time() + 500):
+            cache.fetch(key, loader)
+        loader.assert_called_once()
+
+    def test_size_bounded_eviction(self, tmp_path):
+        """最大件数を超えると最も古いエントリが削除されることを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), max_entries=2)
+        keys = [cache.make_key(f"query {i}", 4, None, "duckduckgo") for i in range(3)]
+        for key in keys:
+            cache.fetch(key, Mock(return_value=RESULTS))
+            time.sleep(0.01)
+
+        stats = cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert cache.peek(keys[0]) is None
+
+
+class TestCachedRetriever:
+    """キャッシュ付きDuckDuckGoSearchWebRetrieverのテスト"""
+
+    def test_search_uses_cache(self, tmp_path):
+        """2回目の検索でDuckDuckGoが呼ばれないことを確認"""
+        retriever = DuckDuckGoSearchWebRetriever(cache=SearchResultCache(cache_dir=str(tmp_path)))
+        retriever.ddgs = Mock()
+        retriever.ddgs.text.return_value = [{"title": "t", "href": "https://example.com", "body": "b"}]
+
+        first = retriever.search("present perfect vs past", k=4)
+        second = retriever.search("Present perfect  vs past", k=4)
+
+        assert first == second
+        assert retriever.ddgs.text.call_count == 1
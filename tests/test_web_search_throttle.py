@@ -0,0 +1,194 @@
+"""
+Test cases for web search rate limiting, retries and circuit breaking.
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from retriever.web_search.cache import SearchResultCache
+from retriever.web_search.duckduckgo_search import DuckDuckGoSearchWebRetriever
+from retriever.web_search.throttle import CircuitBreaker, CircuitOpenError, EngineGuard, TokenBucket, get_engine_guard
+
+
+def _guard(**kwargs):
+    settings = dict(rate=1000.0, burst=10, max_retries=2, backoff_base=0.01, failure_threshold=3, reset_timeout=0.2)
+    settings.update(kwargs)
+    return EngineGuard("test", **settings)
+
+
+class TestTokenBucket:
+    """トークンバケットのテスト"""
+
+    def test_burst_then_throttle(self):
+        """バースト分は即時、その後はレートに従って待つことを確認"""
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        start = time.perf_counter()
+        assert bucket.acquire() > 0
+        assert 0.05 < time.perf_counter() - start < 0.5
+
+
+class TestCircuitBreaker:
+    """サーキットブレーカーのテスト"""
+
+    def test_open_half_open_close(self):
+        """連続失敗で開き、待機後の試行成功で閉じることを確認"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        time.sleep(0.15)
+        assert breaker.allow()
+        assert not breaker.allow()  # only one trial call while half open
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.allow()
+
+    def test_failed_trial_reopens(self):
+        """試行が失敗すると再度開くことを確認"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+
+class TestEngineGuard:
+    """EngineGuardのテスト"""
+
+    def test_retries_then_succeeds(self):
+        """一時的な失敗がリトライされることを確認"""
+        guard = _guard()
+        func = Mock(side_effect=[RuntimeError("rate limited"), ["ok"]])
+        assert guard.call(func) == ["ok"]
+        stats = guard.stats()
+        assert stats["retried"] == 1
+        assert stats["failures"] == 1
+        assert stats["circuit"] == "closed"
+
+    def test_short_circuits_when_open(self):
+        """サーキットが開いている間は呼び出さずに失敗することを確認"""
+        guard = _guard(max_retries=0, failure_threshold=2)
+        func = Mock(side_effect=RuntimeError("down"))
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                guard.call(func)
+        with pytest.raises(CircuitOpenError):
+            guard.call(func)
+        assert func.call_count == 2
+        assert guard.stats()["short_circuited"] == 1
+
+    def test_one_failure_per_logical_call(self):
+        """リトライを使い切った呼び出しを1回の失敗として数えることを確認"""
+        guard = _guard(max_retries=2, failure_threshold=3)
+        func = Mock(side_effect=RuntimeError("down"))
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                guard.call(func)
+        assert func.call_count == 6
+        assert guard.stats()["circuit"] == "closed"
+        with pytest.raises(RuntimeError):
+            guard.call(func)
+        assert guard.stats()["circuit"] == "open"
+
+    def test_half_open_trial_keeps_its_retries(self):
+        """半開状態の試行もリトライでき、失敗すると再度開くことを確認"""
+        guard = _guard(max_retries=1, failure_threshold=1, reset_timeout=0.05)
+        with pytest.raises(RuntimeError):
+            guard.call(Mock(side_effect=RuntimeError("down")))
+        time.sleep(0.1)
+        func = Mock(side_effect=[RuntimeError("still down"), ["ok"]])
+        assert guard.call(func) == ["ok"]
+        assert func.call_count == 2
+        assert guard.stats()["circuit"] == "closed"
+
+    def test_counts_throttled_calls(self):
+        """レート制限で待った呼び出しが数えられることを確認"""
+        guard = _guard(rate=20.0, burst=1)
+        for _ in range(3):
+            guard.call(lambda: [])
+        assert guard.stats()["throttled"] == 2
+
+    def test_process_wide_guard(self):
+        """同じエンジン名では同じガードが共有されることを確認"""
+        assert get_engine_guard("Shared-Test") is get_engine_guard("shared-test")
+
+
+class TestGuardedRetriever:
+    """ガード付きDuckDuckGoSearchWebRetrieverのテスト"""
+
+    def test_open_circuit_serves_cached_results(self, tmp_path):
+        """サーキットが開いている間はキャッシュ（期限切れ含む）を返すことを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=0, stale_ttl=0)
+        guard = _guard(max_retries=0, failure_threshold=1, reset_timeout=60)
+        retriever = DuckDuckGoSearchWebRetriever(cache=cache, guard=guard)
+        retriever.ddgs = Mock()
+        retriever.ddgs.text.return_value = [{"title": "t", "href": "https://example.com", "body": "b"}]
+
+        assert len(retriever.search("grammar", k=1)) == 1
+
+        retriever.ddgs.text.side_effect = RuntimeError("202 Ratelimit")
+        assert retriever.search("grammar", k=1)[0]["url"] == "https://example.com"  # failure opens the circuit
+        assert retriever.search("grammar", k=1)[0]["url"] == "https://example.com"
+        assert retriever.search("vocabulary", k=1) == []
+        assert retriever.ddgs.text.call_count == 2
+        assert guard.stats()["short_circuited"] == 2
+
+
+class TestThrottledSearchMany:
+    """レート制限下のsearch_manyのテスト"""
+
+    def test_rate_limit_wait_is_not_timed(self):
+        """レート制限の待ち時間はタイムアウトに数えないことを確認"""
+        guard = _guard(rate=5.0, burst=1)
+        retriever = DuckDuckGoSearchWebRetriever(guard=guard)
+        retriever.ddgs = Mock()
+        retriever.ddgs.text.return_value = [{"title": "t", "href": "https://example.com", "body": "b"}]
+
+        results = asyncio.run(retriever.search_many(["a", "b", "c"], k=1, max_concurrency=3, timeout=0.15))
+
+        assert all(len(result) == 1 for result in results)
+        assert guard.stats()["throttled"] == 2
+
+    def test_timeout_serves_stale_cache_and_holds_slot(self, tmp_path):
+        """タイムアウトしたクエリは期限切れのキャッシュを返し、ワーカーが終わるまで枠を占有することを確認"""
+        cache = SearchResultCache(cache_dir=str(tmp_path), ttl=0, stale_ttl=0)
+        retriever = DuckDuckGoSearchWebRetriever(cache=cache)
+        retriever.ddgs = Mock()
+        retriever.ddgs.text.return_value = [{"title": "t", "href": "https://example.com/old", "body": "b"}]
+        retriever.search("slow", k=1)
+
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def text(enhanced_query, max_results=10):
+            with lock:
+                active.append(enhanced_query)
+                peak.append(len(active))
+            time.sleep(0.3 if "slow" in enhanced_query else 0.0)
+            with lock:
+                active.remove(enhanced_query)
+            return [{"title": "t", "href": "https://example.com/new", "body": "b"}]
+
+        retriever.ddgs.text.side_effect = text
+        results = asyncio.run(retriever.search_many(["slow", "fast"], k=1, max_concurrency=1, timeout=0.1))
+
+        assert results[0][0]["url"] == "https://example.com/old"
+        assert results[1][0]["url"] == "https://example.com/new"
+        assert max(peak) == 1